@@ -0,0 +1,117 @@
+"""
+Benchmark: the same paginated list endpoint served through a sync Session
+(FastAPI's threadpool, 40 threads by default) and through an AsyncSession,
+at growing numbers of concurrent requests.
+
+A per-statement delay stands in for the network round trip to a database
+server, which is what keeps a request waiting rather than computing. The
+app's engines are pointed (through DATABASE_URL, before database is
+imported) at a bench.db in a temporary directory holding 500 rooms, with
+the pool sized to the largest --concurrency:
+
+    python bench_async.py --latency-ms 20 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--latency-ms", type=float, default=20.0)
+parser.add_argument("--requests", type=int, default=2000)
+parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 40, 100, 200])
+args = parser.parse_args()
+
+tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+# Enough connections that the pool is not what limits either variant
+os.environ["DB_POOL_SIZE"] = str(max(args.concurrency))
+os.environ["DB_MAX_OVERFLOW"] = "0"
+
+import httpx
+from fastapi import Depends, FastAPI, Request, Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.util.concurrency import await_only
+
+import models, database, pagination, bulk
+
+ROOM_LIST = pagination.ListSpec(models.Room, sortable=("capacity",))
+app = FastAPI()
+
+
+@app.get("/sync/rooms/")
+def sync_rooms(request: Request, response: Response, db: Session = Depends(database.get_db)):
+    return [room.id for room in pagination.paginate(db, ROOM_LIST, response, request.query_params, limit=50)]
+
+
+@app.get("/async/rooms/")
+async def async_rooms(request: Request, response: Response, db: AsyncSession = Depends(database.get_async_db)):
+    rows = await pagination.paginate_async(db, ROOM_LIST, response, request.query_params, limit=50)
+    return [room.id for room in rows]
+
+
+def add_latency():
+    delay = args.latency_ms / 1000
+
+    def wait(statement):
+        time.sleep(delay)
+
+    # The trace callback runs in the thread executing the statement: the request
+    # thread for the sync engine, aiosqlite's connection thread for the async one
+    @event.listens_for(database.engine, "connect")
+    def sync_connect(dbapi_connection, record):
+        dbapi_connection.set_trace_callback(wait)
+
+    @event.listens_for(database.async_engine.sync_engine, "connect")
+    def async_connect(dbapi_connection, record):
+        await_only(dbapi_connection.driver_connection.set_trace_callback(wait))
+
+
+async def measure(client: httpx.AsyncClient, path: str, concurrency: int, total: int) -> float:
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get(path)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - started)
+
+
+async def main():
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    bulk.insert_rows(db, models.Room, [
+        {"code": f"R{i}", "name": f"Sala {i}", "capacity": 20 + i % 60} for i in range(500)
+    ])
+    db.commit()
+    db.close()
+    # Every connection from here on is opened with the delay
+    database.engine.dispose()
+    add_latency()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up: open the pooled connections (and aiosqlite's threads) before timing
+        for path in ("/sync/rooms/", "/async/rooms/"):
+            await measure(client, path, max(args.concurrency), max(args.concurrency))
+        print(f"{args.requests} requests per run, {args.latency_ms} ms per statement")
+        for concurrency in args.concurrency:
+            sync_rps = await measure(client, "/sync/rooms/", concurrency, args.requests)
+            async_rps = await measure(client, "/async/rooms/", concurrency, args.requests)
+            print(f"  concurrency {concurrency:>4}: sync {sync_rps:7.0f} req/s   async {async_rps:7.0f} req/s")
+    await database.async_engine.dispose()
+    database.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    tmp.cleanup()
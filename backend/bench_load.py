@@ -0,0 +1,167 @@
+"""
+Load test: concurrent read throughput on the academic schedule table, plus
+single-row API writes, while a sync-sized write transaction runs in a loop;
+the default engine against the one configured by database.make_engine
+(WAL, busy_timeout, pool).
+
+Both engines point at SQLite files in a temporary directory, created and
+populated with --rows schedules for each run:
+
+    python bench_load.py --rows 20000 --readers 8 --seconds 5
+    python bench_load.py --hold 6 --seconds 15    # a sync longer than the old 5 s lock timeout
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import models, bulk
+
+
+def default_engine(url: str):
+    # What database.py used to build
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def populate(engine, n_rows: int):
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    bulk.insert_rows(db, models.AcademicSchedule, [
+        {"carrera": f"C{i % 40}", "codramo": f"R{i % 2000}", "seccion": str(i % 5), "dia": "LUNES",
+         "modulo_horario": str(i % 12), "sala": f"Sala {i % 300}", "asignatura": f"Asignatura {i}",
+         "docente": f"Docente {i % 900}", "row_hash": "0"}
+        for i in range(n_rows)
+    ])
+    db.commit()
+    db.close()
+
+
+def sync_writer(url: str, make, hold: float, stop, syncs, errors):
+    """
+    A sync rewriting every row_hash in one transaction, in its own process
+    as it would be with several API workers.
+    """
+    engine = make(url)
+    db = sessionmaker(bind=engine)()
+    ids = [id for (id,) in db.query(models.AcademicSchedule.id)]
+    while not stop.is_set():
+        try:
+            bulk.update_rows(db, models.AcademicSchedule, [{"id": id, "row_hash": str(syncs.value)} for id in ids])
+            # The remaining sync phases keep the write transaction open a while longer
+            time.sleep(hold)
+            db.commit()
+            syncs.value += 1
+        except OperationalError:
+            db.rollback()
+            errors.value += 1
+    db.close()
+    engine.dispose()
+
+
+def run(url: str, make, n_rows: int, readers: int, seconds: float, hold: float) -> dict:
+    engine = make(url)
+    Session = sessionmaker(bind=engine)
+    stop = threading.Event()
+    sync_stop = multiprocessing.Event()
+    latencies = []
+    write_latencies = []
+    errors = {"read": 0, "api_write": 0}
+    syncs = multiprocessing.Value("i", 0)
+    sync_errors = multiprocessing.Value("i", 0)
+    lock = threading.Lock()
+
+    def reader(offset: int):
+        db = Session()
+        last_id = offset
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                rows = db.query(models.AcademicSchedule).filter(models.AcademicSchedule.id > last_id) \
+                    .order_by(models.AcademicSchedule.id).limit(200).all()
+                db.rollback()
+                last_id = rows[-1].id if rows else 0
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed * 1000)
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    errors["read"] += 1
+        db.close()
+
+    def api_writer():
+        # Edits made through the API while the sync runs
+        db = Session()
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                db.query(models.AcademicSchedule).filter(models.AcademicSchedule.id == 1) \
+                    .update({"docente": f"Docente {started}"})
+                db.commit()
+                write_latencies.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                db.rollback()
+                errors["api_write"] += 1
+            time.sleep(0.05)
+        db.close()
+
+    sync = multiprocessing.Process(target=sync_writer, args=(url, make, hold, sync_stop, syncs, sync_errors))
+    threads = [threading.Thread(target=api_writer)]
+    threads += [threading.Thread(target=reader, args=(i * n_rows // readers,)) for i in range(readers)]
+    sync.start()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    sync_stop.set()
+    for thread in threads:
+        thread.join()
+    sync.join()
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        "reads_per_second": round(len(latencies) / seconds),
+        "read_p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+        "read_p95_ms": round(latencies[int(len(latencies) * 0.95)], 2) if latencies else None,
+        "read_errors": errors["read"],
+        "api_writes": len(write_latencies),
+        "api_write_max_ms": round(max(write_latencies), 1) if write_latencies else None,
+        "api_write_errors": errors["api_write"],
+        "syncs_completed": syncs.value,
+        "sync_errors": sync_errors.value,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--hold", type=float, default=0.2, help="seconds each sync keeps its transaction open")
+    args = parser.parse_args()
+    # Imported here, not at module level: database builds its engine for DATABASE_URL on import
+    import database
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, make in (("default engine", default_engine), ("make_engine", database.make_engine)):
+            url = f"sqlite:///{os.path.join(tmp, label.replace(' ', '_') + '.db')}"
+            engine = make(url)
+            populate(engine, args.rows)
+            engine.dispose()
+            result = run(url, make, args.rows, args.readers, args.seconds, args.hold)
+            print(f"{label:>15}: {result}")
+
+
+if __name__ == "__main__":
+    main()
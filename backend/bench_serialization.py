@@ -0,0 +1,116 @@
+"""
+Benchmark: building one JSON body of --subjects subjects and one of
+--schedules academic schedules the way FastAPI does it with response_model
+(ORM objects validated and dumped by Pydantic) against the bulk path (plain
+column rows encoded by orjson). Reports the best build time and the peak
+memory traced while building. The bodies are larger than one API page on
+purpose, to make the per-row cost visible; the rows are bulk-inserted into
+its own engine on a temporary file, the app's engine is never opened:
+
+    python bench_serialization.py --subjects 10000 --schedules 5000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--subjects", type=int, default=10000)
+parser.add_argument("--schedules", type=int, default=5000)
+parser.add_argument("--repeat", type=int, default=5)
+args = parser.parse_args()
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import selectinload, sessionmaker
+
+import models, schemas, serialization, bulk
+
+DAYS = ["LUNES", "MARTES", "MIERCOLES", "JUEVES", "VIERNES"]
+
+
+def seed(db):
+    bulk.insert_rows(db, models.Faculty, [{"name": f"Facultad {i}"} for i in range(8)])
+    bulk.insert_rows(db, models.Subject, [
+        {"code": f"RAM{i:05d}", "name": f"Asignatura {i}", "career_code": f"C{i % 40}", "level": str(i % 10),
+         "section": str(i % 3 + 1), "enrolled_students": 10 + i % 50, "required_room_type_id": 1,
+         "faculty_id": i % 8 + 1 if i % 20 else None}
+        for i in range(args.subjects)
+    ])
+    bulk.insert_rows(db, models.AcademicSchedule, [
+        {"carrera": f"Carrera {i % 40}", "nivel": str(i % 10), "dia": DAYS[i % 5], "codramo": f"RAM{i:05d}",
+         "modulo_horario": str(i % 12 + 1), "sala": f"S-{i % 150}", "seccion": "1",
+         "asignatura": f"Asignatura {i}", "docente": f"Docente {i % 300}"}
+        for i in range(args.schedules)
+    ])
+    db.commit()
+
+
+def pydantic_body(db, model, schema, options=(), limit=None):
+    # What FastAPI's response_model does: validate from attributes, dump to JSON-able data, encode
+    adapter = TypeAdapter(List[schema])
+    rows = db.execute(select(model).options(*options).order_by(model.id).limit(limit)).scalars().all()
+    return json.dumps(adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json"),
+                      ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def bulk_body(db, encoder, limit=None):
+    return encoder.encode(db.execute(encoder.select().order_by(encoder.model.id).limit(limit)).all())
+
+
+def measure(Session, build):
+    best = float("inf")
+    for _ in range(args.repeat):
+        db = Session()
+        gc.collect()
+        started = time.perf_counter()
+        build(db)
+        best = min(best, time.perf_counter() - started)
+        db.close()
+    # Peak memory in a separate run: tracing slows everything down
+    db = Session()
+    gc.collect()
+    tracemalloc.start()
+    body = build(db)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.close()
+    return best, peak, len(body)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        models.Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        db = Session()
+        seed(db)
+        db.close()
+
+        subject_rows = serialization.RowEncoder(schemas.Subject, models.Subject, nested={"faculty": schemas.Faculty})
+        schedule_rows = serialization.RowEncoder(schemas.AcademicSchedule, models.AcademicSchedule)
+        cases = [
+            (f"{args.subjects} subjects",
+             lambda db: pydantic_body(db, models.Subject, schemas.Subject, (selectinload(models.Subject.faculty),), args.subjects),
+             lambda db: bulk_body(db, subject_rows, args.subjects)),
+            (f"{args.schedules} academic schedules",
+             lambda db: pydantic_body(db, models.AcademicSchedule, schemas.AcademicSchedule, limit=args.schedules),
+             lambda db: bulk_body(db, schedule_rows, args.schedules)),
+        ]
+        for name, current, fast in cases:
+            print(name)
+            for label, build in (("ORM + Pydantic", current), ("rows + orjson", fast)):
+                seconds, peak, size = measure(Session, build)
+                print(f"  {label:<15} {seconds * 1000:8.1f} ms   peak {peak / 2**20:7.1f} MiB   body {size / 2**20:.1f} MiB")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
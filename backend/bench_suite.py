@@ -0,0 +1,409 @@
+"""
+Benchmark suite: generates a synthetic university (faculties, subjects,
+rooms, teachers, teacher availability and PRESENCIAL rows) and times
+schedule validation and creation, the Google Sheets sync through a local
+fake client, the list endpoints and the exports.
+
+DATABASE_URL is set to a bench.db in a temporary directory before main is
+imported, upgraded the way a deploy does ('migrations.py upgrade'), and the
+shared response cache is switched off so every request is timed. Results
+are written as JSON so runs from different releases can be compared:
+
+    python bench_suite.py --rows 20000 --output results.json
+    python bench_suite.py --compare results.json    # fails on cases over --tolerance slower
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from datetime import time as dtime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--faculties", type=int, default=12)
+parser.add_argument("--subjects", type=int, default=3000)
+parser.add_argument("--rooms", type=int, default=150)
+parser.add_argument("--teachers", type=int, default=400)
+parser.add_argument("--availability", type=float, default=0.6,
+                    help="share of time blocks each teacher is available in")
+parser.add_argument("--rows", type=int, default=10000, help="PRESENCIAL rows")
+parser.add_argument("--schedules", type=int, default=3000, help="schedules already placed")
+parser.add_argument("--probes", type=int, default=2000, help="validate_schedule calls")
+parser.add_argument("--creates", type=int, default=300, help="create_schedule calls")
+parser.add_argument("--changed", type=float, default=0.01, help="share of PRESENCIAL rows edited per incremental sync")
+parser.add_argument("--repeat", type=int, default=5)
+parser.add_argument("--seed", type=int, default=7)
+parser.add_argument("--output", default="bench_results.json")
+parser.add_argument("--compare", help="earlier results file to compare against")
+parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown against --compare")
+args = parser.parse_args()
+
+tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+os.environ.pop("SHARED_CACHE_DIR", None)
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import models, schemas, crud, database, cache, google_sheets, migrations, schedule_index
+import main as api
+
+# Version of the results file layout
+FORMAT = 1
+
+DAYS = [("LU", "Lunes"), ("MA", "Martes"), ("MI", "Miércoles"), ("JU", "Jueves"), ("VI", "Viernes"), ("SA", "Sábado")]
+# Eight 80-minute modules with a 10-minute break, from 08:00
+MODULES = [(str(i + 1), 480 + i * 90, 560 + i * 90) for i in range(8)]
+BUILDINGS = ["CCEA", "CCEB", "CCEC", "LAB", "GIM"]
+HEADER = ["CARRERA", "NIVEL", "DIA", "CODRAMO", "ASIGNATURA", "SECCION", "CUPO",
+          "CODIGO DOCENTE", "DOCENTE", "MODULO Y HORARIO", "SALA, CANCHA O LABORATORIO"]
+
+
+def clock(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+# --- Synthetic university ---
+
+class University:
+    """
+    The worksheets of a synthetic university, as the spreadsheet API returns them.
+    Rows are deterministic for a given seed.
+    """
+    def __init__(self, faculties, subjects, rooms, teachers, rows, seed):
+        self.rng = random.Random(seed)
+        self.careers = [f"CARRERA {i}" for i in range(faculties)]
+        self.subjects = [
+            (f"RAM{i:05d}", f"Asignatura {i}", self.careers[i % faculties], str(i % 10 + 1),
+             str(i % 3 + 1), str(self.rng.randint(10, 60)))
+            for i in range(subjects)
+        ]
+        self.rooms = [f"{BUILDINGS[i % len(BUILDINGS)]}-{i:03d}" for i in range(rooms)]
+        self.teachers = [(f"{10000000 + i}-{i % 10}", f"Docente {i}") for i in range(teachers)]
+        self.sheets = {
+            "PRESENCIAL": [HEADER] + [self.row() for _ in range(rows)],
+            "SALAS": [["CODSALA", "NOMBRE", "CAPACIDAD"]] + [
+                [code, f"Sala {code}", str(self.rng.choice((20, 30, 40, 60, 80)))] for code in self.rooms
+            ],
+            "DIAS": [["DIA", "DIA_U"]] + [list(day) for day in DAYS],
+            "MODULOS": [["MOD_HOR", "HORA_INICIO", "HORA_FINAL", "RANGO", "MÓDULO"]] + [
+                [mod, clock(start), clock(end), f"{clock(start)} - {clock(end)}", mod] for mod, start, end in MODULES
+            ],
+        }
+
+    def row(self) -> list:
+        code, name, career, level, section, cupo = self.rng.choice(self.subjects)
+        rut, teacher = self.rng.choice(self.teachers)
+        # A few sessions have no room yet, a few are written as a clock range
+        room = self.rng.choice(self.rooms) if self.rng.random() > 0.05 else "POR ASIGNAR"
+        mod, start, end = self.rng.choice(MODULES)
+        module = mod if self.rng.random() > 0.05 else f"{clock(start)} - {clock(end + 30)}"
+        return [career, level, self.rng.choice(DAYS)[0], code, name, section, cupo, rut, teacher, module, room]
+
+    def edit(self, share: float) -> int:
+        """
+        Moves a share of the PRESENCIAL rows to another room and module, as a
+        planner editing the sheet between syncs would. Returns the rows edited.
+        """
+        rows = self.sheets["PRESENCIAL"]
+        edited = max(1, int((len(rows) - 1) * share))
+        for index in self.rng.sample(range(1, len(rows)), edited):
+            rows[index][9] = self.rng.choice(MODULES)[0]
+            rows[index][10] = self.rng.choice(self.rooms)
+        return edited
+
+
+class FakeWorksheet:
+    def __init__(self, title):
+        self.title = title
+
+
+class FakeSpreadsheet:
+    """
+    Stands in for gspread.Spreadsheet, serving the worksheets of a University.
+    """
+    def __init__(self, sheets):
+        self.sheets = sheets
+        self.modified = 0
+
+    def touch(self):
+        self.modified += 1
+
+    def get_lastUpdateTime(self):
+        return f"2026-03-01T10:00:{self.modified:02d}.000Z"
+
+    def worksheets(self):
+        return [FakeWorksheet(title) for title in self.sheets]
+
+    def values_batch_get(self, ranges):
+        return {"valueRanges": [
+            {"range": name, "values": self.sheets[name.strip("'")]} for name in ranges
+        ]}
+
+
+class FakeClient:
+    def __init__(self, sheets):
+        self.spreadsheet = FakeSpreadsheet(sheets)
+
+    def open_by_key(self, key):
+        return self.spreadsheet
+
+
+def seed_planning(db, n_schedules: int, availability: float, seed: int) -> dict:
+    """
+    What the sync doesn't bring: room types, time blocks, teacher availability
+    and the schedules already placed, over the synced rooms, teachers and subjects.
+    """
+    rng = random.Random(seed)
+    general = db.query(models.RoomType).filter_by(name="General").one()
+    lab = models.RoomType(name="Laboratorio")
+    db.add(lab)
+    db.flush()
+    room_ids = [id for id, in db.query(models.Room.id).order_by(models.Room.id)]
+    db.bulk_update_mappings(models.Room, [
+        {"id": id, "room_type_id": lab.id if i % 10 == 0 else general.id} for i, id in enumerate(room_ids)
+    ])
+    teacher_ids = [id for id, in db.query(models.Teacher.id).order_by(models.Teacher.id)]
+    subject_ids = [id for id, in db.query(models.Subject.id).order_by(models.Subject.id)]
+
+    blocks = [(name, start, end) for _, name in DAYS for _, start, end in MODULES]
+    db.bulk_insert_mappings(models.TimeBlock, [
+        {"id": i + 1, "day_of_week": day, "start_time": dtime(start // 60, start % 60),
+         "end_time": dtime(end // 60, end % 60)}
+        for i, (day, start, end) in enumerate(blocks)
+    ])
+    db.bulk_insert_mappings(models.TeacherAvailability, [
+        {"teacher_id": teacher, "time_block_id": block}
+        for teacher in teacher_ids for block in range(1, len(blocks) + 1) if rng.random() < availability
+    ])
+    # Slot i takes block i % blocks and the (i // blocks)-th room and teacher, so nothing clashes
+    n_schedules = min(n_schedules, len(blocks) * min(len(room_ids), len(teacher_ids)))
+    db.bulk_insert_mappings(models.Schedule, [
+        {"subject_id": subject_ids[i % len(subject_ids)], "room_id": room_ids[i // len(blocks)],
+         "teacher_id": teacher_ids[i // len(blocks)], "time_block_id": i % len(blocks) + 1}
+        for i in range(n_schedules)
+    ])
+    db.commit()
+    return {"rooms": room_ids, "teachers": teacher_ids, "subjects": subject_ids, "time_blocks": len(blocks),
+            "schedules": n_schedules}
+
+
+# --- Measuring ---
+
+def summary(timings: list, **extra) -> dict:
+    timings = sorted(timings)
+    return {
+        "runs": len(timings),
+        "mean_ms": round(statistics.mean(timings) * 1000, 3),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95)] * 1000, 3),
+        "min_ms": round(timings[0] * 1000, 3),
+        **extra,
+    }
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def bench_sync(university: University, results: dict):
+    client = FakeClient(university.sheets)
+    service = google_sheets.GoogleSheetsService(client=client)
+
+    def sync(force=False):
+        db = database.SessionLocal()
+        try:
+            return service.sync_full_data(db, force=force)
+        finally:
+            db.close()
+
+    seconds, report = timed(sync)
+    results["sync.full"] = summary([seconds], phases={
+        name: {key: value for key, value in phase.items() if key != "seconds"} for name, phase in report["phases"].items()
+    })
+    results["sync.unchanged"] = summary([timed(sync)[0] for _ in range(args.repeat)])
+    results["sync.forced"] = summary([timed(lambda: sync(force=True))[0] for _ in range(args.repeat)])
+
+    timings = []
+    for _ in range(args.repeat):
+        edited = university.edit(args.changed)
+        client.spreadsheet.touch()
+        timings.append(timed(sync)[0])
+    results["sync.incremental"] = summary(timings, rows_edited=edited)
+
+
+def probes(planning: dict, n: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [
+        schemas.ScheduleBase(
+            teacher_id=rng.choice(planning["teachers"]), room_id=rng.choice(planning["rooms"]),
+            subject_id=rng.choice(planning["subjects"]), time_block_id=rng.randint(1, planning["time_blocks"])
+        )
+        for _ in range(n)
+    ]
+
+
+def outcomes_of(fn, items: list) -> list:
+    """
+    (seconds, status code) of fn(item) for each item; 200 when it didn't raise.
+    """
+    measured = []
+    for item in items:
+        started = time.perf_counter()
+        try:
+            fn(item)
+            outcome = 200
+        except HTTPException as e:
+            outcome = e.status_code
+        measured.append((time.perf_counter() - started, outcome))
+    return measured
+
+
+def tally(measured: list) -> dict:
+    outcomes = {}
+    for _, outcome in measured:
+        outcomes[str(outcome)] = outcomes.get(str(outcome), 0) + 1
+    return outcomes
+
+
+def bench_schedules(planning: dict, results: dict):
+    db = database.SessionLocal()
+    try:
+        seconds, _ = timed(lambda: schedule_index.index.snapshot(db))
+        results["schedule_index.build"] = summary([seconds])
+        measured = outcomes_of(lambda item: crud.validate_schedule(db, item),
+                               probes(planning, args.probes, args.seed + 1))
+        results["validate_schedule"] = summary([seconds for seconds, _ in measured], outcomes=tally(measured))
+        # Accepted creations commit, rejected ones stop at validation: timed apart
+        measured = outcomes_of(lambda item: crud.create_schedule(db, item),
+                               probes(planning, args.creates, args.seed + 2))
+        for name, accepted in (("create_schedule", True), ("create_schedule.rejected", False)):
+            timings = [seconds for seconds, outcome in measured if (outcome == 200) == accepted]
+            if timings:
+                results[name] = summary(timings, outcomes=tally(measured))
+    finally:
+        db.close()
+
+
+ENDPOINTS = [
+    "/teachers/?limit=500",
+    "/rooms/?limit=500",
+    "/subjects/?limit=1000",
+    "/academic-schedules/?limit=1000",
+    "/academic-schedules/conflicts/",
+    "/grids/rooms",
+    "/dataset/snapshot",
+    "/reports/schedules/faculty/1",
+]
+EXPORTS = [
+    "/reports/export/?format=csv",
+    "/reports/export/?format=xlsx",
+    "/reports/export/faculty/1?format=csv",
+]
+
+
+def bench_http(results: dict):
+    with TestClient(api.app) as client:
+        for path in ENDPOINTS + EXPORTS:
+            # First request after a data change builds the cached bodies, the later ones reuse them
+            cache.bump()
+            cold, response = timed(lambda: client.get(path))
+            response.raise_for_status()
+            warm = [timed(lambda: client.get(path))[0] for _ in range(args.repeat)]
+            results[f"GET {path}"] = summary(warm, cold_ms=round(cold * 1000, 3), bytes=len(response.content))
+
+
+def counts() -> dict:
+    db = database.SessionLocal()
+    try:
+        return {model.__tablename__: db.query(model).count() for model in (
+            models.Faculty, models.Subject, models.Room, models.Teacher, models.TeacherAvailability,
+            models.TimeBlock, models.Schedule, models.AcademicSchedule, models.OccupancyCell,
+        )}
+    finally:
+        db.close()
+
+
+def revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """
+    Cases whose p50 got slower than the baseline's by more than the tolerance.
+    """
+    slower = []
+    for name, current in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before["p50_ms"]:
+            continue
+        ratio = current["p50_ms"] / before["p50_ms"]
+        flag = "  SLOWER" if ratio > 1 + args.tolerance else ""
+        print(f"  {name:<45} {before['p50_ms']:10.3f} -> {current['p50_ms']:10.3f} ms  x{ratio:5.2f}{flag}")
+        if flag:
+            slower.append(name)
+    return slower
+
+
+def main():
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "compare", "tolerance")}
+    university = University(args.faculties, args.subjects, args.rooms, args.teachers, args.rows, args.seed)
+    results = {}
+    # The deploy step main's startup expects
+    migrations.upgrade(database.engine)
+
+    bench_sync(university, results)
+    db = database.SessionLocal()
+    planning = seed_planning(db, args.schedules, args.availability, args.seed)
+    db.close()
+    bench_schedules(planning, results)
+    bench_http(results)
+
+    report = {
+        "format": FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "dataset": counts(),
+        "results": results,
+    }
+    for name, case in results.items():
+        print(f"{name:<47} p50 {case['p50_ms']:10.3f} ms   p95 {case['p95_ms']:10.3f} ms   runs {case['runs']}")
+
+    slower = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print("Warning: the baseline was run with a different configuration")
+        print(f"Against {args.compare} ({baseline.get('revision')}):")
+        slower = compare(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Results written to {args.output}")
+
+    database.engine.dispose()
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    status = main()
+    tmp.cleanup()
+    sys.exit(status)
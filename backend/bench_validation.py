@@ -0,0 +1,163 @@
+"""
+Benchmark: crud.validate_schedule latency with the in-memory schedule index
+against the previous query-per-check implementation.
+
+--schedules placed schedules (with their rooms, teachers and time blocks)
+are generated into a file in a temporary directory, and both
+implementations answer the same --probes random candidates:
+
+    python bench_validation.py --schedules 12000 --probes 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import time as dtime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+import models, schemas, crud, schedule_index
+
+
+def legacy_validate_schedule(db: Session, schedule: schemas.ScheduleBase):
+    """
+    The validation as it was before the schedule index: one query per check.
+    """
+    subject = db.query(models.Subject).filter(models.Subject.id == schedule.subject_id).first()
+    room = db.query(models.Room).filter(models.Room.id == schedule.room_id).first()
+    teacher = db.query(models.Teacher).filter(models.Teacher.id == schedule.teacher_id).first()
+    if not subject or not room or not teacher:
+        raise HTTPException(status_code=404, detail="not found")
+    if room.capacity < subject.enrolled_students:
+        raise HTTPException(status_code=400, detail="capacity")
+    if room.room_type_id != subject.required_room_type_id:
+        db.query(models.RoomType).filter(models.RoomType.id == room.room_type_id).first()
+        db.query(models.RoomType).filter(models.RoomType.id == subject.required_room_type_id).first()
+        raise HTTPException(status_code=400, detail="room type")
+    availability = db.query(models.TeacherAvailability).filter(
+        models.TeacherAvailability.teacher_id == schedule.teacher_id,
+        models.TeacherAvailability.time_block_id == schedule.time_block_id
+    ).first()
+    if not availability:
+        raise HTTPException(status_code=400, detail="availability")
+    if db.query(models.Schedule).filter(
+        models.Schedule.room_id == schedule.room_id,
+        models.Schedule.time_block_id == schedule.time_block_id
+    ).first():
+        raise HTTPException(status_code=409, detail="room clash")
+    if db.query(models.Schedule).filter(
+        models.Schedule.teacher_id == schedule.teacher_id,
+        models.Schedule.time_block_id == schedule.time_block_id
+    ).first():
+        raise HTTPException(status_code=409, detail="teacher clash")
+    return True
+
+
+def populate(db: Session, n_schedules: int, seed: int = 7):
+    rng = random.Random(seed)
+    days = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes"]
+    blocks = [(day, hour) for day in days for hour in range(8, 20)]
+    n_rooms = max(50, n_schedules // len(blocks) + 50)
+    n_teachers = max(80, int(n_rooms * 1.5))
+
+    db.bulk_insert_mappings(models.RoomType, [{"id": 1, "name": "Teórica"}])
+    db.bulk_insert_mappings(models.TimeBlock, [
+        {"id": i + 1, "day_of_week": day, "start_time": dtime(hour, 0), "end_time": dtime(hour, 50)}
+        for i, (day, hour) in enumerate(blocks)
+    ])
+    db.bulk_insert_mappings(models.Room, [
+        {"id": i + 1, "code": f"R{i}", "name": f"Sala {i}", "capacity": rng.randint(20, 80), "room_type_id": 1}
+        for i in range(n_rooms)
+    ])
+    db.bulk_insert_mappings(models.Teacher, [
+        {"id": i + 1, "full_name": f"Docente {i}", "rut": f"{i}-K"} for i in range(n_teachers)
+    ])
+    db.bulk_insert_mappings(models.TeacherAvailability, [
+        {"teacher_id": t + 1, "time_block_id": b + 1}
+        for t in range(n_teachers) for b in range(len(blocks)) if rng.random() < 0.8
+    ])
+    db.bulk_insert_mappings(models.Subject, [
+        {"id": i + 1, "name": f"Asignatura {i}", "enrolled_students": rng.randint(10, 40), "required_room_type_id": 1}
+        for i in range(n_schedules)
+    ])
+    schedules = []
+    for i in range(n_schedules):
+        block = i % len(blocks)
+        slot = i // len(blocks)
+        schedules.append({
+            "subject_id": i + 1, "room_id": slot + 1, "teacher_id": slot + 1, "time_block_id": block + 1
+        })
+    db.bulk_insert_mappings(models.Schedule, schedules)
+    db.commit()
+    return n_rooms, n_teachers, len(blocks)
+
+
+def probes(n: int, n_rooms: int, n_teachers: int, n_blocks: int, n_subjects: int, seed: int = 11):
+    rng = random.Random(seed)
+    return [
+        schemas.ScheduleBase(
+            teacher_id=rng.randint(1, n_teachers), room_id=rng.randint(1, n_rooms),
+            subject_id=rng.randint(1, n_subjects), time_block_id=rng.randint(1, n_blocks)
+        )
+        for _ in range(n)
+    ]
+
+
+def measure(validate, db: Session, items: list) -> dict:
+    timings = []
+    outcomes = {}
+    for item in items:
+        started = time.perf_counter()
+        try:
+            validate(db, item)
+            outcome = 200
+        except HTTPException as e:
+            outcome = e.status_code
+        timings.append((time.perf_counter() - started) * 1e6)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    timings.sort()
+    return {
+        "mean_us": round(statistics.mean(timings), 1),
+        "p50_us": round(timings[len(timings) // 2], 1),
+        "p95_us": round(timings[int(len(timings) * 0.95)], 1),
+        "outcomes": outcomes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--schedules", type=int, default=12000)
+    parser.add_argument("--probes", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        models.Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        n_rooms, n_teachers, n_blocks = populate(db, args.schedules)
+        items = probes(args.probes, n_rooms, n_teachers, n_blocks, args.schedules)
+
+        before = measure(legacy_validate_schedule, db, items)
+        started = time.perf_counter()
+        schedule_index.index.snapshot(db)
+        build_ms = (time.perf_counter() - started) * 1000
+        after = measure(crud.validate_schedule, db, items)
+        db.close()
+        engine.dispose()
+
+    print(f"{args.schedules} existing schedules, {args.probes} validations")
+    print(f"  before (queries): {before}")
+    print(f"  after (index):    {after}  (index build {build_ms:.1f} ms)")
+    print(f"  speedup (mean):   {before['mean_us'] / after['mean_us']:.0f}x")
+    assert before["outcomes"] == after["outcomes"], "validation outcomes differ"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from sqlalchemy.orm import Session
+
+
+def load_key_map(db: Session, model, key: str, columns: list) -> dict:
+    """
+    Loads a whole table as plain dicts keyed by its natural key column.
+    Uses a single SELECT over id, the key and the requested columns.
+    """
+    names = ["id", key] + list(columns)
+    attrs = [getattr(model, name) for name in names]
+    return {row[1]: dict(zip(names, row)) for row in db.query(*attrs)}
+
+
+def insert_rows(db: Session, model, rows: list):
+    """
+    Inserts a list of column dicts with one executemany INSERT.
+    """
+    if rows:
+        db.bulk_insert_mappings(model, rows)
+
+
+def update_rows(db: Session, model, rows: list):
+    """
+    Updates a list of column dicts (each one carrying its 'id') with one executemany UPDATE.
+    All dicts must share the same keys so the statement is not split.
+    """
+    if rows:
+        db.bulk_update_mappings(model, rows)
+
+
+def upsert(db: Session, model, key: str, records: dict) -> dict:
+    """
+    Inserts or updates records given as {natural key: {column: value}}.
+    Preloads the table once and only writes the rows that are new or changed,
+    so each call costs one SELECT, one INSERT and one UPDATE at most.
+    Returns the row counts used in the sync report.
+    """
+    columns = sorted({column for data in records.values() for column in data})
+    existing = load_key_map(db, model, key, columns)
+
+    inserts = []
+    updates = []
+    for natural_key, data in records.items():
+        row = existing.get(natural_key)
+        if row is None:
+            inserts.append({key: natural_key, **data})
+        elif any(row[column] != value for column, value in data.items()):
+            updates.append({"id": row["id"], **data})
+
+    insert_rows(db, model, inserts)
+    update_rows(db, model, updates)
+    return {"rows": len(records), "inserted": len(inserts), "updated": len(updates)}
+
+
+def delete_ids(db: Session, model, ids: list, chunk_size: int = 500, column: str = "id"):
+    """
+    Deletes rows by primary key (or whose 'column' is in 'ids'), in chunks
+    that stay under SQLite's bound parameter limit.
+    """
+    attr = getattr(model, column)
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        db.query(model).filter(attr.in_(chunk)).delete(synchronize_session=False)
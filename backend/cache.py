@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+
+# Bumped whenever reference data changes (Google Sheets sync, writes through the API).
+# In-memory indexes and caches remember the version they were built at and
+# rebuild once it moves.
+_lock = threading.Lock()
+_version = 0
+
+# With several API worker processes, SHARED_CACHE_DIR makes a bump in one of
+# them visible to the others: bump() rewrites a token file there and
+# data_version() moves whenever the token differs from the last one seen.
+SHARED_CACHE_DIR = os.getenv("SHARED_CACHE_DIR")
+_token_path = os.path.join(SHARED_CACHE_DIR, "data_version") if SHARED_CACHE_DIR else None
+_token = None
+
+
+def _read_token():
+    try:
+        return os.stat(_token_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def data_version() -> int:
+    global _version, _token
+    if _token_path:
+        token = _read_token()
+        if token != _token:
+            with _lock:
+                if token != _token:
+                    _token = token
+                    _version += 1
+    return _version
+
+
+def shared_token():
+    """
+    Identifies the current data version across processes (None without SHARED_CACHE_DIR).
+    """
+    return _read_token() if _token_path else None
+
+
+def bump() -> int:
+    global _version, _token
+    with _lock:
+        _version += 1
+        if _token_path:
+            os.makedirs(SHARED_CACHE_DIR, exist_ok=True)
+            temporary = f"{_token_path}.{os.getpid()}"
+            with open(temporary, "w") as f:
+                f.write(str(time.time_ns()))
+            os.replace(temporary, _token_path)
+            _token = _read_token()
+        return _version
+
+
+_values = {}
+
+
+def cached(key, build):
+    """
+    Returns build()'s value, memoized under 'key' until the next bump().
+    Callers put the engine in the key so separate databases don't share entries.
+    """
+    version = data_version()
+    entry = _values.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    value = build()
+    _values[key] = (version, value)
+    return value
@@ -0,0 +1,149 @@
+from sqlalchemy.orm import Session
+import models
+import cache
+import timeranges
+
+ROOM_CLASH = "Cruce de Sala"
+TEACHER_CLASH = "Cruce de Docente"
+SECTION_CLASH = "Cruce de Sección"
+
+
+def _room_key(sala):
+    key = (sala or "").upper().strip()
+    if not key or "A DETERMINAR" in key or "POR ASIGNAR" in key:
+        return None
+    return key
+
+
+def _teacher_key(docente):
+    key = (docente or "").upper().strip()
+    if not key or "POR ASIGNAR" in key or key in ("SIN DOCENTE", "NO ASIGNADO"):
+        return None
+    return key
+
+
+def _section_key(carrera, nivel, seccion):
+    if not carrera or not seccion:
+        return None
+    return f"{carrera.strip()} / {nivel or ''} / {seccion}".upper()
+
+
+def _overlapping(rows: list, clash: str) -> set:
+    """
+    Ids of the rows whose [start_minute, end_minute) overlaps another row's;
+    for section clashes only a row of a different subject counts.
+    """
+    flagged = set()
+    for run in timeranges.clusters(rows, lambda row: row.start_minute, lambda row: row.end_minute):
+        for i, a in enumerate(run):
+            for b in run[i + 1:]:
+                if b.start_minute >= a.end_minute:
+                    break
+                if clash == SECTION_CLASH and a.codramo == b.codramo:
+                    continue
+                flagged.update((a.id, b.id))
+    return flagged
+
+
+def find_conflicts(db: Session) -> list:
+    """
+    Single hash pass over academic_schedules grouped by entity.
+    Flags every row overlapping in time with another row on:
+    - the same room (sala), ignoring 'A DETERMINAR' / 'POR ASIGNAR';
+    - the same teacher (docente), ignoring unassigned placeholders;
+    - the same cohort (carrera, nivel, seccion) with a different subject (codramo).
+    Room and teacher keys follow the rules the dashboard used client-side.
+    Rows the sync resolved to a room or teacher id are keyed by that room's
+    code or teacher's name (joined on the id), so different spellings of the
+    same room still clash. Rows with minutes of the week are compared as
+    intervals, which catches modules that only partly overlap; rows without
+    them clash with every row, timed or not, of the same (dia, modulo_horario) text.
+    """
+    columns = [
+        models.AcademicSchedule.id, models.AcademicSchedule.dia, models.AcademicSchedule.modulo_horario,
+        models.AcademicSchedule.sala, models.AcademicSchedule.docente, models.AcademicSchedule.carrera,
+        models.AcademicSchedule.nivel, models.AcademicSchedule.seccion, models.AcademicSchedule.codramo,
+        models.AcademicSchedule.asignatura, models.AcademicSchedule.start_minute, models.AcademicSchedule.end_minute,
+        models.Room.code, models.Teacher.full_name,
+    ]
+    query = db.query(*columns) \
+        .outerjoin(models.Room, models.Room.id == models.AcademicSchedule.room_id) \
+        .outerjoin(models.Teacher, models.Teacher.id == models.AcademicSchedule.teacher_id)
+    groups = {ROOM_CLASH: {}, TEACHER_CLASH: {}, SECTION_CLASH: {}}
+    rooms = {}
+    for row in query.order_by(models.AcademicSchedule.id):
+        id, dia, modulo, sala, docente, carrera, nivel, seccion, codramo, asignatura, start, end, room_code, teacher_name = row
+        if not dia or not modulo:
+            continue
+        room = _room_key(sala)
+        teacher = _teacher_key(docente)
+        rooms[id] = room and room_code and room_code.upper().strip() or room
+        for clash, entity in (
+            (ROOM_CLASH, rooms[id]),
+            (TEACHER_CLASH, teacher and teacher_name and teacher_name.upper().strip() or teacher),
+            (SECTION_CLASH, _section_key(carrera, nivel, seccion)),
+        ):
+            if entity:
+                groups[clash].setdefault(entity, []).append(row)
+
+    conflicts = []
+    for clash, entities in groups.items():
+        for entity, rows in entities.items():
+            if len(rows) < 2:
+                continue
+            timed = [row for row in rows if row.start_minute is not None and row.end_minute is not None]
+            flagged = _overlapping(timed, clash)
+            untimed_slots = {(row.dia, row.modulo_horario) for row in rows if row.start_minute is None or row.end_minute is None}
+            if untimed_slots:
+                # Rows without minutes fall back to the slot text, against timed rows as well
+                slots = {}
+                for row in rows:
+                    if (row.dia, row.modulo_horario) in untimed_slots:
+                        slots.setdefault((row.dia, row.modulo_horario), []).append(row)
+                for slot_rows in slots.values():
+                    if len(slot_rows) < 2 or clash == SECTION_CLASH and len({row.codramo for row in slot_rows}) < 2:
+                        continue
+                    flagged.update(row.id for row in slot_rows)
+            for row in rows:
+                if row.id not in flagged:
+                    continue
+                conflicts.append({
+                    "type": clash,
+                    "entity": entity,
+                    "subject": row.asignatura or row.codramo,
+                    "day": row.dia,
+                    "module": row.modulo_horario,
+                    "room": rooms[row.id],
+                    "academic_schedule_id": row.id,
+                })
+    conflicts.sort(key=lambda c: (c["day"], c["module"], c["type"], c["entity"], c["academic_schedule_id"]))
+    return conflicts
+
+
+def conflict_report(db: Session, skip: int = 0, limit: int = 100, type: str = None,
+                    dia: str = None, modulo_horario: str = None, room_prefix: str = None) -> dict:
+    """
+    Paginated, optionally filtered view over find_conflicts(), which is
+    computed once per data version (i.e. until the next sync).
+    'room_prefix' keeps the clashes of sessions in a building (e.g. CCEA).
+    """
+    conflicts = cache.cached(("conflicts", db.get_bind()), lambda: find_conflicts(db))
+    room_prefix = (room_prefix or "").upper().strip()
+    if type or dia or modulo_horario or room_prefix:
+        conflicts = [
+            c for c in conflicts
+            if (not type or c["type"] == type)
+            and (not dia or c["day"] == dia)
+            and (not modulo_horario or c["module"] == modulo_horario)
+            and (not room_prefix or (c["room"] or "").startswith(room_prefix))
+        ]
+    summary = {}
+    for conflict in conflicts:
+        summary[conflict["type"]] = summary.get(conflict["type"], 0) + 1
+    return {
+        "total": len(conflicts),
+        "skip": skip,
+        "limit": limit,
+        "summary": summary,
+        "items": conflicts[skip:skip + limit],
+    }
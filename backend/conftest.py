@@ -0,0 +1,32 @@
+import sys
+import os
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Before anything imports database: the app's engine is an in-memory database, never u_planner.db
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["ASYNC_DATABASE_URL"] = "sqlite://"
+
+import models, database, migrations
+
+
+@pytest.fixture(scope="session", autouse=True)
+def app_database():
+    # What 'python migrations.py upgrade' does at deploy, so main's startup check passes
+    migrations.upgrade(database.engine)
+    yield
+    database.engine.dispose()
+
+
+@pytest.fixture
+def db():
+    # A session on an empty in-memory database with the current schema; test
+    # modules override this fixture (def db(db)) to add their seed rows
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
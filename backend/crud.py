@@ -1,66 +1,61 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager, joinedload
 from fastapi import HTTPException, status
-import models, schemas
+import models, schemas, schedule_index, timeranges
 
 def validate_schedule(db: Session, schedule: schemas.ScheduleBase):
+    # Checks run against the in-memory schedule index, no queries in the common case
+    check_schedule(schedule_index.index.snapshot(db), schedule)
+    return True
+
+def check_schedule(snapshot: schedule_index.Snapshot, schedule: schemas.ScheduleBase, pending=None):
+    # 'pending' holds room/teacher slots claimed by earlier items of the same batch
     # 1. Fetch related entities
-    subject = db.query(models.Subject).filter(models.Subject.id == schedule.subject_id).first()
-    room = db.query(models.Room).filter(models.Room.id == schedule.room_id).first()
-    teacher = db.query(models.Teacher).filter(models.Teacher.id == schedule.teacher_id).first()
+    subject = snapshot.subjects.get(schedule.subject_id)
+    room = snapshot.rooms.get(schedule.room_id)
     
-    if not subject or not room or not teacher:
+    if not subject or not room or schedule.teacher_id not in snapshot.teachers:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="One or more related entities (Subject, Room, Teacher) not found"
         )
+    enrolled_students, required_room_type_id = subject
+    capacity, room_type_id = room
 
     # 2. Check Room Capacity
-    if room.capacity < subject.enrolled_students:
+    if capacity < enrolled_students:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Room capacity ({room.capacity}) is less than enrolled students ({subject.enrolled_students})"
+            detail=f"Room capacity ({capacity}) is less than enrolled students ({enrolled_students})"
         )
 
     # 3. Check Room Equipment (Room Type)
-    if room.room_type_id != subject.required_room_type_id:
-        room_type = db.query(models.RoomType).filter(models.RoomType.id == room.room_type_id).first()
-        req_type = db.query(models.RoomType).filter(models.RoomType.id == subject.required_room_type_id).first()
+    if room_type_id != required_room_type_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Room type mismatch. Room is '{room_type.name}', but Subject requires '{req_type.name}'"
+            detail=f"Room type mismatch. Room is '{snapshot.room_types.get(room_type_id)}', but Subject requires '{snapshot.room_types.get(required_room_type_id)}'"
         )
 
     # 4. Check Teacher Availability
-    availability = db.query(models.TeacherAvailability).filter(
-        models.TeacherAvailability.teacher_id == schedule.teacher_id,
-        models.TeacherAvailability.time_block_id == schedule.time_block_id
-    ).first()
-    
-    if not availability:
+    if (schedule.teacher_id, schedule.time_block_id) not in snapshot.availability:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Teacher is not available during this time block"
         )
 
     # 5. Check Room Clash (Hard Constraint)
-    room_clash = db.query(models.Schedule).filter(
-        models.Schedule.room_id == schedule.room_id,
-        models.Schedule.time_block_id == schedule.time_block_id
-    ).first()
-    
-    if room_clash:
+    room_slot = (schedule.room_id, schedule.time_block_id)
+    if room_slot in snapshot.room_busy or (pending and room_slot in pending.room_busy):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Room is already occupied during this time block"
         )
 
     # 6. Check Teacher Clash (Hard Constraint)
-    teacher_clash = db.query(models.Schedule).filter(
-        models.Schedule.teacher_id == schedule.teacher_id,
-        models.Schedule.time_block_id == schedule.time_block_id
-    ).first()
-    
-    if teacher_clash:
+    teacher_slot = (schedule.teacher_id, schedule.time_block_id)
+    if teacher_slot in snapshot.teacher_busy or (pending and teacher_slot in pending.teacher_busy):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Teacher is already scheduled for another subject during this time block"
@@ -72,15 +67,121 @@ def create_schedule(db: Session, schedule: schemas.ScheduleBase):
     validate_schedule(db, schedule)
     db_schedule = models.Schedule(**schedule.model_dump())
     db.add(db_schedule)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another writer took the slot first; the unique constraints caught it
+        db.rollback()
+        schedule_index.index.invalidate()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Room or teacher is already scheduled during this time block"
+        )
     db.refresh(db_schedule)
+    schedule_index.index.add_schedule(db, db_schedule)
     return db_schedule
 
+class _PendingSlots:
+    def __init__(self):
+        self.room_busy = set()
+        self.teacher_busy = set()
+
+def create_schedules_batch(db: Session, items: list, mode: str = "all_or_nothing"):
+    """
+    Validates a list of schedules together, including clashes between items of the
+    same batch, and inserts the valid ones in a single transaction.
+    'all_or_nothing' inserts nothing if any item fails; 'best_effort' inserts the valid ones.
+    """
+    snapshot = schedule_index.index.snapshot(db)
+    pending = _PendingSlots()
+    results = []
+    valid = []
+
+    for position, item in enumerate(items):
+        try:
+            check_schedule(snapshot, item, pending)
+        except HTTPException as e:
+            results.append({"index": position, "status_code": e.status_code, "detail": e.detail, "schedule": None})
+            continue
+        pending.room_busy.add((item.room_id, item.time_block_id))
+        pending.teacher_busy.add((item.teacher_id, item.time_block_id))
+        result = {"index": position, "status_code": status.HTTP_201_CREATED, "detail": None, "schedule": None}
+        results.append(result)
+        valid.append((item, result))
+
+    failed = len(items) - len(valid)
+    if not valid or (failed and mode == "all_or_nothing"):
+        for _, result in valid:
+            result["status_code"] = status.HTTP_424_FAILED_DEPENDENCY
+            result["detail"] = "Not created: another item in the batch failed validation"
+        return {"committed": False, "created": 0, "failed": len(items), "results": results}
+
+    db_schedules = [models.Schedule(**item.model_dump()) for item, _ in valid]
+    db.add_all(db_schedules)
+    try:
+        db.flush()
+        created = [{"id": s.id, **item.model_dump()} for s, (item, _) in zip(db_schedules, valid)]
+        db.commit()
+    except IntegrityError:
+        # Another writer took one of the slots first; nothing from the batch is kept
+        db.rollback()
+        schedule_index.index.invalidate()
+        for _, result in valid:
+            result["status_code"] = status.HTTP_409_CONFLICT
+            result["detail"] = "Room or teacher is already scheduled during this time block"
+        return {"committed": False, "created": 0, "failed": len(items), "results": results}
+
+    for schedule, (item, result) in zip(created, valid):
+        schedule_index.index.add_schedule(db, item)
+        result["schedule"] = schedule
+    return {"committed": True, "created": len(valid), "failed": failed, "results": results}
+
 def get_schedules(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Schedule).offset(skip).limit(limit).all()
 
 def get_faculties(db: Session):
     return db.query(models.Faculty).all()
 
+def select_schedules_by_faculty(faculty_id: int = None):
+    # Subject, teacher (and its user), room and time block come in the same SELECT; None means every faculty
+    stmt = select(models.Schedule).join(models.Schedule.subject).options(
+        contains_eager(models.Schedule.subject),
+        joinedload(models.Schedule.teacher).joinedload(models.Teacher.user),
+        joinedload(models.Schedule.room),
+        joinedload(models.Schedule.time_block),
+    )
+    if faculty_id is not None:
+        stmt = stmt.filter(models.Subject.faculty_id == faculty_id)
+    return stmt.order_by(models.Schedule.id)
+
+def select_overlapping_schedules(start: int, end: int):
+    """
+    Academic schedules whose [start_minute, end_minute) overlaps [start, end),
+    in minutes of the week. Sessions don't cross midnight, so start_minute is
+    bounded on both sides and the lookup is a range of ix_academic_schedules_interval.
+    """
+    day_start = start - start % timeranges.MINUTES_PER_DAY
+    schedule = models.AcademicSchedule
+    return select(schedule).where(
+        schedule.start_minute >= day_start, schedule.start_minute < end, schedule.end_minute > start
+    ).order_by(schedule.start_minute, schedule.id)
+
+def get_busy_rooms(db: Session, start: int, end: int):
+    # Rooms joined on the resolved room_id of the overlapping sessions
+    room_ids = select_overlapping_schedules(start, end).with_only_columns(models.AcademicSchedule.room_id).order_by(None)
+    return db.execute(
+        select(models.Room).where(models.Room.id.in_(room_ids)).order_by(models.Room.code)
+    ).scalars().all()
+
 def get_schedules_by_faculty(db: Session, faculty_id: int):
-    return db.query(models.Schedule).join(models.Subject).filter(models.Subject.faculty_id == faculty_id).all()
+    return db.execute(select_schedules_by_faculty(faculty_id)).scalars().all()
+
+# --- Async reads (AsyncSession) ---
+async def get_faculties_async(db: AsyncSession):
+    return (await db.execute(select(models.Faculty))).scalars().all()
+
+async def get_room_types_async(db: AsyncSession):
+    return (await db.execute(select(models.RoomType))).scalars().all()
+
+async def get_schedules_by_faculty_async(db: AsyncSession, faculty_id: int):
+    return (await db.execute(select_schedules_by_faculty(faculty_id))).scalars().all()
@@ -1,5 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 import os
 from dotenv import load_dotenv
 
@@ -7,14 +10,117 @@ load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./u_planner.db")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Connection pool, per process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLite tuning: how long a connection waits on a lock, and how much of the file is memory-mapped
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "15000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers keep going while a sync writes; NORMAL is durable in WAL mode
+    # except for the last transactions on power loss, and avoids an fsync per commit
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+
+# Async drivers used for the same database by the async session
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _normalize(url: str):
+    if url.startswith("postgres://"):
+        # Scheme still handed out by some hosting providers
+        url = "postgresql://" + url[len("postgres://"):]
+    return make_url(url)
+
+
+def _in_memory(database_url) -> bool:
+    return database_url.database in (None, "", ":memory:")
+
+
+def make_engine(url: str = SQLALCHEMY_DATABASE_URL):
+    """
+    Engine configured for the database behind 'url'.
+    SQLite gets a thread-shareable connection and the pragmas above on every
+    new connection; server databases (PostgreSQL) get a sized pool with
+    pre-ping so connections dropped by the server are replaced transparently.
+    """
+    database_url = _normalize(url)
+
+    if database_url.get_backend_name() == "sqlite":
+        if _in_memory(database_url):
+            # An in-memory database lives in its connection: one connection shared by every thread
+            pool_options = {"poolclass": StaticPool}
+        else:
+            pool_options = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+        engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+            **pool_options
+        )
+        event.listen(engine, "connect", _sqlite_pragmas)
+        return engine
+
+    return create_engine(
+        database_url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
+def make_async_engine(url: str = SQLALCHEMY_DATABASE_URL):
+    """
+    AsyncEngine for the same database, through aiosqlite or asyncpg, with the
+    same pool settings and SQLite pragmas as make_engine.
+    """
+    database_url = _normalize(url)
+    backend = database_url.get_backend_name()
+    database_url = database_url.set(drivername=ASYNC_DRIVERS.get(backend, database_url.drivername))
+
+    if backend == "sqlite":
+        pool_options = {} if _in_memory(database_url) else {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+        engine = create_async_engine(
+            database_url, connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}, **pool_options
+        )
+        event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
+        return engine
+
+    return create_async_engine(
+        database_url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = make_async_engine(os.getenv("ASYNC_DATABASE_URL", SQLALCHEMY_DATABASE_URL))
+# Objects stay usable after commit: attribute refreshes would need an await
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
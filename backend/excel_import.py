@@ -0,0 +1,167 @@
+import csv
+import os
+import shutil
+import tempfile
+import openpyxl
+from sqlalchemy.orm import Session
+import models
+import bulk
+
+# Rows per executemany INSERT
+BATCH_SIZE = 1000
+# Uploads bigger than this go to a temporary file on disk instead of memory
+SPOOL_MAX_MEMORY = 4 * 1024 * 1024
+COPY_CHUNK_SIZE = 1024 * 1024
+# Where the per-job error reports are written
+REPORT_DIR = os.getenv("IMPORT_REPORT_DIR", os.path.join(tempfile.gettempdir(), "uplanner-imports"))
+
+
+def spool(source) -> tempfile.SpooledTemporaryFile:
+    """
+    Copies an uploaded file object chunk by chunk into a spooled temporary file,
+    so the upload is never held in memory as a single bytes object.
+    """
+    target = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+    target.seek(0)
+    return target
+
+
+def read_rows(fileobj):
+    """
+    Yields (row number, values) for every data row of the active sheet.
+    Read-only mode parses the sheet lazily instead of building every cell object.
+    """
+    wb = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from enumerate(wb.active.iter_rows(min_row=2, values_only=True), start=2)
+    finally:
+        wb.close()
+
+
+class ErrorReport:
+    """
+    Row-level problems found during an import, written to a CSV file as they
+    come up so a file full of bad rows does not pile up in memory.
+    The file is only created once there is something to report.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def add(self, row_number: int, reason: str):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(["fila", "motivo"])
+        self._writer.writerow([row_number, reason])
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _text(value):
+    text = str(value).strip() if value else None
+    return None if not text or text == "None" else text
+
+
+def _blank(row) -> bool:
+    return not row or all(_text(value) is None for value in row)
+
+
+def parse_teacher(row):
+    """
+    Returns the teacher columns of a row, None for a blank row, or raises
+    ValueError with the reason the row cannot be imported.
+    """
+    if _blank(row):
+        return None
+    if len(row) < 2:
+        raise ValueError("Faltan columnas (nombre, RUT)")
+    full_name, rut = _text(row[0]), _text(row[1])
+    if not full_name:
+        raise ValueError("Falta el nombre")
+    if not rut:
+        raise ValueError("Falta el RUT")
+    return {"full_name": full_name, "rut": rut}
+
+
+def parse_room(row):
+    """
+    Returns the room columns of a row, None for a blank row, or raises
+    ValueError with the reason the row cannot be imported.
+    """
+    if _blank(row):
+        return None
+    if len(row) < 3:
+        raise ValueError("Faltan columnas (código, nombre, capacidad)")
+    code, name = _text(row[0]), _text(row[1])
+    if not code:
+        raise ValueError("Falta el código")
+    if not name:
+        raise ValueError("Falta el nombre")
+    try:
+        capacity = int(row[2])
+    except (TypeError, ValueError):
+        raise ValueError(f"Capacidad no válida: {row[2]}")
+    return {"code": code, "name": name, "capacity": capacity}
+
+
+def import_rows(db: Session, model, key: str, rows, parse, batch_size: int = BATCH_SIZE,
+                progress=None, report: ErrorReport = None) -> dict:
+    """
+    Inserts the parsed rows whose natural key is not in the table yet, nor
+    earlier in the same file. Existing keys are loaded once into a set and new
+    rows are written in executemany batches; the caller commits.
+    Rows that fail to parse are counted and sent to 'report'; 'progress'
+    receives the rows read since the previous batch.
+    """
+    known = {value for (value,) in db.query(getattr(model, key))}
+    created = 0
+    skipped = 0
+    errors = 0
+    read = 0
+    batch = []
+    for row_number, row in rows:
+        read += 1
+        try:
+            record = parse(row)
+        except ValueError as e:
+            errors += 1
+            if report:
+                report.add(row_number, str(e))
+            continue
+        if record is None:
+            continue
+        if record[key] in known:
+            skipped += 1
+            continue
+        known.add(record[key])
+        batch.append(record)
+        if len(batch) >= batch_size:
+            bulk.insert_rows(db, model, batch)
+            created += len(batch)
+            batch = []
+            if progress:
+                progress("importing", read)
+                read = 0
+    bulk.insert_rows(db, model, batch)
+    created += len(batch)
+    if progress:
+        progress("importing", read)
+    return {"created": created, "skipped": skipped, "errors": errors}
+
+
+def import_teachers(db: Session, fileobj, progress=None, report: ErrorReport = None) -> dict:
+    return import_rows(db, models.Teacher, "rut", read_rows(fileobj), parse_teacher,
+                       progress=progress, report=report)
+
+
+def import_rooms(db: Session, fileobj, progress=None, report: ErrorReport = None) -> dict:
+    return import_rows(db, models.Room, "code", read_rows(fileobj), parse_room,
+                       progress=progress, report=report)
@@ -0,0 +1,72 @@
+import csv
+import io
+import tempfile
+import openpyxl
+from sqlalchemy.orm import Session
+import crud
+
+HEADER = ["ID", "Asignatura", "Docente", "Sala", "Bloque"]
+# Rows fetched per round trip and written per chunk sent to the client
+CHUNK_SIZE = 1000
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def schedule_rows(db: Session, faculty_id: int = None):
+    """
+    Yields one export row per schedule, reading the result in chunks of
+    CHUNK_SIZE instead of loading every ORM object first.
+    """
+    stmt = crud.select_schedules_by_faculty(faculty_id).execution_options(yield_per=CHUNK_SIZE)
+    for s in db.execute(stmt).scalars():
+        teacher = s.teacher.user.username if s.teacher.user else s.teacher.full_name
+        yield [
+            s.id,
+            s.subject.name,
+            teacher,
+            s.room.name,
+            f"{s.time_block.day_of_week} ({s.time_block.start_time}-{s.time_block.end_time})"
+        ]
+
+
+def stream_csv(bind, faculty_id: int = None):
+    """
+    CSV body as a generator of chunks. It opens its own session on 'bind'
+    because it keeps running after the request handler has returned.
+    """
+    with Session(bind=bind) as db:
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(HEADER)
+        for count, row in enumerate(schedule_rows(db, faculty_id), start=1):
+            writer.writerow(row)
+            if count % CHUNK_SIZE == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        yield output.getvalue()
+
+
+def build_xlsx(db: Session, faculty_id: int = None):
+    """
+    Writes the export with openpyxl's write-only workbook into a spooled
+    temporary file. Unlike the CSV this is buffered: an XLSX is a zip whose
+    sheet is only complete once the last row is written, so nothing can be
+    sent before the whole workbook exists (rows are still read in chunks and
+    the file spills to disk past CHUNK_SIZE KB). The caller streams and
+    closes the returned file.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Horario")
+    ws.append(HEADER)
+    for row in schedule_rows(db, faculty_id):
+        ws.append(row)
+    target = tempfile.SpooledTemporaryFile(max_size=CHUNK_SIZE * 1024)
+    wb.save(target)
+    target.seek(0)
+    return target
+
+
+def iter_file(fileobj, chunk_size: int = 64 * 1024):
+    with fileobj:
+        while chunk := fileobj.read(chunk_size):
+            yield chunk
@@ -0,0 +1,62 @@
+"""
+A local stand-in for the gspread client, for the tests that run the Google
+Sheets sync: FakeClient(make_sheets()) serves the four synced worksheets
+and counts the API calls it receives.
+"""
+
+
+class FakeWorksheet:
+    def __init__(self, title):
+        self.title = title
+
+
+class FakeSpreadsheet:
+    """
+    Stands in for gspread.Spreadsheet and counts every API call it receives.
+    """
+    def __init__(self, sheets, calls):
+        self.sheets = sheets
+        self.calls = calls
+        self.modified = "2026-03-01T10:00:00.000Z"
+
+    def get_lastUpdateTime(self):
+        self.calls["get_lastUpdateTime"] += 1
+        return self.modified
+
+    def worksheets(self):
+        self.calls["worksheets"] += 1
+        return [FakeWorksheet(title) for title in self.sheets]
+
+    def values_batch_get(self, ranges):
+        self.calls["values_batch_get"] += 1
+        return {"valueRanges": [
+            {"range": name, "values": self.sheets[name.strip("'")]} for name in ranges
+        ]}
+
+
+class FakeClient:
+    def __init__(self, sheets):
+        self.calls = {"open_by_key": 0, "get_lastUpdateTime": 0, "worksheets": 0, "values_batch_get": 0}
+        self.spreadsheet = FakeSpreadsheet(sheets, self.calls)
+
+    def open_by_key(self, key):
+        self.calls["open_by_key"] += 1
+        return self.spreadsheet
+
+
+def make_sheets():
+    return {
+        "PRESENCIAL": [
+            ["CARRERA", "NIVEL", "DIA", "CODRAMO", "ASIGNATURA", "SECCION", "CUPO",
+             "CODIGO DOCENTE", "DOCENTE", "MODULO Y HORARIO", "SALA, CANCHA O LABORATORIO"],
+            ["INGENIERÍA", "1", "LU", "MAT101", "Cálculo", "1", "30", "111-1", "Ana Pérez", "1", "CCEA101"],
+            ["INGENIERÍA", "1", "MA", "MAT101", "Cálculo", "1", "30", "111-1", "Ana Pérez", "2", "CCEA101"],
+            ["EDUCACIÓN", "2", "LU", "EDU200", "Didáctica", "1", "25", "222-2", "Luis Soto", "1"],
+        ],
+        "SALAS": [["CODSALA", "NOMBRE", "CAPACIDAD"], ["CCEA101", "A101", "40"]],
+        "DIAS": [["DIA", "DIA_U"], ["LU", "Lunes"], ["MA", "Martes"]],
+        "MODULOS": [
+            ["MOD_HOR", "HORA_INICIO", "HORA_FINAL", "RANGO", "MÓDULO"],
+            ["1", "08:00", "09:20", "08:00 - 09:20", "1"],
+        ],
+    }
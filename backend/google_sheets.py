@@ -1,86 +1,236 @@
+import bisect
 import gspread
 from sqlalchemy.orm import Session
 import models
+import bulk
+import cache
+import grids
+import lookups
+import timeranges
+import hashlib
+import json
+import time
 import uuid
 
 # ID of the Google Sheet
 SPREADSHEET_ID = '1rlitBQJ_0-0GwYqq3J6VTT6bQYcWJvO7uAuhTMPrSTM'
 
+# Worksheets read on every sync
+SYNC_WORKSHEETS = ["PRESENCIAL", "SALAS", "DIAS", "MODULOS"]
+
+# SyncState key holding the Drive modification time of the whole spreadsheet
+SPREADSHEET_REVISION_KEY = "__spreadsheet__"
+
+def _to_records(values: list) -> list:
+    """
+    Turns a raw values grid (header row first) into dicts, the same way
+    Worksheet.get_all_records() does: short rows padded, numbers numericised.
+    """
+    if not values:
+        return []
+    headers = values[0]
+    records = []
+    for row in values[1:]:
+        row = row + [""] * (len(headers) - len(row))
+        records.append(dict(zip(headers, gspread.utils.numericise_all(row))))
+    return records
+
+class _SubjectIndex:
+    """
+    In-memory lookup maps over subject rows (plain dicts), mirroring the
+    queries the sync used to run per row: by (code, section) and by name.
+    Each key keeps its subjects in insertion order, existing rows first,
+    the same order a '.first()' over the table would give.
+    """
+    def __init__(self):
+        self.maps = {"code_section": {}, "name": {}}
+        self.order = {}
+
+    def _keys(self, subject):
+        keys = [("name", subject["name"])]
+        if subject["code"] is not None:
+            keys.append(("code_section", (subject["code"], subject["section"])))
+        return keys
+
+    def add(self, subject):
+        self.order.setdefault(id(subject), len(self.order))
+        for map_name, key in self._keys(subject):
+            bisect.insort(self.maps[map_name].setdefault(key, []), subject, key=lambda s: self.order[id(s)])
+
+    def remove(self, subject):
+        for map_name, key in self._keys(subject):
+            self.maps[map_name][key].remove(subject)
+
+    def first(self, map_name, key):
+        bucket = self.maps[map_name].get(key)
+        return bucket[0] if bucket else None
+
+
 class GoogleSheetsService:
-    def __init__(self, credentials_file: str = "service_account.json"):
-        self.gc = gspread.service_account(filename=credentials_file)
+    def __init__(self, credentials_file: str = "service_account.json", client=None):
+        # A ready gspread client can be injected (tests use a local fake one)
+        self.gc = client or gspread.service_account(filename=credentials_file)
+        self.progress = None
 
-    def sync_full_data(self, db: Session):
+    def sync_full_data(self, db: Session, force: bool = False, progress=None):
         """
         Orchestrates the synchronization of Faculties, Teachers, and Subjects from the Google Sheet.
+        Every step is timed and its row counts are returned under 'phases'.
+        All worksheets are read in one batched request, and the steps fed by a
+        worksheet whose content hasn't changed since the last sync are skipped
+        (unless 'force' is set).
+        'progress(phase, rows)' is called as steps start and finish (see jobs.Job.progress).
         """
+        self.progress = progress
+        self._report("fetching")
         try:
             sh = self.gc.open_by_key(SPREADSHEET_ID)
-            # Assuming data is in the first worksheet or a specific named one. 
-            # Based on inspection, worksheet name was "CARGA" but index 0 works too.
-            ws = sh.worksheet("PRESENCIAL") 
-            rows = ws.get_all_records() # Returns list of dicts with headers as keys
+            revisions = {} if force else dict(
+                db.query(models.SyncState.worksheet, models.SyncState.revision)
+            )
+            last_update = self._last_update_time(sh)
+            if last_update and revisions.get(SPREADSHEET_REVISION_KEY) == last_update:
+                return {
+                    "message": "Sin cambios desde la última sincronización",
+                    "rows_processed": 0,
+                    "phases": {}
+                }
+            sheets = self._fetch_worksheets(sh)
         except Exception as e:
             raise Exception(f"Error accessing Google Sheet: {e}")
 
-        # 1. Sync Faculties (CARRERA)
-        self._sync_faculties(db, rows)
+        if "PRESENCIAL" not in sheets:
+            raise Exception("Error accessing Google Sheet: worksheet PRESENCIAL not found")
 
-        # 2. Sync Teachers (DOCENTE)
-        self._sync_teachers(db, rows)
+        phases = {}
+        synced = {}
 
-        # 3. Sync Subjects (ASIGNATURA)
-        self._sync_subjects(db, rows)
+        def changed(name):
+            return sheets[name]["revision"] != revisions.get(name)
 
-        # 4. Sync Rooms (SALAS)
-        try:
-            ws_rooms = sh.worksheet("SALAS")
-            rows_rooms = ws_rooms.get_all_records()
-            self._sync_rooms(db, rows_rooms)
-        except Exception as e:
-            print(f"Warning: Could not sync rooms from SALAS sheet: {e}")
+        # Assuming data is in the first worksheet or a specific named one. 
+        # Based on inspection, worksheet name was "CARGA" but index 0 works too.
+        rows = sheets["PRESENCIAL"]["rows"]
 
-        # 5. Sync Days (DIAS)
-        try:
-            ws_days = sh.worksheet("DIAS")
-            rows_days = ws_days.get_all_records()
-            self._sync_days(db, rows_days)
-        except Exception as e:
-            print(f"Warning: Could not sync days from DIAS sheet: {e}")
+        if changed("PRESENCIAL"):
+            # 1. Sync Faculties (CARRERA)
+            self._run_phase(phases, "faculties", self._sync_faculties, db, rows)
+
+            # 2. Sync Teachers (DOCENTE)
+            self._run_phase(phases, "teachers", self._sync_teachers, db, rows)
+
+            # 3. Sync Subjects (ASIGNATURA)
+            self._run_phase(phases, "subjects", self._sync_subjects, db, rows)
 
+        # 4. Sync Rooms (SALAS)
+        # 5. Sync Days (DIAS)
         # 6. Sync Time Modules (MODULOS)
-        try:
-            ws_modules = sh.worksheet("MODULOS")
-            rows_modules = ws_modules.get_all_records()
-            self._sync_time_modules(db, rows_modules)
-        except Exception as e:
-            print(f"Warning: Could not sync time modules from MODULOS sheet: {e}")
+        for name, phase, sync_fn, label in [
+            ("SALAS", "rooms", self._sync_rooms, "rooms"),
+            ("DIAS", "days", self._sync_days, "days"),
+            ("MODULOS", "time_modules", self._sync_time_modules, "time modules"),
+        ]:
+            try:
+                if name not in sheets:
+                    raise Exception(f"worksheet {name} not found")
+                if changed(name):
+                    self._run_phase(phases, phase, sync_fn, db, sheets[name]["rows"])
+                    synced[name] = sheets[name]["revision"]
+            except Exception as e:
+                print(f"Warning: Could not sync {label} from {name} sheet: {e}")
 
         # 7. Sync Academic Schedules (PRESENCIAL)
+        if changed("PRESENCIAL"):
+            try:
+                self._run_phase(phases, "academic_schedules", self._sync_academic_schedules, db, rows)
+                synced["PRESENCIAL"] = sheets["PRESENCIAL"]["revision"]
+            except Exception as e:
+                print(f"Warning: Could not sync academic schedules from PRESENCIAL sheet: {e}")
+
+        # Remember what was synced; the spreadsheet-wide revision only when nothing is left behind
+        complete = len(sheets) == len(SYNC_WORKSHEETS) and all(
+            name in synced or not changed(name) for name in sheets
+        )
+        if last_update and complete:
+            synced[SPREADSHEET_REVISION_KEY] = last_update
+        references = None
+        if phases:
+            # New rooms, teachers, days... can resolve rows the sheet didn't change
+            self._report("references")
+            references = lookups.resolve_schedule_references(db)
+            # Only the grid cells of rows that changed are rewritten
+            self._report("occupancy_grid")
+            grids.refresh(db)
+        bulk.upsert(db, models.SyncState, "worksheet", {
+            name: {"revision": revision} for name, revision in synced.items()
+        })
+        db.commit()
+        if phases:
+            cache.bump()
+
+        return {
+            "message": "Sincronización completada exitosamente",
+            # PRESENCIAL rows written by this sync: none when that sheet was unchanged
+            "rows_processed": len(rows) if "PRESENCIAL" in synced else 0,
+            "phases": phases,
+            "references": references
+        }
+
+    def _last_update_time(self, sh):
+        """
+        Spreadsheet modification time from the Drive API, or None when it can't be read.
+        """
         try:
-            ws_presencial = sh.worksheet("PRESENCIAL")
-            rows_presencial = ws_presencial.get_all_records()
-            self._sync_academic_schedules(db, rows_presencial)
+            return sh.get_lastUpdateTime()
         except Exception as e:
-            print(f"Warning: Could not sync academic schedules from PRESENCIAL sheet: {e}")
+            print(f"Warning: Could not read spreadsheet revision: {e}")
+            return None
 
-        return {"message": "Sincronización completada exitosamente", "rows_processed": len(rows)}
+    def _fetch_worksheets(self, sh) -> dict:
+        """
+        Reads every worksheet the sync needs with one metadata call and one batched values call.
+        Returns {worksheet: {"rows": records, "revision": content hash}}.
+        """
+        available = {ws.title for ws in sh.worksheets()}
+        names = [name for name in SYNC_WORKSHEETS if name in available]
+        if not names:
+            return {}
 
+        response = sh.values_batch_get([f"'{name}'" for name in names])
+        sheets = {}
+        for name, value_range in zip(names, response.get("valueRanges", [])):
+            values = value_range.get("values", [])
+            sheets[name] = {
+                "rows": _to_records(values),
+                "revision": hashlib.sha1(json.dumps(values).encode("utf-8")).hexdigest()
+            }
+        return sheets
+
+    def _run_phase(self, phases: dict, name: str, sync_fn, db: Session, rows: list):
+        """
+        Runs one _sync_* step and records its row counts and elapsed seconds.
+        """
+        self._report(name)
+        started = time.perf_counter()
+        counts = sync_fn(db, rows)
+        counts["seconds"] = round(time.perf_counter() - started, 4)
+        phases[name] = counts
+        self._report(name, counts["rows"])
+
+    def _report(self, phase: str, rows: int = 0):
+        if self.progress:
+            self.progress(phase, rows)
 
     def _sync_faculties(self, db: Session, rows: list):
         """
         Extracts unique 'CARRERA' values and ensures they exist as Faculties.
         """
         unique_faculties = {row.get('CARRERA').strip() for row in rows if row.get('CARRERA')}
-        
-        for faculty_name in unique_faculties:
-            if not faculty_name: continue
-            
-            existing = db.query(models.Faculty).filter(models.Faculty.name == faculty_name).first()
-            if not existing:
-                new_faculty = models.Faculty(name=faculty_name)
-                db.add(new_faculty)
+        records = {name: {} for name in unique_faculties if name}
+
+        counts = bulk.upsert(db, models.Faculty, "name", records)
         db.commit()
+        return counts
 
     def _sync_teachers(self, db: Session, rows: list):
         """
@@ -101,28 +251,19 @@ class GoogleSheetsService:
             rut = str(rut_raw).strip()
             name = str(name_raw).strip()
             
-            teachers_map[rut] = name
-            
-        for rut, name in teachers_map.items():
-            # Try to find by RUT
-            existing = db.query(models.Teacher).filter(models.Teacher.rut == rut).first()
-            
-            if existing:
-                # Update name if changed
-                if existing.full_name != name:
-                    existing.full_name = name
-            else:
-                # Create new
-                new_teacher = models.Teacher(full_name=name, rut=rut)
-                db.add(new_teacher)
-        
+            teachers_map[rut] = {'full_name': name}
+
+        counts = bulk.upsert(db, models.Teacher, "rut", teachers_map)
         db.commit()
+        return counts
 
     def _sync_subjects(self, db: Session, rows: list):
         """
         Syncs Subjects based on 'ASIGNATURA'. 
         Updates 'enrolled_students' from 'CUPO'.
         Links to Faculty based on 'CARRERA'.
+        Matching runs against in-memory maps of the subjects table, so the
+        whole sheet costs a fixed number of statements instead of several per row.
         """
         # Ensure a default RoomType exists for new subjects (required field)
         default_room_type = db.query(models.RoomType).first()
@@ -132,6 +273,17 @@ class GoogleSheetsService:
             db.commit()
             db.refresh(default_room_type)
 
+        faculty_ids = dict(db.query(models.Faculty.name, models.Faculty.id))
+
+        columns = ["code", "plan_year", "career_code", "level", "name", "equivalent",
+                   "section", "enrolled_students", "faculty_id"]
+        index = _SubjectIndex()
+        existing = list(bulk.load_key_map(db, models.Subject, "id", columns).values())
+        for subject in existing:
+            subject["dirty"] = False
+            index.add(subject)
+
+        created = []
         processed_subjects = 0
         
         for row in rows:
@@ -145,14 +297,15 @@ class GoogleSheetsService:
             career_code = str(row.get('CODCARR')) if row.get('CODCARR') else None
             level = str(row.get('NIVEL')) if row.get('NIVEL') else None
             equivalent = str(row.get('EQUIVALENTE')) if row.get('EQUIVALENTE') else None
-            section = str(row.get('SECCION')) if row.get('SECCION') else None
+            section = str(row.get('SECCION')).strip() if row.get('SECCION') else None
 
             if not subject_name: continue
 
             # Resolve Faculty ID
-            faculty = None
-            if faculty_name:
-                faculty = db.query(models.Faculty).filter(models.Faculty.name == faculty_name.strip()).first()
+            faculty_id = faculty_ids.get(faculty_name.strip()) if faculty_name else None
+
+            # Parse code
+            code = str(subject_code).strip() if subject_code else None
             
             # Find subject logic:
             # 1. Try to find by Code AND Section (Best match)
@@ -160,24 +313,19 @@ class GoogleSheetsService:
             # 3. If not found, Create New.
 
             subject = None
-            if subject_code:
+            if code:
                 # Search by Code + Section
                 if section:
-                    subject = db.query(models.Subject).filter(
-                        models.Subject.code == str(subject_code).strip(), 
-                        models.Subject.section == str(section).strip()
-                    ).first()
+                    subject = index.first("code_section", (code, section))
                 
-                # If not found, try to claim a record with NULL section (only if current row has a section)
-                if not subject and section:
-                    subject = db.query(models.Subject).filter(
-                        models.Subject.code == str(subject_code).strip(), 
-                        models.Subject.section == None
-                    ).first()
+                # If not found, try to claim a record with NULL section.
+                # A row without section matches that record directly instead of duplicating it.
+                if not subject:
+                    subject = index.first("code_section", (code, None))
             
             # Fallback for legacy name-only match (if code is missing, unlikely)
-            if not subject and not subject_code:
-                 subject = db.query(models.Subject).filter(models.Subject.name == subject_name.strip()).first()
+            if not subject and not code:
+                 subject = index.first("name", subject_name.strip())
 
             # Parse enrolled_students (CUPO)
             try:
@@ -185,45 +333,44 @@ class GoogleSheetsService:
             except ValueError:
                 enrolled = 0
 
-            # Parse code
-            code = str(subject_code).strip() if subject_code else None
+            values = {"enrolled_students": enrolled, "name": subject_name.strip()}
+            if code: values["code"] = code
+            if plan_year: values["plan_year"] = plan_year.strip()
+            if career_code: values["career_code"] = career_code.strip()
+            if level: values["level"] = level.strip()
+            if equivalent: values["equivalent"] = equivalent.strip()
+            if section: values["section"] = section
+            if faculty_id: values["faculty_id"] = faculty_id
 
             if subject:
                 # Update existing (or claimed)
-                subject.enrolled_students = enrolled
-                if code: subject.code = code.strip()
-                if plan_year: subject.plan_year = str(plan_year).strip()
-                if career_code: subject.career_code = str(career_code).strip()
-                if level: subject.level = str(level).strip()
-                if equivalent: subject.equivalent = str(equivalent).strip()
-                if section: subject.section = str(section).strip()
-                if subject_name: subject.name = subject_name.strip()
-                
-                if faculty:
-                    subject.faculty_id = faculty.id
+                if any(subject[column] != value for column, value in values.items()):
+                    index.remove(subject)
+                    subject.update(values)
+                    subject["dirty"] = True
+                    index.add(subject)
             else:
-                # Create new
-                new_subject = models.Subject(
-                    name=subject_name.strip(),
-                    code=code,
-                    plan_year=str(plan_year).strip() if plan_year else None,
-                    career_code=str(career_code).strip() if career_code else None,
-                    level=str(level).strip() if level else None,
-                    equivalent=str(equivalent).strip() if equivalent else None,
-                    section=str(section).strip() if section else None,
-                    enrolled_students=enrolled,
-                    required_room_type_id=default_room_type.id,
-                    faculty_id=faculty.id if faculty else None
-                )
-                db.add(new_subject)
-                db.flush() # Ensure it's visible for next iteration match
+                # Create new, visible to the following rows through the index
+                subject = {column: None for column in columns}
+                subject.update(values)
+                subject["required_room_type_id"] = default_room_type.id
+                created.append(subject)
+                index.add(subject)
             
             processed_subjects += 1
-            
-            # Commit in batches or all at once? All at once for now is fine for size.
-        
-        db.commit()
+
+        inserts = [
+            {column: subject[column] for column in columns + ["required_room_type_id"]}
+            for subject in created
+        ]
+        updates = [
+            {column: subject[column] for column in ["id"] + columns}
+            for subject in existing if subject["dirty"]
+        ]
+        bulk.insert_rows(db, models.Subject, inserts)
+        bulk.update_rows(db, models.Subject, updates)
         db.commit()
+        return {"rows": processed_subjects, "inserted": len(created), "updated": len(updates)}
 
     def _sync_rooms(self, db: Session, rows: list):
         """
@@ -251,22 +398,10 @@ class GoogleSheetsService:
                 capacity = 0
             
             rooms_map[code] = {'name': name, 'capacity': capacity}
-            
-        for code, data in rooms_map.items():
-            existing = db.query(models.Room).filter(models.Room.code == code).first()
-            
-            if existing:
-                existing.name = data['name']
-                existing.capacity = data['capacity']
-            else:
-                new_room = models.Room(
-                    code=code,
-                    name=data['name'],
-                    capacity=data['capacity']
-                )
-                db.add(new_room)
-        
+
+        counts = bulk.upsert(db, models.Room, "code", rooms_map)
         db.commit()
+        return counts
 
     def _sync_days(self, db: Session, rows: list):
         """
@@ -287,25 +422,15 @@ class GoogleSheetsService:
             code = str(code_raw).strip()
             name = str(name_raw).strip()
             
-            days_map[code] = name
-            
-        for code, name in days_map.items():
-            existing = db.query(models.Day).filter(models.Day.code == code).first()
-            
-            if existing:
-                existing.name = name
-            else:
-                new_day = models.Day(
-                    code=code,
-                    name=name
-                )
-                db.add(new_day)
-        
+            days_map[code] = {'name': name}
+
+        counts = bulk.upsert(db, models.Day, "code", days_map)
         db.commit()
+        return counts
 
     def _sync_time_modules(self, db: Session, rows: list):
         """
-        Syncs Time Modules based on 'MOD_HOR'.
+        Syncs Time Modules based on 'MOD_HOR', with their times parsed to minutes of the day.
         """
         modules_map = {}
         for row in rows:
@@ -317,42 +442,86 @@ class GoogleSheetsService:
                 'rango': str(row.get('RANGO', '')).strip(),
                 'modulo': str(row.get('MÓDULO', '')).strip()
             }
-        for mod_hor, data in modules_map.items():
-            existing = db.query(models.TimeModule).filter(models.TimeModule.mod_hor == mod_hor).first()
-            if existing:
-                existing.hora_inicio = data['hora_inicio']
-                existing.hora_final = data['hora_final']
-                existing.rango = data['rango']
-                existing.modulo = data['modulo']
-            else:
-                db.add(models.TimeModule(mod_hor=mod_hor, **data))
+            day_range = timeranges.module_range(
+                modules_map[mod_hor]['hora_inicio'], modules_map[mod_hor]['hora_final'], modules_map[mod_hor]['rango']
+            )
+            modules_map[mod_hor]['start_minute'], modules_map[mod_hor]['end_minute'] = day_range or (None, None)
+        counts = bulk.upsert(db, models.TimeModule, "mod_hor", modules_map)
         db.commit()
+        return counts
 
     def _sync_academic_schedules(self, db: Session, rows: list):
         """
         Syncs Academic Schedules from 'PRESENCIAL' sheet.
+        Rows are matched on their natural key (carrera, codramo, seccion, dia, modulo)
+        and compared through a content hash, so only the inserted, changed and
+        removed rows are written. Returns the changeset counts.
         """
-        db.query(models.AcademicSchedule).delete()
-        
+        sheet = {}
+        sheet_occurrences = {}
         for row in rows:
             carrera = str(row.get('CARRERA', '')).strip()
             if not carrera: continue
             
-            new_sched = models.AcademicSchedule(
-                carrera=carrera,
-                nivel=str(row.get('NIVEL', '')).strip(),
-                dia=str(row.get('DIA', '')).strip(),
-                codramo=str(row.get('CODRAMO', '')).strip(),
-                modulo_horario=str(row.get('MODULO Y HORARIO', '')).strip(),
-                sala=str(row.get('SALA, CANCHA O LABORATORIO', '')).strip(),
-                seccion=str(row.get('SECCION', '')).strip(),
-                asignatura=str(row.get('ASIGNATURA', '')).strip(),
-                docente=str(row.get('DOCENTE', '')).strip()
-            )
+            values = {
+                'carrera': carrera,
+                'nivel': str(row.get('NIVEL', '')).strip(),
+                'dia': str(row.get('DIA', '')).strip(),
+                'codramo': str(row.get('CODRAMO', '')).strip(),
+                'modulo_horario': str(row.get('MODULO Y HORARIO', '')).strip(),
+                'sala': str(row.get('SALA, CANCHA O LABORATORIO', '')).strip(),
+                'seccion': str(row.get('SECCION', '')).strip(),
+                'asignatura': str(row.get('ASIGNATURA', '')).strip(),
+                'docente': str(row.get('DOCENTE', '')).strip()
+            }
+            values['row_hash'] = _row_hash(values)
+            sheet[_occurrence_key(sheet_occurrences, _schedule_key(values))] = values
 
-            db.add(new_sched)
-            
+        stored = {}
+        stored_occurrences = {}
+        columns = [models.AcademicSchedule.id, models.AcademicSchedule.row_hash] + [
+            getattr(models.AcademicSchedule, column) for column in SCHEDULE_KEY_COLUMNS
+        ]
+        for row in db.query(*columns).order_by(models.AcademicSchedule.id):
+            stored[_occurrence_key(stored_occurrences, tuple(row[2:]))] = (row[0], row[1])
+
+        inserts = []
+        updates = []
+        for key, values in sheet.items():
+            current = stored.pop(key, None)
+            if current is None:
+                inserts.append(values)
+            elif current[1] != values['row_hash']:
+                updates.append({'id': current[0], **values})
+        deleted_ids = [schedule_id for schedule_id, _ in stored.values()]
+
+        bulk.insert_rows(db, models.AcademicSchedule, inserts)
+        bulk.update_rows(db, models.AcademicSchedule, updates)
+        bulk.delete_ids(db, models.AcademicSchedule, deleted_ids)
         db.commit()
+        return {
+            "rows": len(sheet),
+            "inserted": len(inserts),
+            "updated": len(updates),
+            "deleted": len(deleted_ids),
+            "unchanged": len(sheet) - len(inserts) - len(updates)
+        }
+
+
+SCHEDULE_KEY_COLUMNS = ['carrera', 'codramo', 'seccion', 'dia', 'modulo_horario']
+SCHEDULE_HASH_COLUMNS = SCHEDULE_KEY_COLUMNS + ['nivel', 'sala', 'asignatura', 'docente']
 
+def _schedule_key(values: dict) -> tuple:
+    return tuple(values[column] for column in SCHEDULE_KEY_COLUMNS)
 
+def _occurrence_key(occurrences: dict, key: tuple) -> tuple:
+    """
+    Appends an occurrence number so repeated natural keys in the sheet stay distinct.
+    """
+    occurrence = occurrences.get(key, 0)
+    occurrences[key] = occurrence + 1
+    return key + (occurrence,)
 
+def _row_hash(values: dict) -> str:
+    content = "\x1f".join(values[column] or "" for column in SCHEDULE_HASH_COLUMNS)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
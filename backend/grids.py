@@ -0,0 +1,179 @@
+import hashlib
+import json
+import threading
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import models
+import bulk
+import lookups
+from conflicts import _teacher_key
+from lookups import RoomMatcher
+
+ROOM = "room"
+TEACHER = "teacher"
+CAREER = "career"
+
+# SyncState entry holding a hash of the rooms the room cells were matched against
+ROOMS_REVISION_KEY = "occupancy_grid:rooms"
+
+Cell = models.OccupancyCell
+AcademicSchedule = models.AcademicSchedule
+
+SESSION_COLUMNS = ["id", "carrera", "nivel", "dia", "codramo", "modulo_horario", "sala", "seccion", "asignatura", "docente",
+                   "room_id", "teacher_id", "subject_id", "faculty_id", "day_id", "time_module_id"]
+
+_lock = threading.Lock()
+
+
+def entity_key(kind: str, value):
+    """
+    How a teacher or career is stored in the grid (and looked up from a URL).
+    """
+    if kind == TEACHER:
+        return _teacher_key(value)
+    key = (value or "").upper().strip()
+    return key or None
+
+
+def _source_hash(row) -> str:
+    values = [row.dia, row.modulo_horario, row.sala, row.room_id, row.docente, row.carrera]
+    return hashlib.sha1(json.dumps(values).encode("utf-8")).hexdigest()
+
+
+def _cells(row, source_hash: str, matcher: RoomMatcher, codes: dict, kinds) -> list:
+    if not row.dia or not row.modulo_horario:
+        return []
+    cells = []
+    for kind in kinds:
+        room_id = None
+        if kind == ROOM:
+            # The id resolved by the sync, else the text
+            room_id = row.room_id if row.room_id in codes else matcher.match(row.sala)
+            entity = codes[room_id] if room_id is not None else None
+        else:
+            entity = entity_key(kind, row.docente if kind == TEACHER else row.carrera)
+        if entity:
+            cells.append({
+                "kind": kind, "entity": entity, "room_id": room_id, "dia": row.dia,
+                "modulo_horario": row.modulo_horario, "academic_schedule_id": row.id, "source_hash": source_hash,
+            })
+    return cells
+
+
+def refresh(db: Session) -> dict:
+    """
+    Brings occupancy_cells up to date with academic_schedules, rewriting only
+    the cells of schedules added, changed or removed since the last refresh
+    (a schedule's cells remember the hash of the columns they came from).
+    Room cells are all rematched when the rooms themselves changed.
+    The caller commits.
+    """
+    with _lock:
+        rooms = db.query(models.Room.id, models.Room.code, models.Room.name).order_by(models.Room.id).all()
+        matcher = RoomMatcher(rooms)
+        codes = {id: code for id, code, _ in rooms}
+        rooms_revision = hashlib.sha1(json.dumps([list(room) for room in rooms]).encode("utf-8")).hexdigest()
+        rooms_changed = rooms_revision != db.query(models.SyncState.revision) \
+            .filter(models.SyncState.worksheet == ROOMS_REVISION_KEY).scalar()
+
+        materialized = dict(db.query(Cell.academic_schedule_id, Cell.source_hash).distinct())
+        stale = []
+        inserts = []
+        schedules = 0
+        for row in db.query(
+            AcademicSchedule.id, AcademicSchedule.dia, AcademicSchedule.modulo_horario,
+            AcademicSchedule.sala, AcademicSchedule.room_id, AcademicSchedule.docente, AcademicSchedule.carrera,
+        ):
+            schedules += 1
+            source_hash = _source_hash(row)
+            if materialized.pop(row.id, None) != source_hash:
+                stale.append(row.id)
+                inserts += _cells(row, source_hash, matcher, codes, (ROOM, TEACHER, CAREER))
+            elif rooms_changed:
+                inserts += _cells(row, source_hash, matcher, codes, (ROOM,))
+        # Whatever is left belongs to deleted schedules
+        removed = list(materialized)
+
+        if rooms_changed:
+            db.query(Cell).filter(Cell.kind == ROOM).delete(synchronize_session=False)
+        bulk.delete_ids(db, Cell, stale + removed, column="academic_schedule_id")
+        bulk.insert_rows(db, Cell, inserts)
+        bulk.upsert(db, models.SyncState, "worksheet", {ROOMS_REVISION_KEY: {"revision": rooms_revision}})
+        return {
+            "rows": schedules,
+            "refreshed": len(stale),
+            "removed": len(removed),
+            "cells_written": len(inserts),
+            "rooms_rematched": rooms_changed,
+        }
+
+
+def refresh_derived(db: Session) -> dict:
+    """
+    Re-derives everything computed from the schedule text: the resolved
+    *_id / minute columns, then the grid. Every write that can change them
+    (sync, Excel imports, room / teacher / subject writes) calls this before
+    its commit, so readers never write. The caller commits and bumps.
+    """
+    references = lookups.resolve_schedule_references(db)
+    return {"references": references, "occupancy_grid": refresh(db)}
+
+
+def _axis(db: Session, column, order) -> list:
+    return [value for value, in db.query(column).order_by(order)]
+
+
+def grid_statement(kind: str, entity: str = None, prefix: str = None):
+    stmt = select(Cell.entity, Cell.dia, Cell.modulo_horario, *(
+        getattr(AcademicSchedule, column) for column in SESSION_COLUMNS
+    )).join(AcademicSchedule, AcademicSchedule.id == Cell.academic_schedule_id).where(Cell.kind == kind)
+    if entity is not None:
+        stmt = stmt.where(Cell.entity == entity)
+    elif prefix:
+        stmt = stmt.where(Cell.entity.startswith(prefix, autoescape=True))
+    return stmt.order_by(Cell.entity, Cell.dia, Cell.modulo_horario, Cell.academic_schedule_id)
+
+
+def grid(db: Session, kind: str, entity: str = None, prefix: str = None) -> dict:
+    """
+    Dense occupancy grid for one kind of entity, read with one range scan
+    of ix_occupancy_cells_grid:
+        rows[i]["cells"][d][m] = ids of the sessions of rows[i] on days[d], modules[m]
+    and the sessions themselves under "sessions". For rooms every room is a
+    row, occupied or not; 'prefix' limits them to a building (e.g. CCEA).
+    """
+    days = _axis(db, models.Day.code, models.Day.id)
+    modules = _axis(db, models.TimeModule.mod_hor, models.TimeModule.id)
+
+    found = db.execute(grid_statement(kind, entity, prefix)).all()
+
+    # Slots missing from the DIAS / MODULOS sheets still get a column
+    for values, seen in ((days, {row.dia for row in found}), (modules, {row.modulo_horario for row in found})):
+        values += sorted(seen - set(values))
+    day_index = {day: i for i, day in enumerate(days)}
+    module_index = {module: i for i, module in enumerate(modules)}
+
+    rows = {}
+    if kind == ROOM:
+        rooms = db.query(models.Room.id, models.Room.code, models.Room.name).order_by(models.Room.code)
+        if prefix:
+            rooms = rooms.filter(models.Room.code.startswith(prefix, autoescape=True))
+        for id, code, name in rooms:
+            rows[code] = {"entity": code, "name": name, "room_id": id}
+
+    sessions = {}
+    cells = {}
+    for row in found:
+        session = dict(zip(SESSION_COLUMNS, row[3:]))
+        sessions[session["id"]] = session
+        if row.entity not in rows:
+            name = session["docente"] if kind == TEACHER else session["carrera"] if kind == CAREER else row.entity
+            rows[row.entity] = {"entity": row.entity, "name": name, "room_id": None}
+        if row.entity not in cells:
+            cells[row.entity] = [[[] for _ in modules] for _ in days]
+        cells[row.entity][day_index[row.dia]][module_index[row.modulo_horario]].append(session["id"])
+
+    for key, item in rows.items():
+        item["cells"] = cells.get(key) or [[[] for _ in modules] for _ in days]
+        item["occupied"] = sum(1 for day in item["cells"] for slot in day if slot)
+    return {"kind": kind, "days": days, "modules": modules, "rows": list(rows.values()), "sessions": sessions}
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Long running work (Google Sheets sync, imports) runs here instead of inside the request
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="uplanner-job")
+_lock = threading.Lock()
+_jobs = {}
+_active = {}
+
+# Finished jobs kept around for status polling
+MAX_FINISHED_JOBS = 100
+
+
+class Job:
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "pending"
+        self.phase = None
+        self.rows_processed = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        # File produced by the job (e.g. an import error report), removed when the job is pruned
+        self.artifact_path = None
+
+    def progress(self, phase: str, rows: int = 0):
+        """
+        Progress callback handed to the running work: sets the current phase
+        and adds the rows it has processed so far.
+        """
+        self.phase = phase
+        self.rows_processed += rows
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> dict:
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "phase": self.phase,
+            "rows_processed": self.rows_processed,
+            "elapsed_seconds": round(end - self.started_at, 3) if self.started_at else 0.0,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def submit(kind: str, work, coalesce: bool = True) -> Job:
+    """
+    Queues work(job) on the worker pool and returns its Job.
+    With 'coalesce', a request for a kind that is already pending or running
+    gets that job back instead of starting a second run.
+    """
+    with _lock:
+        if coalesce and kind in _active:
+            return _jobs[_active[kind]]
+        job = Job(kind)
+        _jobs[job.id] = job
+        if coalesce:
+            _active[kind] = job.id
+        _prune()
+    _executor.submit(_run, job, work, coalesce)
+    return job
+
+
+def get(job_id: str):
+    return _jobs.get(job_id)
+
+
+def _run(job: Job, work, coalesced: bool):
+    job.status = "running"
+    job.started_at = time.time()
+    try:
+        result, error, status = work(job), None, "completed"
+    except Exception as e:
+        result, error, status = None, str(e), "failed"
+    # The kind is released before the final status is published, so a submit
+    # made as soon as the job looks finished starts a new run instead of
+    # getting this one back
+    if coalesced:
+        with _lock:
+            if _active.get(job.kind) == job.id:
+                del _active[job.kind]
+    job.result = result
+    job.error = error
+    # finished_at is set before the final status: _prune and readers take a
+    # completed or failed job to have one
+    job.finished_at = time.time()
+    job.status = status
+
+
+def _prune():
+    finished = [job for job in _jobs.values() if job.finished]
+    for job in sorted(finished, key=lambda j: j.finished_at or 0)[:-MAX_FINISHED_JOBS or None]:
+        del _jobs[job.id]
+        if job.artifact_path:
+            try:
+                os.remove(job.artifact_path)
+            except OSError:
+                pass
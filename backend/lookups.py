@@ -0,0 +1,173 @@
+from sqlalchemy.orm import Session
+import models
+import bulk
+import timeranges
+
+
+class RoomMatcher:
+    """
+    Resolves the free-text 'SALA, CANCHA O LABORATORIO' of the PRESENCIAL sheet
+    to a room id: exact code, then exact name, then the rule the dashboard uses
+    (the text contains the room name). Results are memoized per distinct text.
+    """
+    def __init__(self, rooms: list):
+        # rooms: (id, code, name) tuples, in id order
+        self.by_code = {}
+        self.by_name = {}
+        self.names = []
+        for id, code, name in rooms:
+            self.by_code.setdefault((code or "").upper().strip(), id)
+            self.by_name.setdefault((name or "").upper().strip(), id)
+            if name and name.strip():
+                self.names.append((name.upper().strip(), id))
+        self._memo = {}
+
+    @classmethod
+    def load(cls, db: Session) -> "RoomMatcher":
+        return cls(db.query(models.Room.id, models.Room.code, models.Room.name).order_by(models.Room.id).all())
+
+    def match(self, sala):
+        key = (sala or "").upper().strip()
+        if not key:
+            return None
+        if key not in self._memo:
+            room_id = self.by_code.get(key) or self.by_name.get(key)
+            if room_id is None:
+                room_id = next((id for name, id in self.names if name in key), None)
+            self._memo[key] = room_id
+        return self._memo[key]
+
+
+# Foreign keys of an academic schedule row and the sheet text each one is resolved from
+SCHEDULE_REFERENCES = {
+    "room_id": "sala",
+    "teacher_id": "docente",
+    "subject_id": "codramo",
+    "faculty_id": "carrera",
+    "day_id": "dia",
+    "time_module_id": "modulo_horario",
+}
+
+
+# Sheet text meaning "not assigned yet"; not counted as a failed lookup
+PLACEHOLDERS = ("POR ASIGNAR", "A DETERMINAR", "SIN DOCENTE", "NO ASIGNADO")
+
+
+def _key(text) -> str:
+    return (text or "").upper().strip()
+
+
+class ScheduleLookups:
+    """
+    In-memory maps from the PRESENCIAL sheet's text columns to the ids of
+    rooms, teachers, subjects, faculties, days and time modules, loaded with
+    one query per table. resolve() fills the *_id columns of a row.
+    """
+    def __init__(self, db: Session):
+        self.rooms = RoomMatcher.load(db)
+        self.teachers_by_name = {}
+        for id, full_name in db.query(models.Teacher.id, models.Teacher.full_name).order_by(models.Teacher.id):
+            self.teachers_by_name.setdefault(_key(full_name), id)
+        self.subjects = {}
+        self.subjects_by_code = {}
+        self.subjects_by_name = {}
+        for id, code, section, name in db.query(
+            models.Subject.id, models.Subject.code, models.Subject.section, models.Subject.name
+        ).order_by(models.Subject.id):
+            self.subjects.setdefault((_key(code), _key(section)), id)
+            if code:
+                self.subjects_by_code.setdefault(_key(code), id)
+            self.subjects_by_name.setdefault(_key(name), id)
+        self.faculties = {_key(name): id for id, name in db.query(models.Faculty.id, models.Faculty.name)}
+        self.days = {}
+        self.day_numbers = {}
+        for id, code, name in db.query(models.Day.id, models.Day.code, models.Day.name):
+            self.days[_key(code)] = id
+            number = timeranges.day_number(code)
+            self.day_numbers[id] = number if number is not None else timeranges.day_number(name)
+        self.time_modules = {}
+        self.module_ranges = {}
+        for id, mod_hor, start, end in db.query(
+            models.TimeModule.id, models.TimeModule.mod_hor, models.TimeModule.start_minute, models.TimeModule.end_minute
+        ).order_by(models.TimeModule.id):
+            self.time_modules.setdefault(_key(mod_hor), id)
+            if start is not None and end is not None:
+                self.module_ranges[id] = (start, end)
+
+    def _subject(self, values: dict):
+        code = _key(values.get("codramo"))
+        return (
+            self.subjects.get((code, _key(values.get("seccion"))))
+            or self.subjects_by_code.get(code)
+            or self.subjects_by_name.get(_key(values.get("asignatura")))
+        )
+
+    def _interval(self, values: dict, day_id, time_module_id):
+        day = self.day_numbers.get(day_id) if day_id is not None else timeranges.day_number(values.get("dia"))
+        # Times written in the text win over the module they name
+        day_range = timeranges.parse_range(values.get("modulo_horario")) or self.module_ranges.get(time_module_id)
+        return timeranges.week_interval(day, day_range)
+
+    def resolve(self, values: dict) -> dict:
+        """
+        {column: id or None} for SCHEDULE_REFERENCES, plus the session's
+        start_minute / end_minute in the week.
+        """
+        ids = {
+            "room_id": self.rooms.match(values.get("sala")),
+            "teacher_id": self.teachers_by_name.get(_key(values.get("docente"))),
+            "subject_id": self._subject(values),
+            "faculty_id": self.faculties.get(_key(values.get("carrera"))),
+            "day_id": self.days.get(_key(values.get("dia"))),
+            "time_module_id": self.time_modules.get(_key(values.get("modulo_horario"))),
+        }
+        ids["start_minute"], ids["end_minute"] = self._interval(values, ids["day_id"], ids["time_module_id"])
+        return ids
+
+    @staticmethod
+    def unresolved(values: dict, ids: dict) -> list:
+        """
+        Columns whose text matched nothing; blanks and placeholders don't count.
+        """
+        missing = []
+        for column, text_column in SCHEDULE_REFERENCES.items():
+            text = _key(values.get(text_column))
+            if ids[column] is None and text and not any(placeholder in text for placeholder in PLACEHOLDERS):
+                missing.append(column)
+        if ids["start_minute"] is None and _key(values.get("dia")) and _key(values.get("modulo_horario")):
+            missing.append("start_minute")
+        return missing
+
+
+def resolve_schedule_references(db: Session) -> dict:
+    """
+    Sets the *_id and minute columns of every academic schedule from its text, writing
+    only the rows whose ids change. Returns how many rows were updated and
+    how many still have text that resolves to nothing, per column.
+    The caller commits.
+    """
+    lookups = ScheduleLookups(db)
+    schedule = models.AcademicSchedule
+    text_columns = sorted(set(SCHEDULE_REFERENCES.values()) | {"seccion", "asignatura"})
+    resolved_columns = list(SCHEDULE_REFERENCES) + ["start_minute", "end_minute"]
+    columns = [schedule.id] + [getattr(schedule, name) for name in text_columns] + [
+        getattr(schedule, name) for name in resolved_columns
+    ]
+    updates = []
+    unresolved = 0
+    unresolved_columns = dict.fromkeys(list(SCHEDULE_REFERENCES) + ["start_minute"], 0)
+    rows = 0
+    for row in db.query(*columns):
+        rows += 1
+        values = row._asdict()
+        ids = lookups.resolve(values)
+        missing = lookups.unresolved(values, ids)
+        if missing:
+            unresolved += 1
+            for column in missing:
+                unresolved_columns[column] += 1
+        if any(values[column] != id for column, id in ids.items()):
+            updates.append({"id": row.id, **ids})
+    bulk.update_rows(db, schedule, updates)
+    return {"rows": rows, "updated": len(updates), "unresolved": unresolved, "unresolved_columns": unresolved_columns}
+
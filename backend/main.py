@@ -1,23 +1,135 @@
-from fastapi import FastAPI, Depends, UploadFile, File, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-import openpyxl
+from fastapi import FastAPI, Depends, UploadFile, File, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
 import io
+import os
+from urllib.parse import quote
 
 
-import models, database, schemas, crud, google_sheets
-from database import engine, get_db
+import models, database, schemas, crud, google_sheets, jobs, cache, schedule_index, solver, conflicts, suggestions, pagination, excel_import, exports, migrations, response_cache, serialization, snapshot, grids, timeranges, profiling
+from database import engine, get_db, get_async_db
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+# Migrations are a deploy step ('python migrations.py upgrade'), run once; every
+# worker only checks the schema version at startup and refuses to serve an old one.
+# AUTO_MIGRATE=1 upgrades at startup instead, for a single local process only:
+# concurrent workers would race to apply the same migration.
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "0") == "1"
 
-app = FastAPI(title="U-Planner API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    migrations.ensure_current(engine, auto_upgrade=AUTO_MIGRATE)
+    yield
+
+
+app = FastAPI(title="U-Planner API", lifespan=lifespan)
+
+# Opt-in with PROFILING=1: per-request wall time, SQL statement count and time and
+# serialization time, served at /metrics (see profiling.py for the sampling dumps)
+if profiling.ENABLED:
+    profiling.instrument(engine, database.async_engine.sync_engine)
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        return Response(profiling.metrics.render(), media_type=profiling.CONTENT_TYPE)
+
+# Reference data (teachers, rooms, room types, faculties, days, time modules) is
+# served from response_cache: pre-serialized bodies with an ETag, rebuilt after
+# cache.bump(), i.e. after a sync, an import or a write below.
+
+# List endpoints: columns accepted by ?sort=(-)column and as ?column=value filters
+TEACHER_LIST = pagination.ListSpec(models.Teacher, sortable=("full_name", "rut"),
+                                   contains=("full_name", "rut", "specialization"))
+SCHEDULE_LIST = pagination.ListSpec(models.Schedule, sortable=("time_block_id",),
+                                    exact=("teacher_id", "room_id", "subject_id", "time_block_id"))
+SUBJECT_LIST = pagination.ListSpec(models.Subject, sortable=("code", "name", "enrolled_students"),
+                                   contains=("code", "name", "career_code", "level", "section"),
+                                   exact=("faculty_id", "required_room_type_id"),
+                                   options=(selectinload(models.Subject.faculty),))
+ROOM_LIST = pagination.ListSpec(models.Room, sortable=("code", "name", "capacity"),
+                                contains=("code", "name"), exact=("room_type_id",))
+DAY_LIST = pagination.ListSpec(models.Day, sortable=("code",), contains=("code", "name"))
+TIME_MODULE_LIST = pagination.ListSpec(models.TimeModule, sortable=("mod_hor",),
+                                       contains=("mod_hor", "modulo", "rango"))
+ACADEMIC_SCHEDULE_LIST = pagination.ListSpec(
+    models.AcademicSchedule, sortable=("codramo", "dia", "modulo_horario", "docente", "carrera"),
+    contains=("carrera", "nivel", "sala", "seccion", "asignatura", "docente"),
+    exact=("dia", "codramo", "modulo_horario", "room_id", "teacher_id", "subject_id", "faculty_id",
+           "day_id", "time_module_id"),
+)
+# The largest lists skip ORM objects and Pydantic: plain rows encoded straight to JSON
+SUBJECT_ROWS = serialization.RowEncoder(schemas.Subject, models.Subject, nested={"faculty": schemas.Faculty})
+ACADEMIC_SCHEDULE_ROWS = serialization.RowEncoder(schemas.AcademicSchedule, models.AcademicSchedule)
 
 # --- Google Sheets Sync ---
-@app.post("/sync/google-sheets/")
-def sync_google_sheets(db: Session = Depends(get_db)):
-    service = google_sheets.GoogleSheetsService()
-    return service.sync_full_data(db)
+def run_google_sheets_sync(job: jobs.Job, force: bool):
+    db = database.SessionLocal()
+    try:
+        service = google_sheets.GoogleSheetsService()
+        return service.sync_full_data(db, force=force, progress=job.progress)
+    finally:
+        db.close()
+
+@app.post("/sync/google-sheets/", response_model=schemas.Job, status_code=202)
+def sync_google_sheets(force: bool = False):
+    # Runs in the background; concurrent requests get the job already in progress
+    job = jobs.submit("google-sheets-sync", lambda job: run_google_sheets_sync(job, force))
+    return job.to_dict()
+
+@app.get("/sync/jobs/{job_id}", response_model=schemas.Job)
+def read_sync_job(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job.to_dict()
+
+# --- Excel imports ---
+def run_excel_import(job: jobs.Job, importer, upload):
+    db = database.SessionLocal()
+    report = excel_import.ErrorReport(os.path.join(excel_import.REPORT_DIR, f"{job.id}.csv"))
+    try:
+        counts = importer(db, upload, progress=job.progress, report=report)
+        # New rooms and teachers can resolve schedules the sheet didn't change
+        grids.refresh_derived(db)
+        db.commit()
+        cache.bump()
+    finally:
+        report.close()
+        upload.close()
+        db.close()
+        if report.count:
+            job.artifact_path = report.path
+    return {
+        "message": "Importación completada",
+        **counts,
+        "error_report": f"/imports/jobs/{job.id}/errors" if report.count else None
+    }
+
+def submit_excel_import(kind: str, file: UploadFile, importer) -> dict:
+    if not file.filename.endswith((".xlsx", ".xls")):
+        raise HTTPException(status_code=400, detail="El archivo debe ser un Excel (.xlsx o .xls)")
+    # The request's upload is closed once we return, so the job gets its own copy
+    upload = excel_import.spool(file.file)
+    job = jobs.submit(kind, lambda job: run_excel_import(job, importer, upload), coalesce=False)
+    return job.to_dict()
+
+@app.get("/imports/jobs/{job_id}", response_model=schemas.Job)
+def read_import_job(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job.to_dict()
+
+@app.get("/imports/jobs/{job_id}/errors")
+def download_import_errors(job_id: str):
+    job = jobs.get(job_id)
+    if not job or not job.artifact_path or not os.path.exists(job.artifact_path):
+        raise HTTPException(status_code=404, detail="Reporte de errores no encontrado")
+    return FileResponse(job.artifact_path, media_type="text/csv", filename=f"errores_importacion_{job_id}.csv")
 
 @app.get("/")
 def read_root():
@@ -25,15 +137,19 @@ def read_root():
 
 # --- Teachers ---
 @app.get("/teachers/", response_model=List[schemas.Teacher])
-def read_teachers(db: Session = Depends(get_db)):
-    return db.query(models.Teacher).all()
+async def read_teachers(request: Request, limit: Optional[int] = Query(None, ge=1, le=1000),
+                        cursor: Optional[str] = None, sort: str = "id", db: AsyncSession = Depends(get_async_db)):
+    return await response_cache.serve(request, db.bind, List[schemas.Teacher], lambda response: pagination.paginate_async(
+        db, TEACHER_LIST, response, request.query_params, sort=sort, cursor=cursor, limit=limit))
 
 @app.post("/teachers/", response_model=schemas.Teacher)
 def create_teacher(teacher: schemas.TeacherBase, db: Session = Depends(get_db)):
     db_teacher = models.Teacher(full_name=teacher.full_name, rut=teacher.rut)
     db.add(db_teacher)
     try:
+        grids.refresh_derived(db)
         db.commit()
+        cache.bump()
         db.refresh(db_teacher)
     except Exception as e:
         db.rollback()
@@ -48,65 +164,19 @@ def update_teacher(teacher_id: int, teacher: schemas.TeacherBase, db: Session =
     db_teacher.full_name = teacher.full_name
     db_teacher.rut = teacher.rut
     try:
+        grids.refresh_derived(db)
         db.commit()
+        cache.bump()
         db.refresh(db_teacher)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error: {str(e)}")
     return db_teacher
 
-@app.post("/teachers/upload-excel/")
-async def upload_teachers_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    if not file.filename.endswith((".xlsx", ".xls")):
-        raise HTTPException(status_code=400, detail="El archivo debe ser un Excel (.xlsx o .xls)")
-    
-    contents = await file.read()
-    wb = openpyxl.load_workbook(io.BytesIO(contents))
-    ws = wb.active
-    
-    created = 0
-    skipped = 0
-    errors = []
-    seen_ruts = set()
-    
-    for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-        if not row or len(row) < 2:
-            continue
-        
-        full_name = str(row[0]).strip() if row[0] else None
-        rut = str(row[1]).strip() if row[1] else None
-        
-        if not full_name or not rut or full_name == "None" or rut == "None":
-            continue
-        
-        # Skip duplicates within the same file
-        if rut in seen_ruts:
-            skipped += 1
-            continue
-        seen_ruts.add(rut)
-        
-        # Check if RUT already exists in DB
-        existing = db.query(models.Teacher).filter(models.Teacher.rut == rut).first()
-        if existing:
-            skipped += 1
-            continue
-        
-        teacher = models.Teacher(full_name=full_name, rut=rut)
-        db.add(teacher)
-        created += 1
-    
-    try:
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al guardar en la base de datos: {str(e)}")
-    
-    return {
-        "message": "Importación completada",
-        "created": created,
-        "skipped": skipped,
-        "errors": errors
-    }
+@app.post("/teachers/upload-excel/", response_model=schemas.Job, status_code=202)
+def upload_teachers_excel(file: UploadFile = File(...)):
+    # Runs in the background; poll /imports/jobs/{id} for progress and the error report
+    return submit_excel_import("teachers-import", file, excel_import.import_teachers)
 
 # --- Schedules ---
 @app.post("/schedules/", response_model=schemas.Schedule)
@@ -114,51 +184,125 @@ def create_schedule(schedule: schemas.ScheduleBase, db: Session = Depends(get_db
     # validation happens inside crud.create_schedule
     return crud.create_schedule(db=db, schedule=schedule)
 
+@app.post("/schedules/batch", response_model=schemas.ScheduleBatchResult)
+def create_schedules_batch(batch: schemas.ScheduleBatch, db: Session = Depends(get_db)):
+    # Items are validated together and the valid ones inserted in one transaction
+    return crud.create_schedules_batch(db=db, items=batch.items, mode=batch.mode)
+
+@app.post("/schedules/solve", response_model=schemas.SolveResult)
+def solve_schedules(request: schemas.SolveRequest, db: Session = Depends(get_db)):
+    result = solver.solve(schedule_index.index.snapshot(db), request.tasks, request.time_budget_seconds)
+    if request.commit and result["placements"]:
+        placements = [schemas.ScheduleBase(**placement) for placement in result["placements"]]
+        result["committed"] = crud.create_schedules_batch(db, placements, mode="all_or_nothing")["committed"]
+    return result
+
 @app.get("/schedules/", response_model=List[schemas.Schedule])
-def read_schedules(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_schedules(db=db, skip=skip, limit=limit)
+async def read_schedules(request: Request, response: Response,
+                         skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                         cursor: Optional[str] = None, sort: str = "id", db: AsyncSession = Depends(get_async_db)):
+    return await pagination.paginate_async(db, SCHEDULE_LIST, response, request.query_params,
+                                           sort=sort, cursor=cursor, skip=skip, limit=limit)
 
 # --- Subjects ---
 @app.post("/subjects/", response_model=schemas.Subject)
 def create_subject(subject: schemas.SubjectBase, db: Session = Depends(get_db)):
     db_subject = models.Subject(**subject.model_dump())
     db.add(db_subject)
+    grids.refresh_derived(db)
     db.commit()
+    cache.bump()
     db.refresh(db_subject)
     return db_subject
 
 @app.get("/subjects/", response_model=List[schemas.Subject])
-def read_subjects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.Subject).offset(skip).limit(limit).all()
+async def read_subjects(request: Request, response: Response,
+                        skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                        cursor: Optional[str] = None, sort: str = "id", db: AsyncSession = Depends(get_async_db)):
+    rows = await pagination.paginate_async(db, SUBJECT_LIST, response, request.query_params, sort=sort,
+                                           cursor=cursor, skip=skip, limit=limit, base=SUBJECT_ROWS.select())
+    return Response(SUBJECT_ROWS.encode(rows), media_type="application/json", headers=response.headers)
 
 # --- Rooms ---
 @app.post("/rooms/", response_model=schemas.Room)
 def create_room(room: schemas.RoomBase, db: Session = Depends(get_db)):
     db_room = models.Room(**room.model_dump())
     db.add(db_room)
+    grids.refresh_derived(db)
     db.commit()
+    cache.bump()
     db.refresh(db_room)
     return db_room
 
 @app.get("/rooms/", response_model=List[schemas.Room])
-def read_rooms(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.Room).offset(skip).limit(limit).all()
+async def read_rooms(request: Request, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                     cursor: Optional[str] = None, sort: str = "id", db: AsyncSession = Depends(get_async_db)):
+    return await response_cache.serve(request, db.bind, List[schemas.Room], lambda response: pagination.paginate_async(
+        db, ROOM_LIST, response, request.query_params, sort=sort, cursor=cursor, skip=skip, limit=limit))
+
+def week_interval(dia: str, start: str, end: str) -> tuple:
+    # ?dia=MARTES&start=10:00&end=11:20 as minutes of the week
+    day = timeranges.day_number(dia)
+    if day is None:
+        raise HTTPException(status_code=400, detail=f"Día no válido: {dia}")
+    day_range = (timeranges.parse_clock(start), timeranges.parse_clock(end))
+    if None in day_range:
+        raise HTTPException(status_code=400, detail="Hora no válida, use HH:MM")
+    if day_range[1] <= day_range[0]:
+        raise HTTPException(status_code=400, detail="El rango horario está vacío")
+    return timeranges.week_interval(day, day_range)
+
+@app.get("/rooms/busy", response_model=List[schemas.Room])
+def read_busy_rooms(dia: str, start: str, end: str, db: Session = Depends(get_db)):
+    # Rooms with a session overlapping the range, even partly
+    return crud.get_busy_rooms(db, *week_interval(dia, start, end))
+
+@app.get("/academic-schedules/overlapping/", response_model=List[schemas.AcademicSchedule])
+def read_overlapping_schedules(dia: str, start: str, end: str, db: Session = Depends(get_db)):
+    return db.execute(crud.select_overlapping_schedules(*week_interval(dia, start, end))).scalars().all()
 
 @app.get("/days/", response_model=List[schemas.Day])
-def read_days(db: Session = Depends(get_db)):
-    return db.query(models.Day).all()
+async def read_days(request: Request, limit: Optional[int] = Query(None, ge=1, le=1000),
+                    cursor: Optional[str] = None, sort: str = "id", db: AsyncSession = Depends(get_async_db)):
+    return await response_cache.serve(request, db.bind, List[schemas.Day], lambda response: pagination.paginate_async(
+        db, DAY_LIST, response, request.query_params, sort=sort, cursor=cursor, limit=limit))
 
 @app.get("/time-modules/", response_model=List[schemas.TimeModule])
-def read_time_modules(db: Session = Depends(get_db)):
-    return db.query(models.TimeModule).all()
+async def read_time_modules(request: Request, limit: Optional[int] = Query(None, ge=1, le=1000),
+                            cursor: Optional[str] = None, sort: str = "id", db: AsyncSession = Depends(get_async_db)):
+    return await response_cache.serve(request, db.bind, List[schemas.TimeModule], lambda response: pagination.paginate_async(
+        db, TIME_MODULE_LIST, response, request.query_params, sort=sort, cursor=cursor, limit=limit))
 
 @app.get("/academic-schedules/", response_model=List[schemas.AcademicSchedule])
-def read_academic_schedules(skip: int = 0, limit: int = 5000, db: Session = Depends(get_db)):
-    return db.query(models.AcademicSchedule).offset(skip).limit(limit).all()
+async def read_academic_schedules(request: Request, response: Response,
+                                  skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                                  cursor: Optional[str] = None, sort: str = "id", db: AsyncSession = Depends(get_async_db)):
+    rows = await pagination.paginate_async(db, ACADEMIC_SCHEDULE_LIST, response, request.query_params, sort=sort,
+                                           cursor=cursor, skip=skip, limit=limit, base=ACADEMIC_SCHEDULE_ROWS.select())
+    return Response(ACADEMIC_SCHEDULE_ROWS.encode(rows), media_type="application/json", headers=response.headers)
 
 
+@app.get("/academic-schedules/conflicts/", response_model=schemas.ConflictReport)
+def read_academic_schedule_conflicts(skip: int = 0, limit: int = 100, type: Optional[str] = None,
+                                     dia: Optional[str] = None, modulo_horario: Optional[str] = None,
+                                     room_prefix: Optional[str] = None, db: Session = Depends(get_db)):
+    # Room, teacher and section clashes, computed once per sync
+    return conflicts.conflict_report(db, skip=skip, limit=limit, type=type, dia=dia,
+                                     modulo_horario=modulo_horario, room_prefix=room_prefix)
 
+@app.get("/suggestions/", response_model=List[schemas.RoomSuggestion])
+def read_room_suggestions(codramo: str, seccion: Optional[str] = None, rooms: int = 3,
+                          db: Session = Depends(get_db)):
+    # Best-fit free rooms for each scheduled session of the subject
+    return suggestions.get_index(db).for_codramo(codramo, seccion=seccion, limit=rooms)
 
+@app.get("/suggestions/unassigned/", response_model=schemas.RoomSuggestionPage)
+def read_unassigned_suggestions(skip: int = Query(0, ge=0), limit: int = Query(100, ge=0, le=1000),
+                                rooms: int = Query(3, ge=1, le=10),
+                                dia: Optional[str] = None, modulo_horario: Optional[str] = None,
+                                db: Session = Depends(get_db)):
+    items = suggestions.unassigned(db, rooms=rooms, dia=dia, modulo_horario=modulo_horario)
+    return {"total": len(items), "skip": skip, "limit": limit, "items": items[skip:skip + limit]}
 
 @app.put("/rooms/{room_id}", response_model=schemas.Room)
 def update_room(room_id: int, room: schemas.RoomBase, db: Session = Depends(get_db)):
@@ -169,108 +313,104 @@ def update_room(room_id: int, room: schemas.RoomBase, db: Session = Depends(get_
     db_room.name = room.name
     db_room.capacity = room.capacity
     try:
+        grids.refresh_derived(db)
         db.commit()
+        cache.bump()
         db.refresh(db_room)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error: {str(e)}")
     return db_room
 
-@app.post("/rooms/upload-excel/")
-async def upload_rooms_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    if not file.filename.endswith((".xlsx", ".xls")):
-        raise HTTPException(status_code=400, detail="El archivo debe ser un Excel (.xlsx o .xls)")
-    
-    contents = await file.read()
-    wb = openpyxl.load_workbook(io.BytesIO(contents))
-    ws = wb.active
-    
-    created = 0
-    skipped = 0
-    seen_codes = set()
-    
-    for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-        if not row or len(row) < 3:
-            continue
-        
-        code = str(row[0]).strip() if row[0] else None
-        name = str(row[1]).strip() if row[1] else None
-        cap_raw = row[2]
-        
-        if not code or not name or code == "None" or name == "None":
-            continue
-        
-        try:
-            capacity = int(cap_raw)
-        except (TypeError, ValueError):
-            continue
-        
-        if code in seen_codes:
-            skipped += 1
-            continue
-        seen_codes.add(code)
-        
-        existing = db.query(models.Room).filter(models.Room.code == code).first()
-        if existing:
-            skipped += 1
-            continue
-        
-        room = models.Room(code=code, name=name, capacity=capacity)
-        db.add(room)
-        created += 1
-    
-    try:
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al guardar: {str(e)}")
-    
-    return {
-        "message": "Importación completada",
-        "created": created,
-        "skipped": skipped
-    }
+@app.post("/rooms/upload-excel/", response_model=schemas.Job, status_code=202)
+def upload_rooms_excel(file: UploadFile = File(...)):
+    return submit_excel_import("rooms-import", file, excel_import.import_rooms)
 
 # --- Room Types ---
 @app.get("/room-types/", response_model=List[schemas.RoomType])
-def read_room_types(db: Session = Depends(get_db)):
-    return db.query(models.RoomType).all()
+async def read_room_types(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await response_cache.serve(request, db.bind, List[schemas.RoomType],
+                                      lambda response: crud.get_room_types_async(db))
+
+# --- Dataset snapshot ---
+@app.get("/dataset/snapshot")
+def read_dataset_snapshot(request: Request, db: Session = Depends(get_db)):
+    # The whole planning dataset in one columnar, compressed document (see snapshot.py)
+    data = snapshot.get_snapshot(db)
+    encoding = snapshot.negotiate(request.headers.get("accept-encoding", ""))
+    headers = {
+        "ETag": data.etag(encoding),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "X-Sync-Id": data.sync_id or "",
+    }
+    if data.etag(encoding) in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(data.encoded(encoding), media_type="application/json", headers=headers)
+
+# --- Occupancy grids ---
+@app.get("/grids/rooms", response_model=schemas.Grid)
+def read_room_grid(prefix: Optional[str] = None, db: Session = Depends(get_db)):
+    # Every room (or those whose code starts with 'prefix') by day and module
+    return grids.grid(db, grids.ROOM, prefix=prefix)
+
+@app.get("/grids/teachers/{docente}", response_model=schemas.Grid)
+def read_teacher_grid(docente: str, db: Session = Depends(get_db)):
+    result = grids.grid(db, grids.TEACHER, entity=grids.entity_key(grids.TEACHER, docente) or "")
+    if not result["rows"]:
+        raise HTTPException(status_code=404, detail="Docente no encontrado")
+    return result
+
+@app.get("/grids/careers/{carrera}", response_model=schemas.Grid)
+def read_career_grid(carrera: str, db: Session = Depends(get_db)):
+    result = grids.grid(db, grids.CAREER, entity=grids.entity_key(grids.CAREER, carrera) or "")
+    if not result["rows"]:
+        raise HTTPException(status_code=404, detail="Carrera no encontrada")
+    return result
 
 # --- Faculties & Reports ---
 @app.get("/faculties/", response_model=List[schemas.Faculty])
-def read_faculties(db: Session = Depends(get_db)):
-    return crud.get_faculties(db)
+async def read_faculties(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await response_cache.serve(request, db.bind, List[schemas.Faculty],
+                                      lambda response: crud.get_faculties_async(db))
 
 @app.get("/reports/schedules/faculty/{faculty_id}", response_model=List[schemas.Schedule])
-def get_faculty_report(faculty_id: int, db: Session = Depends(get_db)):
-    return crud.get_schedules_by_faculty(db, faculty_id)
+async def get_faculty_report(faculty_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await crud.get_schedules_by_faculty_async(db, faculty_id)
 
-@app.get("/reports/export/faculty/{faculty_id}")
-def export_faculty_report(faculty_id: int, db: Session = Depends(get_db)):
-    import csv
-    import io
-    from fastapi.responses import StreamingResponse
-    
-    schedules = crud.get_schedules_by_faculty(db, faculty_id)
-    faculty = db.query(models.Faculty).filter(models.Faculty.id == faculty_id).first()
-    faculty_name = faculty.name if faculty else "report"
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["ID", "Asignatura", "Docente", "Sala", "Bloque"])
-    
-    for s in schedules:
-        writer.writerow([
-            s.id,
-            s.subject.name,
-            s.teacher.user.username,
-            s.room.name,
-            f"{s.time_block.day_of_week} ({s.time_block.start_time}-{s.time_block.end_time})"
-        ])
-    
-    output.seek(0)
+def export_schedules(db: Session, faculty_id: Optional[int], filename: str, format: str):
+    # RFC 5987 form: headers are latin-1, faculty names are not
+    disposition = f"attachment; filename*=UTF-8''{quote(filename)}.{format}"
+    if format == "xlsx":
+        # Buffered: the workbook is built in full before its first byte is sent
+        return StreamingResponse(
+            exports.iter_file(exports.build_xlsx(db, faculty_id)),
+            media_type=exports.XLSX_MEDIA_TYPE,
+            headers={"Content-Disposition": disposition}
+        )
+    # CSV rows go out as they are read from the database
     return StreamingResponse(
-        iter([output.getvalue()]),
+        exports.stream_csv(db.get_bind(), faculty_id),
         media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=horario_{faculty_name}.csv"}
+        headers={"Content-Disposition": disposition}
     )
+
+@app.get("/reports/export/faculty/{faculty_id}")
+def export_faculty_report(faculty_id: int, format: Literal["csv", "xlsx"] = "csv", db: Session = Depends(get_db)):
+    """
+    Schedules of a faculty. CSV (the default) streams as rows are read;
+    XLSX is built in full on the server first.
+    """
+    faculty = db.query(models.Faculty).filter(models.Faculty.id == faculty_id).first()
+    faculty_name = faculty.name if faculty else "report"
+    return export_schedules(db, faculty_id, f"horario_{faculty_name}", format)
+
+@app.get("/reports/export/")
+def export_university_report(format: Literal["csv", "xlsx"] = "csv", db: Session = Depends(get_db)):
+    """
+    Every schedule. CSV (the default) streams as rows are read, which is what
+    a whole-university export should use; XLSX is built in full on the server first.
+    """
+    return export_schedules(db, None, "horario_universidad", format)
@@ -0,0 +1,415 @@
+"""
+Versioned schema migrations for the U-Planner database.
+
+    python migrations.py upgrade      # apply pending migrations
+    python migrations.py current      # print the schema version
+    python migrations.py history      # list migrations and whether they are applied
+    python migrations.py schema       # print the DDL of models.py (regenerates schema.sql)
+
+The applied versions are recorded in the schema_migrations table. A new
+database is created straight from models.py and stamped with every version;
+an existing one only runs the migrations it has not seen yet.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import Column, ForeignKey, Index, Integer, MetaData, String, Table, Time, UniqueConstraint, inspect, text
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+import models, timeranges
+
+VERSION_TABLE = "schema_migrations"
+
+# Migrations never use models.py or code that reads it: they run against
+# databases at every older version, while the models only describe the latest.
+# What they create is frozen here as it was when the migration was written.
+
+# The tables as they were before migrations existed (version 1)
+BASELINE = MetaData()
+Table("roles", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("name", String, unique=True, nullable=False))
+Table("faculties", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("name", String, unique=True, nullable=False))
+Table("users", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("username", String, unique=True, nullable=False),
+      Column("email", String, unique=True, nullable=False),
+      Column("password_hash", String, nullable=False),
+      Column("role_id", Integer, ForeignKey("roles.id")))
+Table("teachers", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("full_name", String, nullable=False),
+      Column("rut", String, unique=True, nullable=False),
+      Column("user_id", Integer, ForeignKey("users.id"), unique=True, nullable=True),
+      Column("specialization", String))
+Table("time_blocks", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("day_of_week", String, nullable=False),
+      Column("start_time", Time, nullable=False),
+      Column("end_time", Time, nullable=False))
+Table("teacher_availability", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("teacher_id", Integer, ForeignKey("teachers.id")),
+      Column("time_block_id", Integer, ForeignKey("time_blocks.id")),
+      UniqueConstraint("teacher_id", "time_block_id", name="_teacher_block_uc"))
+Table("room_types", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("name", String, unique=True, nullable=False))
+Table("rooms", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("code", String, unique=True, nullable=False),
+      Column("name", String, nullable=False),
+      Column("capacity", Integer, nullable=False),
+      Column("room_type_id", Integer, ForeignKey("room_types.id"), nullable=True))
+Table("subjects", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("code", String, nullable=True),
+      Column("plan_year", String, nullable=True),
+      Column("career_code", String, nullable=True),
+      Column("level", String, nullable=True),
+      Column("name", String, nullable=False),
+      Column("equivalent", String, nullable=True),
+      Column("section", String, nullable=True),
+      Column("enrolled_students", Integer, default=0),
+      Column("required_room_type_id", Integer, ForeignKey("room_types.id")),
+      Column("faculty_id", Integer, ForeignKey("faculties.id")))
+Table("schedules", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("teacher_id", Integer, ForeignKey("teachers.id")),
+      Column("room_id", Integer, ForeignKey("rooms.id")),
+      Column("subject_id", Integer, ForeignKey("subjects.id")),
+      Column("time_block_id", Integer, ForeignKey("time_blocks.id")),
+      UniqueConstraint("room_id", "time_block_id", name="_room_block_uc"),
+      UniqueConstraint("teacher_id", "time_block_id", name="_teacher_block_schedule_uc"))
+Table("days", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("code", String, unique=True, nullable=False),
+      Column("name", String, nullable=False))
+Table("time_modules", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("mod_hor", String, nullable=False),
+      Column("hora_inicio", String, nullable=False),
+      Column("hora_final", String, nullable=False),
+      Column("rango", String, nullable=False),
+      Column("modulo", String, nullable=False))
+Table("academic_schedules", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("carrera", String, nullable=True),
+      Column("nivel", String, nullable=True),
+      Column("dia", String, nullable=True),
+      Column("codramo", String, nullable=True),
+      Column("modulo_horario", String, nullable=True),
+      Column("sala", String, nullable=True),
+      Column("seccion", String, nullable=True),
+      Column("asignatura", String, nullable=True),
+      Column("docente", String, nullable=True))
+Table("sync_state", BASELINE,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("worksheet", String, unique=True, nullable=False),
+      Column("revision", String, nullable=False))
+
+# occupancy_cells as version 4 created it
+OCCUPANCY = MetaData()
+Table("occupancy_cells", OCCUPANCY,
+      Column("id", Integer, primary_key=True, index=True),
+      Column("kind", String, nullable=False),
+      Column("entity", String, nullable=False),
+      Column("room_id", Integer, nullable=True),
+      Column("dia", String, nullable=False),
+      Column("modulo_horario", String, nullable=False),
+      Column("academic_schedule_id", Integer, nullable=False, index=True),
+      Column("source_hash", String, nullable=False),
+      Index("ix_occupancy_cells_grid", "kind", "entity", "dia", "modulo_horario", "academic_schedule_id"))
+
+# Version 5: each reference column, and the exact match (trimmed, case-insensitive)
+# it is backfilled with. The fuzzier matching of lookups.py (room names inside
+# the text, subject name fallback...) runs once 'upgrade' has applied everything.
+REFERENCES = [
+    ("room_id", "rooms", "UPPER(TRIM(rooms.code)) = UPPER(TRIM(academic_schedules.sala))"),
+    ("teacher_id", "teachers", "UPPER(TRIM(teachers.full_name)) = UPPER(TRIM(academic_schedules.docente))"),
+    ("subject_id", "subjects", "UPPER(TRIM(subjects.code)) = UPPER(TRIM(academic_schedules.codramo))"
+                               " AND COALESCE(subjects.section, '') = COALESCE(academic_schedules.seccion, '')"),
+    ("subject_id", "subjects", "UPPER(TRIM(subjects.code)) = UPPER(TRIM(academic_schedules.codramo))"),
+    ("faculty_id", "faculties", "UPPER(TRIM(faculties.name)) = UPPER(TRIM(academic_schedules.carrera))"),
+    ("day_id", "days", "UPPER(TRIM(days.code)) = UPPER(TRIM(academic_schedules.dia))"),
+    ("time_module_id", "time_modules", "UPPER(TRIM(time_modules.mod_hor)) = UPPER(TRIM(academic_schedules.modulo_horario))"),
+]
+# Indexes created by versions 3, 5 and 6: (table, name, columns)
+QUERY_INDEXES = [
+    ("academic_schedules", "ix_academic_schedules_carrera", ("carrera",)),
+    ("academic_schedules", "ix_academic_schedules_codramo", ("codramo",)),
+    ("academic_schedules", "ix_academic_schedules_docente", ("docente",)),
+    ("academic_schedules", "ix_academic_schedules_modulo_horario", ("modulo_horario",)),
+    ("academic_schedules", "ix_academic_schedules_slot_docente", ("dia", "modulo_horario", "docente")),
+    ("academic_schedules", "ix_academic_schedules_slot_sala", ("dia", "modulo_horario", "sala")),
+    ("time_modules", "ix_time_modules_mod_hor", ("mod_hor",)),
+    ("rooms", "ix_rooms_capacity", ("capacity",)),
+    ("rooms", "ix_rooms_name", ("name",)),
+    ("subjects", "ix_subjects_code_section", ("code", "section")),
+    ("subjects", "ix_subjects_enrolled_students", ("enrolled_students",)),
+    ("subjects", "ix_subjects_faculty_id", ("faculty_id",)),
+    ("subjects", "ix_subjects_name", ("name",)),
+    ("teachers", "ix_teachers_full_name", ("full_name",)),
+    ("schedules", "ix_schedules_subject_id", ("subject_id",)),
+    ("schedules", "ix_schedules_time_block_id", ("time_block_id",)),
+]
+REFERENCE_INDEXES = [
+    ("academic_schedules", "ix_academic_schedules_teacher_id", ("teacher_id",)),
+    ("academic_schedules", "ix_academic_schedules_subject_id", ("subject_id",)),
+    ("academic_schedules", "ix_academic_schedules_faculty_id", ("faculty_id",)),
+    ("academic_schedules", "ix_academic_schedules_slot_room_id", ("day_id", "time_module_id", "room_id")),
+    ("academic_schedules", "ix_academic_schedules_slot_teacher_id", ("day_id", "time_module_id", "teacher_id")),
+]
+INTERVAL_INDEXES = [
+    ("academic_schedules", "ix_academic_schedules_interval", ("start_minute", "end_minute")),
+    ("academic_schedules", "ix_academic_schedules_room_interval", ("room_id", "start_minute", "end_minute")),
+]
+# Dropped by version 7: each is the left prefix of a composite index, and versions
+# 3 and 5 created them before they were taken out of the lists above
+REDUNDANT_INDEXES = [
+    "ix_subjects_code",                 # ix_subjects_code_section
+    "ix_academic_schedules_dia",        # ix_academic_schedules_slot_sala / _slot_docente
+    "ix_academic_schedules_room_id",    # ix_academic_schedules_room_interval
+]
+
+
+def _add_column(conn, table: str, column: str, ddl_type: str):
+    if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def _create_indexes(conn, indexes: list):
+    inspector = inspect(conn)
+    for table, name, columns in indexes:
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+
+
+def baseline(conn):
+    # Tables added before migrations existed (days, time modules, academic schedules, sync state)
+    BASELINE.create_all(bind=conn)
+
+
+def academic_schedule_row_hash(conn):
+    _add_column(conn, "academic_schedules", "row_hash", "VARCHAR")
+
+
+def query_indexes(conn):
+    _create_indexes(conn, QUERY_INDEXES)
+
+
+def occupancy_grid(conn):
+    # Filled by grids.refresh once 'upgrade' has applied everything
+    OCCUPANCY.create_all(bind=conn)
+
+
+def academic_schedule_references(conn):
+    for column, table in (("room_id", "rooms"), ("teacher_id", "teachers"), ("subject_id", "subjects"),
+                          ("faculty_id", "faculties"), ("day_id", "days"), ("time_module_id", "time_modules")):
+        _add_column(conn, "academic_schedules", column, f"INTEGER REFERENCES {table}(id)")
+    _create_indexes(conn, REFERENCE_INDEXES)
+    for column, table, condition in REFERENCES:
+        conn.execute(text(
+            f"UPDATE academic_schedules SET {column} = (SELECT MIN({table}.id) FROM {table} WHERE {condition}) "
+            f"WHERE {column} IS NULL"
+        ))
+
+
+def week_minutes(conn):
+    for table in ("time_modules", "academic_schedules"):
+        _add_column(conn, table, "start_minute", "INTEGER")
+        _add_column(conn, table, "end_minute", "INTEGER")
+    _create_indexes(conn, INTERVAL_INDEXES)
+
+    module_ranges = {}
+    for id, hora_inicio, hora_final, rango in conn.execute(
+        text("SELECT id, hora_inicio, hora_final, rango FROM time_modules")
+    ).all():
+        module_ranges[id] = timeranges.module_range(hora_inicio, hora_final, rango)
+    updates = [{"id": id, "start": day_range[0], "end": day_range[1]}
+               for id, day_range in module_ranges.items() if day_range]
+    if updates:
+        conn.execute(text("UPDATE time_modules SET start_minute = :start, end_minute = :end WHERE id = :id"), updates)
+
+    # Schedules: their day, and the times written in the text or else those of their module
+    updates = []
+    for id, dia, modulo_horario, time_module_id in conn.execute(
+        text("SELECT id, dia, modulo_horario, time_module_id FROM academic_schedules")
+    ).all():
+        start, end = timeranges.week_interval(
+            timeranges.day_number(dia),
+            timeranges.parse_range(modulo_horario) or module_ranges.get(time_module_id),
+        )
+        if start is not None:
+            updates.append({"id": id, "start": start, "end": end})
+    if updates:
+        conn.execute(text("UPDATE academic_schedules SET start_minute = :start, end_minute = :end WHERE id = :id"),
+                     updates)
+
+
+def drop_redundant_indexes(conn):
+    for name in REDUNDANT_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+# (version, name, upgrade function); append only, never renumber
+MIGRATIONS = [
+    (1, "baseline", baseline),
+    (2, "academic_schedule_row_hash", academic_schedule_row_hash),
+    (3, "query_indexes", query_indexes),
+    (4, "occupancy_grid", occupancy_grid),
+    (5, "academic_schedule_references", academic_schedule_references),
+    (6, "week_minutes", week_minutes),
+    (7, "drop_redundant_indexes", drop_redundant_indexes),
+]
+LATEST = MIGRATIONS[-1][0]
+
+
+VERSION_TABLE_DDL = (
+    f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} "
+    "(version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at VARCHAR NOT NULL)"
+)
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(VERSION_TABLE_DDL))
+
+
+def _stamp(conn, version: int, name: str):
+    conn.execute(
+        text(f"INSERT INTO {VERSION_TABLE} (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+        {"version": version, "name": name, "applied_at": datetime.now(timezone.utc).isoformat(timespec="seconds")},
+    )
+
+
+def applied_versions(bind) -> set:
+    with bind.connect() as conn:
+        try:
+            return {row[0] for row in conn.execute(text(f"SELECT version FROM {VERSION_TABLE}"))}
+        except Exception:
+            return set()
+
+
+def current_version(bind) -> int:
+    """
+    The schema version recorded in the database, 0 if it has never been migrated.
+    A single query: this is the startup fast path.
+    """
+    with bind.connect() as conn:
+        try:
+            return conn.execute(text(f"SELECT MAX(version) FROM {VERSION_TABLE}")).scalar() or 0
+        except Exception:
+            return 0
+
+
+def upgrade(bind) -> list:
+    """
+    Applies the pending migrations, each in its own transaction, and returns
+    the versions applied. A database without any table is created from
+    models.py directly and stamped as up to date.
+    """
+    applied = []
+    with bind.begin() as conn:
+        fresh = not inspect(conn).get_table_names()
+        _ensure_version_table(conn)
+        if fresh:
+            models.Base.metadata.create_all(bind=conn)
+            for version, name, _ in MIGRATIONS:
+                _stamp(conn, version, name)
+            return [version for version, _, _ in MIGRATIONS]
+        done = {row[0] for row in conn.execute(text(f"SELECT version FROM {VERSION_TABLE}"))}
+
+    for version, name, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        with bind.begin() as conn:
+            migrate(conn)
+            _stamp(conn, version, name)
+        applied.append(version)
+    return applied
+
+
+def ensure_current(bind, auto_upgrade: bool = False):
+    """
+    Startup check: one query when the schema is already current. Otherwise
+    refuses to start on an old schema, or with auto_upgrade migrates it.
+    """
+    version = current_version(bind)
+    if version >= LATEST:
+        return
+    if not auto_upgrade:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {LATEST}: run 'python migrations.py upgrade'"
+        )
+    upgrade(bind)
+
+
+def schema_sql(dialect) -> str:
+    """
+    DDL for every table and index in models.py, in dependency order.
+    """
+    statements = []
+    for table in models.Base.metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(dialect=dialect)).strip() + ";")
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            statements.append(str(CreateIndex(index).compile(dialect=dialect)).strip() + ";")
+    return "\n\n".join(statements)
+
+
+SAMPLE_DATA = """-- Initial Data (Sample)
+INSERT INTO roles (name) VALUES ('Superusuario'), ('Registro Académico'), ('Director de Carrera');
+INSERT INTO room_types (name) VALUES ('Teórica'), ('Computación'), ('Ciencias Básicas'), ('Salud/Simulación'), ('Talleres');
+INSERT INTO faculties (name) VALUES ('Ingeniería'), ('Salud'), ('Educación'), ('Ciencias Empresariales');"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="U-Planner schema migrations")
+    parser.add_argument("command", choices=["upgrade", "current", "history", "schema"])
+    parser.add_argument("--url", help="database URL (default: DATABASE_URL)")
+    args = parser.parse_args()
+
+    if args.command == "schema":
+        from sqlalchemy.dialects import sqlite
+        print("-- Database Schema for U-Planner")
+        print("-- Universidad Adventista de Chile")
+        print(f"-- Generated from backend/models.py (schema version {LATEST}) by 'python backend/migrations.py schema'\n")
+        print(schema_sql(sqlite.dialect()))
+        print()
+        # A database created from this file starts at the latest version
+        print(VERSION_TABLE_DDL + ";")
+        for version, name, _ in MIGRATIONS:
+            print(f"INSERT INTO {VERSION_TABLE} (version, name, applied_at) VALUES ({version}, '{name}', 'schema.sql');")
+        print()
+        print(SAMPLE_DATA)
+        return
+
+    import database
+    engine = database.make_engine(args.url) if args.url else database.engine
+    if args.command == "upgrade":
+        applied = upgrade(engine)
+        print(f"Applied {applied}" if applied else "Already up to date")
+        if applied:
+            # Migrations are frozen SQL; the references and the grid are re-derived
+            # with the current code, as every write does
+            import grids
+            from sqlalchemy.orm import Session
+            with Session(engine) as db:
+                grids.refresh_derived(db)
+                db.commit()
+        print(f"Schema version {current_version(engine)}")
+    elif args.command == "current":
+        print(current_version(engine))
+    else:
+        done = applied_versions(engine)
+        for number, name, _ in MIGRATIONS:
+            print(f"{number:>4}  {'applied' if number in done else 'pending':<8} {name}")
+
+
+if __name__ == "__main__":
+    main()
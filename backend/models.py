@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Time, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, Time, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -29,7 +29,7 @@ class User(Base):
 class Teacher(Base):
     __tablename__ = "teachers"
     id = Column(Integer, primary_key=True, index=True)
-    full_name = Column(String, nullable=False)
+    full_name = Column(String, nullable=False, index=True)
     rut = Column(String, unique=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=True)
     specialization = Column(String)
@@ -66,8 +66,8 @@ class Room(Base):
     __tablename__ = "rooms"
     id = Column(Integer, primary_key=True, index=True)
     code = Column(String, unique=True, nullable=False)
-    name = Column(String, nullable=False)
-    capacity = Column(Integer, nullable=False)
+    name = Column(String, nullable=False, index=True)
+    capacity = Column(Integer, nullable=False, index=True)
     room_type_id = Column(Integer, ForeignKey("room_types.id"), nullable=True)
     room_type = relationship("RoomType", back_populates="rooms")
     schedules = relationship("Schedule", back_populates="room")
@@ -75,28 +75,31 @@ class Room(Base):
 class Subject(Base):
     __tablename__ = "subjects"
     id = Column(Integer, primary_key=True, index=True)
-    code = Column(String, nullable=True) # CODRAMO
+    code = Column(String, nullable=True) # CODRAMO, indexed as the prefix of ix_subjects_code_section
     plan_year = Column(String, nullable=True) # AÑO_PLAN
     career_code = Column(String, nullable=True) # CODCARR
     level = Column(String, nullable=True) # NIVEL
-    name = Column(String, nullable=False) # ASIGNATURA
+    name = Column(String, nullable=False, index=True) # ASIGNATURA
     equivalent = Column(String, nullable=True) # EQUIVALENTE
     section = Column(String, nullable=True) # SECCION
-    enrolled_students = Column(Integer, default=0) # CUPO
+    enrolled_students = Column(Integer, default=0, index=True) # CUPO
     required_room_type_id = Column(Integer, ForeignKey("room_types.id"))
-    faculty_id = Column(Integer, ForeignKey("faculties.id"))
+    faculty_id = Column(Integer, ForeignKey("faculties.id"), index=True)
     
     required_room_type = relationship("RoomType", back_populates="subjects")
     faculty = relationship("Faculty", back_populates="subjects")
     schedules = relationship("Schedule", back_populates="subject")
 
+    # Sync and suggestion lookups by CODRAMO + SECCION
+    __table_args__ = (Index('ix_subjects_code_section', 'code', 'section'),)
+
 class Schedule(Base):
     __tablename__ = "schedules"
     id = Column(Integer, primary_key=True, index=True)
     teacher_id = Column(Integer, ForeignKey("teachers.id"))
     room_id = Column(Integer, ForeignKey("rooms.id"))
-    subject_id = Column(Integer, ForeignKey("subjects.id"))
-    time_block_id = Column(Integer, ForeignKey("time_blocks.id"))
+    subject_id = Column(Integer, ForeignKey("subjects.id"), index=True)
+    time_block_id = Column(Integer, ForeignKey("time_blocks.id"), index=True)
     
     teacher = relationship("Teacher", back_populates="schedules")
     room = relationship("Room", back_populates="schedules")
@@ -116,22 +119,79 @@ class Day(Base):
 class TimeModule(Base):
     __tablename__ = "time_modules"
     id = Column(Integer, primary_key=True, index=True)
-    mod_hor = Column(String, nullable=False)
+    mod_hor = Column(String, nullable=False, index=True)
     hora_inicio = Column(String, nullable=False)
     hora_final = Column(String, nullable=False)
     rango = Column(String, nullable=False)
     modulo = Column(String, nullable=False)
+    # hora_inicio / hora_final (or rango) parsed to minutes of the day by the sync
+    start_minute = Column(Integer, nullable=True)
+    end_minute = Column(Integer, nullable=True)
 
 class AcademicSchedule(Base):
     __tablename__ = "academic_schedules"
     id = Column(Integer, primary_key=True, index=True)
-    carrera = Column(String, nullable=True)
+    carrera = Column(String, nullable=True, index=True)
     nivel = Column(String, nullable=True)
-    dia = Column(String, nullable=True) # DIA
-    codramo = Column(String, nullable=True) # CODRAMO
-    modulo_horario = Column(String, nullable=True) # MODULO Y HORARIO
+    dia = Column(String, nullable=True) # DIA, indexed as the prefix of the slot indexes
+    codramo = Column(String, nullable=True, index=True) # CODRAMO
+    modulo_horario = Column(String, nullable=True, index=True) # MODULO Y HORARIO
     sala = Column(String, nullable=True) # SALA, CANCHA O LABORATORIO
     seccion = Column(String, nullable=True)
     asignatura = Column(String, nullable=True)
-    docente = Column(String, nullable=True)
+    docente = Column(String, nullable=True, index=True)
+    row_hash = Column(String, nullable=True) # Content hash used by the incremental sync
+
+    # The text above resolved by the sync (lookups.ScheduleLookups); NULL when nothing matched
+    room_id = Column(Integer, ForeignKey("rooms.id"), nullable=True) # prefix of ix_academic_schedules_room_interval
+    teacher_id = Column(Integer, ForeignKey("teachers.id"), nullable=True, index=True)
+    subject_id = Column(Integer, ForeignKey("subjects.id"), nullable=True, index=True)
+    faculty_id = Column(Integer, ForeignKey("faculties.id"), nullable=True, index=True)
+    day_id = Column(Integer, ForeignKey("days.id"), nullable=True)
+    time_module_id = Column(Integer, ForeignKey("time_modules.id"), nullable=True)
+    # [start, end) in minutes of the week (Monday 00:00 = 0), from dia and the module's times
+    start_minute = Column(Integer, nullable=True)
+    end_minute = Column(Integer, nullable=True)
+
+    room = relationship("Room")
+    teacher = relationship("Teacher")
+    subject = relationship("Subject")
+    faculty = relationship("Faculty")
+    day = relationship("Day")
+    time_module = relationship("TimeModule")
+
+    # Occupancy and conflict views: who is in which room, and where each teacher is, per slot
+    __table_args__ = (
+        Index('ix_academic_schedules_slot_sala', 'dia', 'modulo_horario', 'sala'),
+        Index('ix_academic_schedules_slot_docente', 'dia', 'modulo_horario', 'docente'),
+        Index('ix_academic_schedules_slot_room_id', 'day_id', 'time_module_id', 'room_id'),
+        Index('ix_academic_schedules_slot_teacher_id', 'day_id', 'time_module_id', 'teacher_id'),
+        # Interval lookups: start_minute is bounded on both sides (see crud.select_overlapping_schedules)
+        Index('ix_academic_schedules_interval', 'start_minute', 'end_minute'),
+        Index('ix_academic_schedules_room_interval', 'room_id', 'start_minute', 'end_minute'),
+    )
 
+# Materialized occupancy grid: one row per academic schedule and entity it occupies
+# (its room, teacher and career) in a (dia, modulo_horario) slot, maintained by
+# grids.refresh. Plain integer references: the sync deletes schedules before the grid catches up.
+class OccupancyCell(Base):
+    __tablename__ = "occupancy_cells"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False) # room, teacher or career
+    entity = Column(String, nullable=False) # Room code, or the upper-cased teacher / career
+    room_id = Column(Integer, nullable=True)
+    dia = Column(String, nullable=False)
+    modulo_horario = Column(String, nullable=False)
+    academic_schedule_id = Column(Integer, nullable=False, index=True)
+    source_hash = Column(String, nullable=False) # Hash of the schedule columns the cell was built from
+
+    # A whole grid is one range of this index
+    __table_args__ = (
+        Index('ix_occupancy_cells_grid', 'kind', 'entity', 'dia', 'modulo_horario', 'academic_schedule_id'),
+    )
+
+class SyncState(Base):
+    __tablename__ = "sync_state"
+    id = Column(Integer, primary_key=True, index=True)
+    worksheet = Column(String, unique=True, nullable=False)
+    revision = Column(String, nullable=False) # Content hash or Drive modifiedTime
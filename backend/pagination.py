@@ -0,0 +1,171 @@
+import base64
+import json
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# The list bodies stay plain arrays; the cursor for the next page travels in this header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class ListSpec:
+    """
+    What a list endpoint lets clients sort and filter on.
+    'contains' columns match case-insensitively anywhere in the value (like the
+    dashboard's column filters); 'exact' columns match the whole value and can
+    use their index. 'options' are loader options for the relationships the
+    response includes, so they are not lazy loaded row by row.
+    """
+    def __init__(self, model, sortable: tuple, contains: tuple = (), exact: tuple = (), options: tuple = ()):
+        self.model = model
+        self.options = options
+        self.sortable = set(sortable) | {"id"}
+        self.contains = set(contains)
+        self.exact = set(exact)
+
+
+def encode_cursor(value, last_id: int) -> str:
+    raw = json.dumps([value, last_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, last_id = json.loads(raw)
+        return value, int(last_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor no válido")
+
+
+def _parse_sort(spec: ListSpec, sort: str):
+    descending = sort.startswith("-")
+    field = sort.lstrip("-")
+    if field not in spec.sortable:
+        raise HTTPException(status_code=400, detail=f"Campo de orden no válido: {field}")
+    return field, descending
+
+
+def _filter(query, spec: ListSpec, filters: dict):
+    for field, value in filters.items():
+        column = getattr(spec.model, field)
+        if field in spec.exact:
+            try:
+                query = query.filter(column == column.type.python_type(value))
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Valor de filtro no válido: {field}")
+        elif field in spec.contains:
+            query = query.filter(column.icontains(value, autoescape=True))
+    return query
+
+
+def _segments(column, pk, value, last_id: int, descending: bool) -> list:
+    """
+    WHERE clauses of the rows strictly after (value, last_id) in ORDER BY
+    column, id, where NULLs sort first ascending and last descending. The NULL
+    rows are their own segment, read once the other one runs out: an IS NULL
+    branch OR-ed into the range would turn the index seek into a scan. NOT
+    NULL columns have no such segment.
+    """
+    if column is None:
+        return [pk < last_id if descending else pk > last_id]
+    if value is not None and not column.nullable:
+        return [or_(column < value, and_(column == value, pk < last_id)) if descending
+                else or_(column > value, and_(column == value, pk > last_id))]
+    if value is None:
+        nulls = and_(column.is_(None), pk < last_id if descending else pk > last_id)
+        return [nulls] if descending else [nulls, column.isnot(None)]
+    if descending:
+        return [or_(column < value, and_(column == value, pk < last_id)), column.is_(None)]
+    return [or_(column > value, and_(column == value, pk > last_id))]
+
+
+def page_statements(spec: ListSpec, filters: dict, sort: str = "id", cursor: str = None,
+                    skip: int = 0, limit: int = None, base=None):
+    """
+    SELECTs for one page of spec.model, filtered and sorted on the server, to
+    be read in order until the page is full.
+    With a cursor the page starts right after the last row of the previous one
+    (keyset pagination: an index range seek, however deep the page); 'skip'
+    is still honoured for old clients. One extra row is fetched to tell
+    whether another page follows. Returns the statements and the sort field.
+    'base' replaces the default select(spec.model), e.g. to select plain columns.
+    """
+    model = spec.model
+    field, descending = _parse_sort(spec, sort)
+    # Sorting by id alone needs no tie-breaker column
+    column = None if field == "id" else model.__table__.c[field]
+    pk = model.id
+
+    if base is None:
+        base = select(model).options(*spec.options)
+    stmt = _filter(base, spec, {
+        name: value for name, value in filters.items()
+        if value not in (None, "") and (name in spec.exact or name in spec.contains)
+    })
+
+    if column is None:
+        order = [pk.desc() if descending else pk.asc()]
+    elif descending:
+        order = [column.desc().nullslast(), pk.desc()]
+    else:
+        order = [column.asc().nullsfirst(), pk.asc()]
+    stmt = stmt.order_by(*order)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        return [stmt.filter(where) for where in _segments(column, pk, value, last_id, descending)], field
+    if skip:
+        stmt = stmt.offset(skip)
+    return [stmt], field
+
+
+def _limited(stmt, limit: int, rows: list):
+    # The next segment only needs the rows still missing from the page
+    return stmt if limit is None else stmt.limit(limit + 1 - len(rows))
+
+
+def _page(rows: list, field: str, limit: int, response) -> list:
+    # Drops the look-ahead row and, if there was one, sets the cursor for the next page
+    if limit is None or len(rows) <= limit:
+        return rows
+    rows = rows[:limit]
+    if rows:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, field), last.id)
+    return rows
+
+
+def paginate(db: Session, spec: ListSpec, response, filters: dict, sort: str = "id",
+             cursor: str = None, skip: int = 0, limit: int = None, base=None) -> list:
+    """
+    One page through a regular Session; the next-page cursor, if any, is set
+    in the X-Next-Cursor response header. With a 'base' statement the page
+    holds its result rows rather than model instances.
+    """
+    statements, field = page_statements(spec, filters, sort, cursor, skip, limit, base)
+    rows = []
+    for stmt in statements:
+        result = db.execute(_limited(stmt, limit, rows))
+        rows += result.scalars().all() if base is None else result.all()
+        if limit is not None and len(rows) > limit:
+            break
+    return _page(rows, field, limit, response)
+
+
+async def paginate_async(db: AsyncSession, spec: ListSpec, response, filters: dict, sort: str = "id",
+                         cursor: str = None, skip: int = 0, limit: int = None, base=None) -> list:
+    """
+    paginate() for an AsyncSession.
+    """
+    statements, field = page_statements(spec, filters, sort, cursor, skip, limit, base)
+    rows = []
+    for stmt in statements:
+        result = await db.execute(_limited(stmt, limit, rows))
+        rows += result.scalars().all() if base is None else result.all()
+        if limit is not None and len(rows) > limit:
+            break
+    return _page(rows, field, limit, response)
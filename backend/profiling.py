@@ -0,0 +1,289 @@
+import bisect
+import contextvars
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+# Opt-in (PROFILING=1): every request records its wall time, the SQL statements
+# it ran and their time, and the time spent encoding response bodies. The totals
+# are served in Prometheus text format at /metrics, per worker process.
+ENABLED = os.getenv("PROFILING", "0") == "1"
+# With PROFILE_DIR set, a share of the requests (and any request sent with
+# 'X-Profile: 1') is also profiled by sampling the stacks of every thread, and
+# dumped there in folded format (flamegraph.pl, speedscope).
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Statements per request: a list growing with its rows (N+1) lands in the top buckets
+STATEMENT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Route label of statements run outside a request (sync and import jobs, startup)
+BACKGROUND = "(background)"
+UNMATCHED = "(unmatched)"
+
+
+class RequestStats:
+    def __init__(self):
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.serialization_seconds = 0.0
+
+    def server_timing(self, seconds: float) -> str:
+        return (f'app;dur={seconds * 1000:.1f}, db;dur={self.sql_seconds * 1000:.1f};desc="{self.sql_statements} queries"'
+                f', serialize;dur={self.serialization_seconds * 1000:.1f}')
+
+
+_current = contextvars.ContextVar("profiling_request", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    Totals of this process since it started, keyed by (method, route template).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.requests = Counter()
+        self.durations = {}
+        self.statements = {}
+        self.sql_statements = Counter()
+        self.sql_seconds = Counter()
+        self.serialization_seconds = Counter()
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            self.durations.setdefault(key, Histogram(DURATION_BUCKETS)).observe(seconds)
+            self.statements.setdefault(key, Histogram(STATEMENT_BUCKETS)).observe(stats.sql_statements)
+            self.sql_statements[key] += stats.sql_statements
+            self.sql_seconds[key] += stats.sql_seconds
+            self.serialization_seconds[key] += stats.serialization_seconds
+
+    def observe_statement(self, seconds: float):
+        with self._lock:
+            self.sql_statements[("", BACKGROUND)] += 1
+            self.sql_seconds[("", BACKGROUND)] += seconds
+
+    def render(self) -> str:
+        lines = []
+
+        def counter(name: str, help: str, values: dict, label_names: tuple):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(values.items()):
+                lines.append(f"{name}{_labels(**dict(zip(label_names, key)))} {_number(value)}")
+
+        def histogram(name: str, help: str, values: dict):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), item in sorted(values.items()):
+                cumulative = 0
+                for bound, count in zip(item.buckets, item.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(method=method, route=route, le=_number(bound))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(method=method, route=route, le='+Inf')} {item.count}")
+                lines.append(f"{name}_sum{_labels(method=method, route=route)} {_number(item.sum)}")
+                lines.append(f"{name}_count{_labels(method=method, route=route)} {item.count}")
+
+        with self._lock:
+            counter("uplanner_http_requests_total", "Requests served.", self.requests, ("method", "route", "status"))
+            histogram("uplanner_http_request_duration_seconds", "Wall time of a request, body sent included.",
+                      self.durations)
+            histogram("uplanner_http_request_sql_statements", "SQL statements run by a request.", self.statements)
+            counter("uplanner_sql_statements_total", "SQL statements run.", self.sql_statements, ("method", "route"))
+            counter("uplanner_sql_duration_seconds_total", "Time spent executing SQL statements.",
+                    self.sql_seconds, ("method", "route"))
+            counter("uplanner_serialization_seconds_total", "Time spent encoding response bodies.",
+                    self.serialization_seconds, ("method", "route"))
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def serialization():
+    """
+    Counts the time of the block as serialization of the current request.
+    """
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialization_seconds += time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profiling_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["profiling_started"].pop()
+    stats = _current.get()
+    if stats is None:
+        metrics.observe_statement(seconds)
+    else:
+        stats.sql_statements += 1
+        stats.sql_seconds += seconds
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("profiling_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument(*engines):
+    """
+    Times the statements of 'engines' (sync engines; an AsyncEngine's .sync_engine).
+    """
+    for engine in engines:
+        for name, listener in (("before_cursor_execute", _before_cursor_execute),
+                               ("after_cursor_execute", _after_cursor_execute),
+                               ("handle_error", _handle_error)):
+            if not event.contains(engine, name, listener):
+                event.listen(engine, name, listener)
+
+
+# Leaves of a stack that is waiting for work rather than doing it
+IDLE = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get")}
+
+
+class Sampler(threading.Thread):
+    """
+    Samples the Python stacks of every other thread each 'interval' seconds,
+    counting identical stacks. Sync endpoints run in the threadpool and async
+    ones in the event loop, so whole-process stacks are what covers both;
+    concurrent requests show up in each other's dumps.
+    """
+    def __init__(self, interval: float):
+        super().__init__(name="uplanner-profiler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _profiled(scope) -> bool:
+    if not PROFILE_DIR:
+        return False
+    return dict(scope["headers"]).get(b"x-profile") == b"1" or random.random() < PROFILE_SAMPLE_RATE
+
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware recording each request in 'metrics' once its body is sent
+    (streamed exports included), with a Server-Timing header for browsers.
+    """
+    def __init__(self, app, skip_paths: tuple = ("/metrics",)):
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        sampler = None
+        if _profiled(scope):
+            sampler = Sampler(PROFILE_INTERVAL_MS / 1000)
+            sampler.start()
+        status = 500
+        started = time.perf_counter()
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            seconds = time.perf_counter() - started
+            _current.reset(token)
+            route = _route(scope)
+            metrics.observe_request(scope["method"], route, status, seconds, stats)
+            if sampler is not None:
+                sampler.stop()
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                name = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+                sampler.dump(os.path.join(
+                    PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}-{scope['method']}-{name}-{seconds * 1000:.0f}ms.folded"
+                ))
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+import cache
+import profiling
+
+# Reference data lists (days, rooms, teachers...) only change on a sync, an
+# import or a write through the API, all of which bump cache.data_version().
+# Their JSON bodies are kept here already serialized, keyed by path and query,
+# and answered with 304 when the client still has the same ETag.
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_ENTRIES", "256"))
+# Headers of the original response that belong to the body (the next page cursor)
+KEPT_HEADERS = ("X-Next-Cursor",)
+
+# With SHARED_CACHE_DIR set, bodies are also written there so another worker
+# process can serve them without querying the database again.
+_shared_dir = os.path.join(cache.SHARED_CACHE_DIR, "responses") if cache.SHARED_CACHE_DIR else None
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_adapters = {}
+
+
+class Entry:
+    def __init__(self, version: int, body: bytes, headers: dict):
+        self.version = version
+        self.body = body
+        self.headers = headers
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def _adapter(response_type) -> TypeAdapter:
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = _adapters[response_type] = TypeAdapter(response_type)
+    return adapter
+
+
+def serialize(response_type, value) -> bytes:
+    """
+    JSON bytes of 'value' (ORM objects included) as the response_model would produce them.
+    """
+    adapter = _adapter(response_type)
+    with profiling.serialization():
+        return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+def _shared_path(bind, key) -> str:
+    token = cache.shared_token()
+    name = hashlib.sha1(repr((str(bind.url), key)).encode()).hexdigest()
+    return os.path.join(_shared_dir, f"{name}-{token}.json")
+
+
+def _read_shared(path: str):
+    try:
+        with open(path, "rb") as f:
+            headers = json.loads(f.readline())
+            return headers, f.read()
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_shared(path: str, entry: Entry):
+    os.makedirs(_shared_dir, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}"
+    with open(temporary, "wb") as f:
+        f.write(json.dumps(entry.headers).encode() + b"\n")
+        f.write(entry.body)
+    os.replace(temporary, path)
+    # Bodies written for older versions of the same key are no longer served
+    prefix = os.path.basename(path).rsplit("-", 1)[0] + "-"
+    for name in os.listdir(_shared_dir):
+        if name.startswith(prefix) and name.endswith(".json") and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(_shared_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+def _store(key, entry: Entry):
+    with _lock:
+        _entries[key] = entry
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+async def serve(request: Request, bind, response_type, load) -> Response:
+    """
+    Response for a read-only list endpoint, built at most once per data version.
+    'load' is awaited with a Response to put headers on and returns what the
+    endpoint would have returned; 'bind' keeps separate databases apart.
+    """
+    key = (bind, request.url.path, tuple(sorted(request.query_params.multi_items())))
+    version = cache.data_version()
+    entry = _entries.get(key)
+
+    if entry is None or entry.version != version:
+        path = _shared_path(bind, key[1:]) if _shared_dir else None
+        shared = _read_shared(path) if path else None
+        if shared is not None:
+            entry = Entry(version, shared[1], shared[0])
+        else:
+            response = Response()
+            value = await load(response)
+            headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+            entry = Entry(version, serialize(response_type, value), headers)
+            if path:
+                _write_shared(path, entry)
+        _store(key, entry)
+
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+    if entry.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,78 @@
+import threading
+from sqlalchemy.orm import Session
+import models
+import cache
+
+
+class Snapshot:
+    """
+    Everything crud.validate_schedule needs, loaded with one query per table:
+    subjects, rooms, teachers, room types, teacher availability and the
+    occupied (room_id, time_block_id) / (teacher_id, time_block_id) pairs.
+    """
+    def __init__(self, db: Session):
+        self.subjects = {
+            id: (enrolled or 0, room_type_id) for id, enrolled, room_type_id in
+            db.query(models.Subject.id, models.Subject.enrolled_students, models.Subject.required_room_type_id)
+        }
+        self.rooms = {
+            id: (capacity, room_type_id) for id, capacity, room_type_id in
+            db.query(models.Room.id, models.Room.capacity, models.Room.room_type_id)
+        }
+        self.teachers = {id for id, in db.query(models.Teacher.id)}
+        self.room_types = dict(db.query(models.RoomType.id, models.RoomType.name))
+        self.availability = set(
+            db.query(models.TeacherAvailability.teacher_id, models.TeacherAvailability.time_block_id)
+        )
+        self.room_busy = set()
+        self.teacher_busy = set()
+        for room_id, teacher_id, time_block_id in db.query(
+            models.Schedule.room_id, models.Schedule.teacher_id, models.Schedule.time_block_id
+        ):
+            self.room_busy.add((room_id, time_block_id))
+            self.teacher_busy.add((teacher_id, time_block_id))
+
+
+class ScheduleIndex:
+    """
+    Process-wide cache of the validation Snapshot.
+    It is kept up to date by crud.create_schedule and rebuilt when
+    cache.data_version() moves (sync, API writes) or the session is bound
+    to another database.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._bind = None
+        self._version = None
+
+    def _stale(self, bind) -> bool:
+        return self._snapshot is None or self._bind is not bind or self._version != cache.data_version()
+
+    def snapshot(self, db: Session) -> Snapshot:
+        bind = db.get_bind()
+        if self._stale(bind):
+            with self._lock:
+                if self._stale(bind):
+                    version = cache.data_version()
+                    self._snapshot = Snapshot(db)
+                    self._bind = bind
+                    self._version = version
+        return self._snapshot
+
+    def add_schedule(self, db: Session, schedule):
+        """
+        Records a committed schedule (model or schema, anything with room_id,
+        teacher_id and time_block_id) so the snapshot stays consistent without a rebuild.
+        """
+        with self._lock:
+            if self._snapshot is not None and self._bind is db.get_bind():
+                self._snapshot.room_busy.add((schedule.room_id, schedule.time_block_id))
+                self._snapshot.teacher_busy.add((schedule.teacher_id, schedule.time_block_id))
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+
+index = ScheduleIndex()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from datetime import time
 
 class RoleBase(BaseModel):
@@ -99,6 +99,46 @@ class Schedule(ScheduleBase):
     class Config:
         from_attributes = True
 
+class ScheduleBatch(BaseModel):
+    items: List[ScheduleBase]
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
+
+class ScheduleBatchItemResult(BaseModel):
+    index: int
+    status_code: int
+    detail: Optional[str] = None
+    schedule: Optional[Schedule] = None
+
+class ScheduleBatchResult(BaseModel):
+    committed: bool
+    created: int
+    failed: int
+    results: List[ScheduleBatchItemResult]
+
+class SolveTask(BaseModel):
+    subject_id: int
+    teacher_id: int
+    sessions: int = 1
+
+class SolveRequest(BaseModel):
+    tasks: List[SolveTask]
+    time_budget_seconds: float = 5.0
+    commit: bool = False
+
+class SolveUnplaced(BaseModel):
+    index: int
+    subject_id: int
+    teacher_id: int
+    session: int
+    reason: str
+
+class SolveResult(BaseModel):
+    complete: bool
+    placements: List[ScheduleBase]
+    unplaced: List[SolveUnplaced]
+    elapsed_seconds: float
+    committed: bool = False
+
 class DayBase(BaseModel):
     code: str
     name: str
@@ -117,6 +157,8 @@ class TimeModuleBase(BaseModel):
 
 class TimeModule(TimeModuleBase):
     id: int
+    start_minute: Optional[int] = None
+    end_minute: Optional[int] = None
     class Config:
         from_attributes = True
 
@@ -134,5 +176,82 @@ class AcademicScheduleBase(BaseModel):
 
 class AcademicSchedule(AcademicScheduleBase):
     id: int
+    # Resolved by the sync; None when the text above matched nothing
+    room_id: Optional[int] = None
+    teacher_id: Optional[int] = None
+    subject_id: Optional[int] = None
+    faculty_id: Optional[int] = None
+    day_id: Optional[int] = None
+    time_module_id: Optional[int] = None
+    # Minutes of the week, Monday 00:00 = 0
+    start_minute: Optional[int] = None
+    end_minute: Optional[int] = None
     class Config:
         from_attributes = True
+
+class ConflictRecord(BaseModel):
+    type: str
+    entity: str
+    subject: Optional[str] = None
+    day: str
+    module: str
+    # Code of the session's room (resolved, else the 'sala' text); None when unassigned
+    room: Optional[str] = None
+    academic_schedule_id: int
+
+class ConflictReport(BaseModel):
+    total: int
+    skip: int
+    limit: int
+    summary: Dict[str, int]
+    items: List[ConflictRecord]
+
+class GridRow(BaseModel):
+    entity: str
+    name: Optional[str] = None
+    room_id: Optional[int] = None
+    occupied: int
+    cells: List[List[List[int]]]
+
+class Grid(BaseModel):
+    kind: str
+    days: List[str]
+    modules: List[str]
+    rows: List[GridRow]
+    sessions: Dict[int, AcademicSchedule]
+
+class SuggestedRoom(BaseModel):
+    id: int
+    code: str
+    name: str
+    capacity: int
+
+class RoomSuggestion(BaseModel):
+    academic_schedule_id: int
+    codramo: Optional[str] = None
+    seccion: Optional[str] = None
+    asignatura: Optional[str] = None
+    docente: Optional[str] = None
+    dia: Optional[str] = None
+    modulo_horario: Optional[str] = None
+    sala: Optional[str] = None
+    enrolled_students: int
+    status: str
+    current_room: Optional[SuggestedRoom] = None
+    rooms: List[SuggestedRoom]
+
+class RoomSuggestionPage(BaseModel):
+    total: int
+    skip: int
+    limit: int
+    items: List[RoomSuggestion]
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: str
+    phase: Optional[str] = None
+    rows_processed: int
+    elapsed_seconds: float
+    result: Optional[Any] = None
+    error: Optional[str] = None
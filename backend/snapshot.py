@@ -0,0 +1,127 @@
+"""
+The planning dataset (academic schedules, rooms, subjects, days and time
+modules) as one columnar document for GET /dataset/snapshot:
+
+    {
+      "format": 1,
+      "sync_id": "...",
+      "dictionaries": {"carrera": [...], "docente": [...], "sala": [...], "dia": [...]},
+      "tables": {
+        "academic_schedules": {"length": n, "columns": {"id": [...], "carrera": [0, 3, null, ...], ...}},
+        ...
+      }
+    }
+
+Each table stores one array per column instead of one object per row, and the
+columns named in "dictionaries" hold indexes into the sorted list of their
+distinct values (null stays null), so long repeated strings are sent once.
+Row i of a table is {name: column[i]} over its columns, with dictionary
+columns looked up.
+"""
+import gzip
+import hashlib
+
+import brotli
+import orjson
+from sqlalchemy import select
+
+import models, schemas, cache, profiling
+
+FORMAT = 1
+DICTIONARY_COLUMNS = ("carrera", "docente", "sala", "dia")
+
+# name: (model, schema whose column fields are exported)
+TABLES = {
+    "academic_schedules": (models.AcademicSchedule, schemas.AcademicSchedule),
+    "rooms": (models.Room, schemas.Room),
+    "subjects": (models.Subject, schemas.Subject),
+    "days": (models.Day, schemas.Day),
+    "time_modules": (models.TimeModule, schemas.TimeModule),
+}
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _fields(model, schema) -> list:
+    # Nested objects (Subject.faculty) are left out; their ids are columns already
+    columns = model.__table__.columns
+    return [name for name in schema.model_fields if name in columns]
+
+
+def sync_id(db) -> str:
+    """
+    Identifies the Google Sheets sync the data comes from: a hash of the
+    revisions recorded per worksheet, None before the first sync.
+    """
+    revisions = db.execute(
+        select(models.SyncState.worksheet, models.SyncState.revision).order_by(models.SyncState.worksheet)
+    ).all()
+    if not revisions:
+        return None
+    return hashlib.sha1(orjson.dumps([list(row) for row in revisions])).hexdigest()[:16]
+
+
+def build(db) -> dict:
+    tables = {}
+    values = {name: set() for name in DICTIONARY_COLUMNS}
+    for table, (model, schema) in TABLES.items():
+        fields = _fields(model, schema)
+        rows = db.execute(select(*(getattr(model, name) for name in fields)).order_by(model.id)).all()
+        columns = dict(zip(fields, map(list, zip(*rows)))) if rows else {name: [] for name in fields}
+        for name in DICTIONARY_COLUMNS:
+            if name in columns:
+                values[name].update(value for value in columns[name] if value is not None)
+        tables[table] = {"length": len(rows), "columns": columns}
+
+    dictionaries = {name: sorted(found) for name, found in values.items()}
+    positions = {name: {value: i for i, value in enumerate(found)} for name, found in dictionaries.items()}
+    for table in tables.values():
+        columns = table["columns"]
+        for name in DICTIONARY_COLUMNS:
+            if name in columns:
+                lookup = positions[name]
+                columns[name] = [None if value is None else lookup[value] for value in columns[name]]
+
+    return {"format": FORMAT, "sync_id": sync_id(db), "dictionaries": dictionaries, "tables": tables}
+
+
+class Snapshot:
+    """
+    A built snapshot: the JSON body and its compressed variants, each made once.
+    """
+    def __init__(self, document: dict):
+        self.sync_id = document["sync_id"]
+        with profiling.serialization():
+            self.body = orjson.dumps(document)
+        self.digest = hashlib.sha1(self.body).hexdigest()
+        self._encoded = {None: self.body}
+
+    def encoded(self, encoding: str) -> bytes:
+        if encoding not in self._encoded:
+            with profiling.serialization():
+                if encoding == "br":
+                    self._encoded[encoding] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                else:
+                    self._encoded[encoding] = gzip.compress(self.body, compresslevel=GZIP_LEVEL)
+        return self._encoded[encoding]
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+
+def get_snapshot(db) -> Snapshot:
+    # Rebuilt after each sync, import or write (cache.bump())
+    return cache.cached(("snapshot", db.get_bind()), lambda: Snapshot(build(db)))
+
+
+def negotiate(accept_encoding: str):
+    """
+    Content-Encoding to answer with: brotli when accepted, then gzip.
+    """
+    accepted = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+    if "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
@@ -0,0 +1,187 @@
+import heapq
+import time
+import schedule_index
+
+
+class _Task:
+    def __init__(self, position: int, subject_id: int, teacher_id: int, session: int):
+        self.position = position
+        self.subject_id = subject_id
+        self.teacher_id = teacher_id
+        self.session = session
+        self.blocks = []
+        self.rooms = []
+        self.slot = None
+        self.reason = None
+
+
+class TimetableSolver:
+    """
+    Places (subject, teacher) sessions into (room, time block) slots under the same
+    hard constraints crud.validate_schedule enforces: room capacity and type,
+    teacher availability, and no room or teacher double booking, including
+    against the schedules already stored.
+
+    1. Propagation: each session's domain is reduced up front to the teacher's
+       free available blocks and the rooms that fit the subject, best fit first.
+    2. Construction: sessions are placed most constrained first (fewest
+       feasible slots, re-counted lazily as the timetable fills up).
+    3. Local search: each unplaced session tries to free a slot by moving the
+       session that holds it to another feasible slot.
+
+    Both phases stop when the time budget runs out, returning a partial solution.
+    """
+    def __init__(self, snapshot: schedule_index.Snapshot, time_budget: float = 5.0):
+        self.snapshot = snapshot
+        self.deadline = time.perf_counter() + time_budget
+        self.room_busy = {}
+        self.teacher_busy = {}
+        self.teacher_blocks = {}
+        for teacher_id, time_block_id in snapshot.availability:
+            self.teacher_blocks.setdefault(teacher_id, []).append(time_block_id)
+        for blocks in self.teacher_blocks.values():
+            blocks.sort()
+
+    def solve(self, requests: list) -> dict:
+        started = time.perf_counter()
+        tasks = self._build_tasks(requests)
+        open_tasks = [task for task in tasks if task.reason is None]
+        self._construct(open_tasks)
+        self._repair([task for task in open_tasks if task.slot is None])
+
+        placements = []
+        unplaced = []
+        for task in tasks:
+            if task.slot:
+                room_id, time_block_id = task.slot
+                placements.append({
+                    "subject_id": task.subject_id, "teacher_id": task.teacher_id,
+                    "room_id": room_id, "time_block_id": time_block_id
+                })
+            else:
+                unplaced.append({
+                    "index": task.position, "subject_id": task.subject_id, "teacher_id": task.teacher_id,
+                    "session": task.session,
+                    "reason": task.reason or (
+                        "Time budget exhausted" if self._expired() else "All feasible slots are taken"
+                    )
+                })
+        return {
+            "complete": not unplaced,
+            "placements": placements,
+            "unplaced": unplaced,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def _expired(self) -> bool:
+        return time.perf_counter() > self.deadline
+
+    def _build_tasks(self, requests: list) -> list:
+        snapshot = self.snapshot
+        rooms_by_fit = sorted(snapshot.rooms.items(), key=lambda item: (item[1][0], item[0]))
+        tasks = []
+        for position, request in enumerate(requests):
+            for session in range(request.sessions):
+                task = _Task(position, request.subject_id, request.teacher_id, session)
+                tasks.append(task)
+                subject = snapshot.subjects.get(request.subject_id)
+                if not subject or request.teacher_id not in snapshot.teachers:
+                    task.reason = "Subject or teacher not found"
+                    continue
+                enrolled_students, required_room_type_id = subject
+                task.rooms = [
+                    room_id for room_id, (capacity, room_type_id) in rooms_by_fit
+                    if capacity >= enrolled_students and room_type_id == required_room_type_id
+                ]
+                task.blocks = [
+                    block for block in self.teacher_blocks.get(request.teacher_id, [])
+                    if (request.teacher_id, block) not in snapshot.teacher_busy
+                ]
+                if not task.rooms:
+                    task.reason = "No room with enough capacity and the required room type"
+                elif not task.blocks:
+                    task.reason = "Teacher has no free available time block"
+        return tasks
+
+    def _room_free(self, room_id: int, block: int) -> bool:
+        return (room_id, block) not in self.room_busy and (room_id, block) not in self.snapshot.room_busy
+
+    def _teacher_free(self, teacher_id: int, block: int) -> bool:
+        return (teacher_id, block) not in self.teacher_busy
+
+    def _domain_size(self, task: _Task) -> int:
+        size = 0
+        for block in task.blocks:
+            if self._teacher_free(task.teacher_id, block):
+                size += sum(1 for room_id in task.rooms if self._room_free(room_id, block))
+        return size
+
+    def _first_slot(self, task: _Task, skip=None):
+        # Best fit: rooms are sorted by capacity, so the first free one wastes the fewest seats
+        for block in task.blocks:
+            if not self._teacher_free(task.teacher_id, block):
+                continue
+            for room_id in task.rooms:
+                if (room_id, block) != skip and self._room_free(room_id, block):
+                    return room_id, block
+        return None
+
+    def _place(self, task: _Task, slot: tuple):
+        room_id, block = slot
+        task.slot = slot
+        self.room_busy[(room_id, block)] = task
+        self.teacher_busy[(task.teacher_id, block)] = task
+
+    def _unplace(self, task: _Task):
+        room_id, block = task.slot
+        del self.room_busy[(room_id, block)]
+        del self.teacher_busy[(task.teacher_id, block)]
+        task.slot = None
+
+    def _construct(self, tasks: list):
+        # Static domain sizes are cheap upper bounds; real counts are taken as tasks are popped
+        heap = [(len(task.blocks) * len(task.rooms), task.position, task.session, task) for task in tasks]
+        heapq.heapify(heap)
+        while heap and not self._expired():
+            _, position, session, task = heapq.heappop(heap)
+            size = self._domain_size(task)
+            if heap and size > heap[0][0]:
+                # Domain shrank less than others since it was counted; re-queue with the fresh count
+                heapq.heappush(heap, (size, position, session, task))
+                continue
+            slot = self._first_slot(task)
+            if slot:
+                self._place(task, slot)
+
+    def _repair(self, unplaced: list):
+        improved = True
+        while improved and unplaced and not self._expired():
+            improved = False
+            for task in list(unplaced):
+                if self._expired():
+                    return
+                if self._eject_and_place(task):
+                    unplaced.remove(task)
+                    improved = True
+
+    def _eject_and_place(self, task: _Task) -> bool:
+        for block in task.blocks:
+            if not self._teacher_free(task.teacher_id, block):
+                continue
+            for room_id in task.rooms:
+                holder = self.room_busy.get((room_id, block))
+                if holder is None:
+                    continue
+                # Move the holder elsewhere, keeping this slot for the unplaced task
+                self._unplace(holder)
+                new_slot = self._first_slot(holder, skip=(room_id, block))
+                if new_slot:
+                    self._place(holder, new_slot)
+                    self._place(task, (room_id, block))
+                    return True
+                self._place(holder, (room_id, block))
+        return False
+
+
+def solve(snapshot: schedule_index.Snapshot, requests: list, time_budget: float = 5.0) -> dict:
+    return TimetableSolver(snapshot, time_budget).solve(requests)
@@ -0,0 +1,129 @@
+from bisect import bisect_left
+from sqlalchemy.orm import Session
+import models
+import cache
+from lookups import RoomMatcher
+
+CONFIRMED = "Confirmado"
+SUGGESTED = "Sugerido"
+OVER_CAPACITY = "Sobrecupo"
+NO_ROOM = "Sin sala disponible"
+
+
+class SuggestionIndex:
+    """
+    Rooms sorted by capacity plus, for every (dia, modulo_horario), a bitmap of
+    the rooms already taken by the academic schedule (bit i = i-th smallest room).
+    The best-fit free rooms for N students are then the lowest set bits of
+    'all rooms with capacity >= N' minus the slot's bitmap.
+    """
+    def __init__(self, db: Session):
+        rooms = db.query(models.Room.id, models.Room.code, models.Room.name, models.Room.capacity) \
+            .order_by(models.Room.id).all()
+        self.matcher = RoomMatcher([(id, code, name) for id, code, name, _ in rooms])
+        self.rooms = sorted(rooms, key=lambda room: (room.capacity, room.id))
+        self.capacities = [room.capacity for room in self.rooms]
+        self.bit_of = {room.id: position for position, room in enumerate(self.rooms)}
+        self.all_rooms = (1 << len(self.rooms)) - 1
+
+        self.enrolled_by_id = {}
+        self.enrolled_by_code = {}
+        self.enrolled_by_name = {}
+        for id, code, name, enrolled in db.query(
+            models.Subject.id, models.Subject.code, models.Subject.name, models.Subject.enrolled_students
+        ).order_by(models.Subject.id):
+            self.enrolled_by_id[id] = enrolled or 0
+            if code:
+                self.enrolled_by_code.setdefault(code, enrolled or 0)
+            self.enrolled_by_name.setdefault(name, enrolled or 0)
+
+        self.occupied = {}
+        self.schedules = []
+        self.by_codramo = {}
+        for row in db.query(
+            models.AcademicSchedule.id, models.AcademicSchedule.codramo, models.AcademicSchedule.seccion,
+            models.AcademicSchedule.asignatura, models.AcademicSchedule.docente, models.AcademicSchedule.dia,
+            models.AcademicSchedule.modulo_horario, models.AcademicSchedule.sala,
+            models.AcademicSchedule.room_id, models.AcademicSchedule.subject_id,
+        ).order_by(models.AcademicSchedule.id):
+            # The id resolved by the sync, else the text (rows not synced since rooms changed)
+            room_id = row.room_id if row.room_id in self.bit_of else self.matcher.match(row.sala)
+            if room_id is not None and row.dia and row.modulo_horario:
+                slot = (row.dia, row.modulo_horario)
+                self.occupied[slot] = self.occupied.get(slot, 0) | (1 << self.bit_of[room_id])
+            self.schedules.append((row, room_id))
+            self.by_codramo.setdefault(row.codramo, []).append(len(self.schedules) - 1)
+
+    def free_rooms(self, dia: str, modulo_horario: str, enrolled: int, limit: int = 3) -> list:
+        smallest_fit = bisect_left(self.capacities, enrolled)
+        free = self.all_rooms & ~self.occupied.get((dia, modulo_horario), 0) & ~((1 << smallest_fit) - 1)
+        rooms = []
+        while free and len(rooms) < limit:
+            lowest = free & -free
+            rooms.append(self._room(lowest.bit_length() - 1))
+            free ^= lowest
+        return rooms
+
+    def _room(self, position: int) -> dict:
+        room = self.rooms[position]
+        return {"id": room.id, "code": room.code, "name": room.name, "capacity": room.capacity}
+
+    def _enrolled(self, row) -> int:
+        if row.subject_id in self.enrolled_by_id:
+            return self.enrolled_by_id[row.subject_id]
+        if row.codramo in self.enrolled_by_code:
+            return self.enrolled_by_code[row.codramo]
+        return self.enrolled_by_name.get(row.asignatura, 0)
+
+    def suggest(self, row, room_id, limit: int = 3) -> dict:
+        enrolled = self._enrolled(row)
+        current = self._room(self.bit_of[room_id]) if room_id is not None else None
+        if current and current["capacity"] >= enrolled:
+            status, rooms = CONFIRMED, []
+        else:
+            rooms = self.free_rooms(row.dia, row.modulo_horario, enrolled, limit)
+            status = SUGGESTED if rooms else (OVER_CAPACITY if current else NO_ROOM)
+        return {
+            "academic_schedule_id": row.id,
+            "codramo": row.codramo,
+            "seccion": row.seccion,
+            "asignatura": row.asignatura,
+            "docente": row.docente,
+            "dia": row.dia,
+            "modulo_horario": row.modulo_horario,
+            "sala": row.sala,
+            "enrolled_students": enrolled,
+            "status": status,
+            "current_room": current,
+            "rooms": rooms,
+        }
+
+    def for_codramo(self, codramo: str, seccion: str = None, limit: int = 3) -> list:
+        return [
+            self.suggest(row, room_id, limit)
+            for row, room_id in (self.schedules[i] for i in self.by_codramo.get(codramo, []))
+            if seccion is None or row.seccion == seccion
+        ]
+
+    def unassigned(self, limit: int = 3, dia: str = None, modulo_horario: str = None) -> list:
+        """
+        Suggestions for every row without a usable room: no matching room,
+        or a room smaller than the subject's enrolment. Optionally only the
+        rows of one day and/or module.
+        """
+        suggestions = (
+            self.suggest(row, room_id, limit) for row, room_id in self.schedules
+            if (not dia or row.dia == dia) and (not modulo_horario or row.modulo_horario == modulo_horario)
+        )
+        return [suggestion for suggestion in suggestions if suggestion["status"] != CONFIRMED]
+
+
+def get_index(db: Session) -> SuggestionIndex:
+    # Rebuilt once per data version (sync or room/subject writes)
+    return cache.cached(("suggestions", db.get_bind()), lambda: SuggestionIndex(db))
+
+
+def unassigned(db: Session, rooms: int = 3, dia: str = None, modulo_horario: str = None) -> list:
+    # The whole list, built once per data version for each filter; endpoints page over it
+    return cache.cached(("unassigned", db.get_bind(), rooms, dia, modulo_horario),
+                        lambda: get_index(db).unassigned(limit=rooms, dia=dia, modulo_horario=modulo_horario))
@@ -0,0 +1,85 @@
+import sys
+import os
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models
+import conflicts
+import lookups
+
+
+@pytest.fixture
+def db(db):
+    db.add_all([
+        models.Day(code="LU", name="Lunes"),
+        models.Day(code="MA", name="Martes"),
+        models.TimeModule(mod_hor="1", hora_inicio="08:00", hora_final="09:20", rango="08:00 - 09:20", modulo="1",
+                          start_minute=480, end_minute=560),
+        models.TimeModule(mod_hor="1B", hora_inicio="09:00", hora_final="10:20", rango="09:00 - 10:20", modulo="1B",
+                          start_minute=540, end_minute=620),
+        models.TimeModule(mod_hor="2", hora_inicio="10:30", hora_final="11:50", rango="10:30 - 11:50", modulo="2",
+                          start_minute=630, end_minute=710),
+    ])
+    for id, dia, modulo, sala, docente, carrera, nivel, codramo in (
+        (1, "LU", "1", "CCEA101", "Ana", "ING", "1", "MAT101"),
+        (2, "LU", "1", "ccea101 ", "Luis", "EDU", "1", "EDU200"),
+        (3, "LU", "1", "A DETERMINAR", "ana", "ING", "2", "FIS100"),
+        # Placeholders never clash with each other
+        (4, "LU", "1", "POR ASIGNAR", "POR ASIGNAR", "EDU", "3", "EDU300"),
+        (5, "LU", "1", "A DETERMINAR", "SIN DOCENTE", "EDU", "4", "EDU400"),
+        # 1 and 1B only partly overlap; 2 starts after 1B ends
+        (6, "MA", "1", "LAB1", "Pedro", "ING", "5", "QUI100"),
+        (7, "MA", "1B", "LAB1", "Juan", "ING", "5", "FIS200"),
+        (8, "MA", "2", "LAB1", "Pedro", "ING", "5", "QUI100"),
+        # Same section and subject as 8 at the same time: another group, not a clash
+        (9, "MA", "2", "B2", "Marta", "ING", "5", "QUI100"),
+    ):
+        db.add(models.AcademicSchedule(id=id, dia=dia, modulo_horario=modulo, sala=sala, docente=docente,
+                                            carrera=carrera, nivel=nivel, seccion="1", codramo=codramo))
+    # As the sync would: the clashes are found on the resolved minutes
+    lookups.resolve_schedule_references(db)
+    db.commit()
+    return db
+
+
+def test_room_teacher_and_section_clashes(db):
+    report = conflicts.conflict_report(db)
+
+    flagged = {(c["type"], c["entity"], c["academic_schedule_id"]) for c in report["items"]}
+    assert flagged == {
+        (conflicts.ROOM_CLASH, "CCEA101", 1), (conflicts.ROOM_CLASH, "CCEA101", 2),
+        (conflicts.TEACHER_CLASH, "ANA", 1), (conflicts.TEACHER_CLASH, "ANA", 3),
+        (conflicts.ROOM_CLASH, "LAB1", 6), (conflicts.ROOM_CLASH, "LAB1", 7),
+        (conflicts.SECTION_CLASH, "ING / 5 / 1", 6), (conflicts.SECTION_CLASH, "ING / 5 / 1", 7),
+    }
+    assert report["total"] == 8
+    assert report["summary"] == {conflicts.ROOM_CLASH: 4, conflicts.TEACHER_CLASH: 2, conflicts.SECTION_CLASH: 2}
+
+
+def test_report_filters_and_pages(db):
+    assert conflicts.conflict_report(db, dia="MA")["total"] == 4
+    assert conflicts.conflict_report(db, type=conflicts.TEACHER_CLASH)["summary"] == {conflicts.TEACHER_CLASH: 2}
+    assert {c["academic_schedule_id"] for c in conflicts.conflict_report(db, modulo_horario="1B")["items"]} == {7}
+    # Sessions in a building: the teacher clash of row 3 has no room
+    by_room = conflicts.conflict_report(db, room_prefix="ccea")
+    assert {(c["type"], c["academic_schedule_id"]) for c in by_room["items"]} == {
+        (conflicts.ROOM_CLASH, 1), (conflicts.ROOM_CLASH, 2), (conflicts.TEACHER_CLASH, 1)
+    }
+
+    # Sorted by day, module, type, entity and id; the totals cover every page
+    page = conflicts.conflict_report(db, skip=2, limit=3)
+    assert [(c["type"], c["academic_schedule_id"]) for c in page["items"]] == [
+        (conflicts.ROOM_CLASH, 1), (conflicts.ROOM_CLASH, 2), (conflicts.ROOM_CLASH, 6)
+    ]
+    assert (page["total"], page["skip"], page["limit"]) == (8, 2, 3)
+
+
+def test_rows_without_minutes_clash_with_timed_rows_of_the_same_slot(db):
+    # Written after the last resolve, so it has no minutes yet
+    db.add(models.AcademicSchedule(id=10, dia="MA", modulo_horario="2", sala="LAB1", docente="Rosa",
+                                   carrera="EDU", nivel="9", seccion="1", codramo="EDU900"))
+    db.commit()
+
+    found = conflicts.find_conflicts(db)
+    assert {c["academic_schedule_id"] for c in found if c["entity"] == "LAB1"} == {6, 7, 8, 10}
@@ -0,0 +1,43 @@
+import sys
+import os
+import io
+import openpyxl
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, excel_import
+
+
+def workbook(rows):
+    wb = openpyxl.Workbook()
+    wb.active.append(["CODIGO", "NOMBRE", "CAPACIDAD"])
+    for row in rows:
+        wb.active.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return excel_import.spool(buffer)
+
+
+def test_room_import_skips_existing_and_repeated_codes_in_batches(tmp_path):
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(models.Room(code="CCEA-101", name="Sala 101", capacity=30))
+    db.commit()
+
+    rows = [["CCEA-101", "Sala 101", 30], ["CCEA-102", "Sala 102", 40], ["CCEA-102", "Otra", 10],
+            ["CCEB-201", "Sala 201", "sin dato"], [None, None, None], ["CCEB-202", "Sala 202", 25]]
+    report = excel_import.ErrorReport(str(tmp_path / "errors.csv"))
+    result = excel_import.import_rows(db, models.Room, "code", excel_import.read_rows(workbook(rows)),
+                                      excel_import.parse_room, batch_size=1, report=report)
+    report.close()
+    db.commit()
+
+    assert result == {"created": 2, "skipped": 2, "errors": 1}
+    assert (tmp_path / "errors.csv").read_text(encoding="utf-8").splitlines() == [
+        "fila,motivo", "5,Capacidad no válida: sin dato"
+    ]
+    assert sorted(code for (code,) in db.query(models.Room.code)) == ["CCEA-101", "CCEA-102", "CCEB-202"]
@@ -0,0 +1,85 @@
+import sys
+import os
+import csv
+import io
+from datetime import time
+import openpyxl
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, database, exports, main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+    session = SessionLocal()
+    session.add_all([
+        models.Faculty(id=1, name="Ingeniería"),
+        models.Faculty(id=2, name="Educación"),
+        models.User(id=1, username="aperez", email="aperez@example.com", password_hash="x"),
+        models.Teacher(id=1, full_name="Ana Pérez", rut="111-1", user_id=1),
+        models.Teacher(id=2, full_name="Luis Soto", rut="222-2"),
+        models.Room(id=1, code="CCEA101", name="A101", capacity=40),
+        models.Room(id=2, code="CCEA102", name="A102", capacity=40),
+        models.TimeBlock(id=1, day_of_week="Lunes", start_time=time(8, 0), end_time=time(9, 20)),
+        models.TimeBlock(id=2, day_of_week="Martes", start_time=time(8, 0), end_time=time(9, 20)),
+        models.Subject(id=1, code="MAT101", name="Cálculo", faculty_id=1),
+        models.Subject(id=2, code="FIS101", name="Física", faculty_id=1),
+        models.Subject(id=3, code="EDU200", name="Didáctica", faculty_id=2),
+        models.Schedule(id=1, subject_id=1, teacher_id=1, room_id=1, time_block_id=1),
+        models.Schedule(id=2, subject_id=2, teacher_id=2, room_id=2, time_block_id=1),
+        models.Schedule(id=3, subject_id=3, teacher_id=2, room_id=1, time_block_id=2),
+    ])
+    session.commit()
+    session.close()
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # Several chunks per export
+    monkeypatch.setattr(exports, "CHUNK_SIZE", 2)
+    main.app.dependency_overrides[database.get_db] = get_db
+    with TestClient(main.app) as client:
+        yield client
+    main.app.dependency_overrides.clear()
+    engine.dispose()
+
+
+def test_csv_export_streams_every_schedule_of_the_faculty(client):
+    response = client.get("/reports/export/faculty/1")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == "attachment; filename*=UTF-8''horario_Ingenier%C3%ADa.csv"
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == exports.HEADER
+    assert rows[1:] == [
+        ["1", "Cálculo", "aperez", "A101", "Lunes (08:00:00-09:20:00)"],
+        ["2", "Física", "Luis Soto", "A102", "Lunes (08:00:00-09:20:00)"],
+    ]
+
+    everything = list(csv.reader(io.StringIO(client.get("/reports/export/").text)))
+    assert [row[0] for row in everything[1:]] == ["1", "2", "3"]
+
+
+def test_xlsx_export_has_the_same_rows(client):
+    response = client.get("/reports/export/faculty/2", params={"format": "xlsx"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == exports.XLSX_MEDIA_TYPE
+    sheet = openpyxl.load_workbook(io.BytesIO(response.content), read_only=True)["Horario"]
+    rows = [list(row) for row in sheet.iter_rows(values_only=True)]
+    assert rows == [exports.HEADER, [3, "Didáctica", "Luis Soto", "A101", "Martes (08:00:00-09:20:00)"]]
+
+    everything = openpyxl.load_workbook(io.BytesIO(client.get("/reports/export/?format=xlsx").content), read_only=True)
+    assert [row[0] for row in everything["Horario"].iter_rows(min_row=2, values_only=True)] == [1, 2, 3]
@@ -0,0 +1,134 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models
+import cache
+import crud
+import google_sheets
+import grids
+from fake_sheets import FakeClient, make_sheets
+
+
+def test_full_sync_reads_all_worksheets_in_one_batch(db):
+    client = FakeClient(make_sheets())
+    result = google_sheets.GoogleSheetsService(client=client).sync_full_data(db)
+
+    assert client.calls["values_batch_get"] == 1
+    assert client.calls["worksheets"] == 1
+    assert result["rows_processed"] == 3
+    assert set(result["phases"]) == {
+        "faculties", "teachers", "subjects", "rooms", "days", "time_modules", "academic_schedules"
+    }
+    assert db.query(models.Faculty).count() == 2
+    assert db.query(models.Teacher).count() == 2
+    assert db.query(models.Subject).count() == 2
+    assert db.query(models.Room).count() == 1
+    assert db.query(models.AcademicSchedule).count() == 3
+    # Short rows are padded like get_all_records() does
+    assert db.query(models.AcademicSchedule).filter_by(codramo="EDU200").one().sala == ""
+
+    # Schedule text resolved to ids; module 2 is missing from MODULOS, the blank room is not a failure
+    first = db.query(models.AcademicSchedule).filter_by(codramo="MAT101", dia="LU").one()
+    assert first.room.code == "CCEA101" and first.teacher.full_name == "Ana Pérez"
+    assert first.subject.code == "MAT101" and first.day.code == "LU" and first.time_module.mod_hor == "1"
+    # Monday 08:00 - 09:20 in minutes of the week
+    assert (first.start_minute, first.end_minute) == (480, 560)
+    assert result["references"]["unresolved"] == 1
+    assert {column for column, count in result["references"]["unresolved_columns"].items() if count} == {
+        "time_module_id", "start_minute"
+    }
+
+
+def test_unchanged_spreadsheet_skips_the_values_request(db):
+    client = FakeClient(make_sheets())
+    service = google_sheets.GoogleSheetsService(client=client)
+    service.sync_full_data(db)
+    result = service.sync_full_data(db)
+
+    assert client.calls["values_batch_get"] == 1
+    assert client.calls["get_lastUpdateTime"] == 2
+    assert result["phases"] == {}
+
+
+def test_only_changed_worksheets_are_synced(db):
+    client = FakeClient(make_sheets())
+    service = google_sheets.GoogleSheetsService(client=client)
+    service.sync_full_data(db)
+
+    client.spreadsheet.modified = "2026-03-02T10:00:00.000Z"
+    client.spreadsheet.sheets["DIAS"].append(["MI", "Miércoles"])
+    result = service.sync_full_data(db)
+
+    assert client.calls["values_batch_get"] == 2
+    assert set(result["phases"]) == {"days"}
+    assert result["rows_processed"] == 0
+    assert result["phases"]["days"]["inserted"] == 1
+    assert db.query(models.Day).count() == 3
+
+
+def test_force_resyncs_everything(db):
+    client = FakeClient(make_sheets())
+    service = google_sheets.GoogleSheetsService(client=client)
+    service.sync_full_data(db)
+    result = service.sync_full_data(db, force=True)
+
+    assert len(result["phases"]) == 7
+    assert result["phases"]["academic_schedules"]["unchanged"] == 3
+
+
+def test_sync_jobs_coalesce_and_report_progress():
+    import threading
+    import jobs
+
+    release = threading.Event()
+
+    def work(job):
+        job.progress("subjects", 10)
+        release.wait(5)
+        return {"rows_processed": 10}
+
+    first = jobs.submit("test-sync", work)
+    second = jobs.submit("test-sync", work)
+    assert second is first
+
+    release.set()
+    for _ in range(100):
+        if first.finished:
+            break
+        threading.Event().wait(0.05)
+
+    status = jobs.get(first.id).to_dict()
+    assert status["status"] == "completed"
+    # Already released: the submit below can't be coalesced into the finished job
+    assert "test-sync" not in jobs._active
+    assert status["phase"] == "subjects"
+    assert status["rows_processed"] == 10
+    assert status["result"] == {"rows_processed": 10}
+    assert jobs.submit("test-sync", work) is not first
+
+
+def test_rooms_added_outside_the_sync_are_resolved_by_their_write(db):
+    sheets = make_sheets()
+    sheets["PRESENCIAL"][3].append("CCEB202")
+    service = google_sheets.GoogleSheetsService(client=FakeClient(sheets))
+    service.sync_full_data(db)
+    row = db.query(models.AcademicSchedule).filter_by(codramo="EDU200").one()
+    assert row.room_id is None
+
+    # Readers never write: a room saved without re-deriving stays unmatched
+    db.add(models.Room(code="CCEB202", name="B202", capacity=30))
+    db.flush()
+    assert [room.code for room in crud.get_busy_rooms(db, 480, 560)] == ["CCEA101"]
+
+    # What the API and the Excel imports do before committing; the next sync finds the sheet unchanged
+    grids.refresh_derived(db)
+    db.commit()
+    cache.bump()
+    assert service.sync_full_data(db)["phases"] == {}
+
+    # Monday 08:00 - 09:20
+    assert [room.code for room in crud.get_busy_rooms(db, 480, 560)] == ["CCEA101", "CCEB202"]
+    db.refresh(row)
+    assert row.room.code == "CCEB202"
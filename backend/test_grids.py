@@ -0,0 +1,65 @@
+import sys
+import os
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, grids
+
+
+@pytest.fixture
+def db(db):
+    db.add_all([
+        models.Room(id=1, code="CCEA-101", name="Sala 101", capacity=40),
+        models.Room(id=2, code="CCEB-201", name="Sala 201", capacity=30),
+        models.Day(code="LUNES", name="Lunes"),
+        models.Day(code="MARTES", name="Martes"),
+        models.TimeModule(mod_hor="1", modulo="1", hora_inicio="08:00", hora_final="09:20", rango="08:00-09:20"),
+        models.TimeModule(mod_hor="2", modulo="2", hora_inicio="09:30", hora_final="10:50", rango="09:30-10:50"),
+        models.AcademicSchedule(id=1, carrera="Ingeniería", dia="LUNES", modulo_horario="1",
+                                sala="CCEA-101", docente="Ana Pérez", codramo="MAT101"),
+        models.AcademicSchedule(id=2, carrera="Ingeniería", dia="MARTES", modulo_horario="2",
+                                sala="Sala 201", docente="Luis Soto", codramo="FIS101"),
+        models.AcademicSchedule(id=3, carrera="Enfermería", dia="LUNES", modulo_horario="1",
+                                sala="POR ASIGNAR", docente="Ana Pérez", codramo="ENF201"),
+    ])
+    db.commit()
+    return db
+
+
+def test_grids_by_room_teacher_and_career(db):
+    grids.refresh(db)
+
+    rooms = grids.grid(db, grids.ROOM)
+    assert rooms["days"] == ["LUNES", "MARTES"] and rooms["modules"] == ["1", "2"]
+    assert [(row["entity"], row["cells"], row["occupied"]) for row in rooms["rows"]] == [
+        ("CCEA-101", [[[1], []], [[], []]], 1),
+        ("CCEB-201", [[[], []], [[], [2]]], 1),
+    ]
+    assert [row["entity"] for row in grids.grid(db, grids.ROOM, prefix="CCEB")["rows"]] == ["CCEB-201"]
+
+    teacher = grids.grid(db, grids.TEACHER, entity=grids.entity_key(grids.TEACHER, " ana pérez"))
+    assert teacher["rows"][0]["cells"] == [[[1, 3], []], [[], []]]
+    assert sorted(teacher["sessions"]) == [1, 3]
+
+    career = grids.grid(db, grids.CAREER, entity=grids.entity_key(grids.CAREER, "Ingeniería"))
+    assert career["rows"][0]["cells"] == [[[1], []], [[], [2]]]
+
+
+def test_refresh_only_rewrites_what_changed(db):
+    assert grids.refresh(db)["refreshed"] == 3
+    assert grids.refresh(db) == {"rows": 3, "refreshed": 0, "removed": 0, "cells_written": 0, "rooms_rematched": False}
+
+    db.query(models.AcademicSchedule).filter_by(id=2).update({"modulo_horario": "1"})
+    db.query(models.AcademicSchedule).filter_by(id=3).delete()
+    counts = grids.refresh(db)
+    assert (counts["refreshed"], counts["removed"]) == (1, 1)
+
+    # A new room can change what any free-text 'sala' matches: every room cell is rematched
+    db.add(models.AcademicSchedule(id=4, carrera="Salud", dia="MARTES", modulo_horario="2", sala="Sala 301"))
+    db.add(models.Room(id=3, code="CCEC-301", name="Sala 301", capacity=20))
+    counts = grids.refresh(db)
+    assert counts["rooms_rematched"] and counts["refreshed"] == 1
+    assert db.query(models.OccupancyCell).filter_by(kind=grids.ROOM).count() == 3
+    cells = grids.grid(db, grids.ROOM, prefix="CCEC")["rows"][0]["cells"]
+    assert cells == [[[], []], [[], [4]]]
@@ -0,0 +1,92 @@
+import sys
+import os
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, migrations, google_sheets
+from fake_sheets import FakeClient, make_sheets
+
+
+def test_upgrade_brings_a_pre_migration_database_to_the_latest_version(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    # A database as it was before migrations existed, with data in it
+    migrations.BASELINE.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE sync_state"))
+        conn.execute(text("INSERT INTO rooms (code, name, capacity) VALUES ('CCEA101', 'A101', 40)"))
+        conn.execute(text("INSERT INTO teachers (full_name, rut) VALUES ('Ana Pérez', '111-1')"))
+        conn.execute(text("INSERT INTO days (code, name) VALUES ('MA', 'Martes')"))
+        conn.execute(text("INSERT INTO time_modules (mod_hor, hora_inicio, hora_final, rango, modulo) "
+                          "VALUES ('1', '08:00', '09:20', '08:00 - 09:20', '1')"))
+        conn.execute(text("INSERT INTO academic_schedules (codramo, dia, modulo_horario, sala, docente) "
+                          "VALUES ('MAT101', 'MA', '1', 'ccea101 ', 'Ana Pérez')"))
+
+    assert migrations.current_version(engine) == 0
+    # Startup only checks; upgrading is the explicit deploy step
+    with pytest.raises(RuntimeError):
+        migrations.ensure_current(engine)
+    assert migrations.current_version(engine) == 0
+    assert migrations.upgrade(engine) == [version for version, _, _ in migrations.MIGRATIONS]
+    assert migrations.current_version(engine) == migrations.LATEST
+    assert migrations.upgrade(engine) == []
+
+    # The upgraded schema is the one models.py describes
+    inspector = inspect(engine)
+    for table in models.Base.metadata.sorted_tables:
+        assert {c.name for c in table.columns} == {c["name"] for c in inspector.get_columns(table.name)}, table.name
+        assert {i.name for i in table.indexes} <= {i["name"] for i in inspector.get_indexes(table.name)}, table.name
+    # Left prefixes of composite indexes are gone
+    assert not {i["name"] for table in inspector.get_table_names() for i in inspector.get_indexes(table)} \
+        & set(migrations.REDUNDANT_INDEXES)
+
+    with engine.connect() as conn:
+        row = conn.execute(text(
+            "SELECT codramo, room_id, teacher_id, day_id, time_module_id, start_minute, end_minute FROM academic_schedules"
+        )).one()
+        # Tuesday 08:00 - 09:20 in minutes of the week
+        assert tuple(row) == ("MAT101", 1, 1, 1, 1, 1440 + 480, 1440 + 560)
+        assert conn.execute(text("SELECT start_minute, end_minute FROM time_modules")).one() == (480, 560)
+    engine.dispose()
+
+
+def test_schedules_from_before_row_hash_are_rehashed_by_the_first_sync(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    migrations.BASELINE.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE sync_state"))
+        conn.execute(text("INSERT INTO academic_schedules (carrera, nivel, dia, codramo, modulo_horario, sala, seccion, asignatura, docente) "
+                          "VALUES ('INGENIERÍA', '1', 'LU', 'MAT101', '1', 'CCEA101', '1', 'Cálculo', 'Ana Pérez')"))
+    migrations.upgrade(engine)
+
+    db = sessionmaker(bind=engine)()
+    service = google_sheets.GoogleSheetsService(client=FakeClient(make_sheets()))
+    phase = service.sync_full_data(db)["phases"]["academic_schedules"]
+    # The stored row keeps its id and gets its hash; the other two are new
+    assert (phase["inserted"], phase["updated"], phase["deleted"]) == (2, 1, 0)
+    assert db.query(models.AcademicSchedule).filter(models.AcademicSchedule.row_hash.is_(None)).count() == 0
+
+    phase = service.sync_full_data(db, force=True)["phases"]["academic_schedules"]
+    assert phase["unchanged"] == 3
+    db.close()
+    engine.dispose()
+
+
+def test_redundant_indexes_of_an_upgraded_database_are_dropped(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    migrations.upgrade(engine)
+    # As versions 3 and 5 left a database before version 7 existed
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX ix_subjects_code ON subjects (code)"))
+        conn.execute(text("CREATE INDEX ix_academic_schedules_dia ON academic_schedules (dia)"))
+        conn.execute(text("CREATE INDEX ix_academic_schedules_room_id ON academic_schedules (room_id)"))
+        conn.execute(text(f"DELETE FROM {migrations.VERSION_TABLE} WHERE version = 7"))
+
+    assert migrations.upgrade(engine) == [7]
+    inspector = inspect(engine)
+    assert "ix_subjects_code" not in {i["name"] for i in inspector.get_indexes("subjects")}
+    assert not {"ix_academic_schedules_dia", "ix_academic_schedules_room_id"} \
+        & {i["name"] for i in inspector.get_indexes("academic_schedules")}
+    engine.dispose()
@@ -0,0 +1,65 @@
+import sys
+import os
+import pytest
+from fastapi import HTTPException, Response
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, pagination, main
+
+SPEC = pagination.ListSpec(models.AcademicSchedule, sortable=("docente",), contains=("asignatura",), exact=("dia",))
+
+
+@pytest.fixture
+def db(db):
+    teachers = ["Ana", None, "Luis", "Ana", None, "Berta", "Luis", "Ana"]
+    db.add_all([
+        models.AcademicSchedule(id=i + 1, docente=docente, dia="LUNES" if i % 2 else "MARTES",
+                                asignatura="Cálculo" if i < 4 else "Física")
+        for i, docente in enumerate(teachers)
+    ])
+    db.commit()
+    return db
+
+
+def walk(db, sort, filters=None, limit=3):
+    ids, cursor = [], None
+    while True:
+        response = Response()
+        page = pagination.paginate(db, SPEC, response, filters or {}, sort=sort, cursor=cursor, limit=limit)
+        ids += [row.id for row in page]
+        cursor = response.headers.get(pagination.NEXT_CURSOR_HEADER)
+        if not cursor:
+            return ids
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3])
+@pytest.mark.parametrize("sort", ["id", "-id", "docente", "-docente"])
+def test_cursor_pages_match_a_single_sorted_query(db, sort, limit):
+    everything = [row.id for row in pagination.paginate(db, SPEC, Response(), {}, sort=sort)]
+    assert len(everything) == 8
+    # Small pages end inside the NULL rows and cross into and out of them
+    assert walk(db, sort, limit=limit) == everything
+
+
+def test_filters_and_invalid_input(db):
+    assert walk(db, "id", {"dia": "LUNES", "asignatura": "fís"}) == [6, 8]
+    with pytest.raises(HTTPException):
+        pagination.paginate(db, SPEC, Response(), {}, sort="sala")
+    with pytest.raises(HTTPException):
+        pagination.paginate(db, SPEC, Response(), {}, cursor="not-a-cursor")
+
+
+def test_contains_filters_match_wildcards_literally(db):
+    db.add(models.AcademicSchedule(id=9, docente="Ana", dia="LUNES", asignatura="Taller_100%"))
+    db.commit()
+    assert walk(db, "id", {"asignatura": "_100%"}) == [9]
+    assert walk(db, "id", {"asignatura": "%"}) == [9]
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=1001", "skip=-1"])
+def test_list_endpoints_reject_out_of_range_pages(query):
+    with TestClient(main.app) as client:
+        for path in ("/rooms/", "/subjects/", "/schedules/", "/academic-schedules/"):
+            assert client.get(f"{path}?{query}").status_code == 422, path
@@ -0,0 +1,71 @@
+import sys
+import os
+from fastapi import Depends, FastAPI, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, schemas, serialization, profiling
+
+
+def make_app():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+    db = SessionLocal()
+    db.add_all([models.Room(code=f"R{i}", name=f"Sala {i}", capacity=30) for i in range(3)])
+    db.commit()
+    db.close()
+    profiling.instrument(engine)
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    rows = serialization.RowEncoder(schemas.Room, models.Room)
+    app = FastAPI()
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+    @app.get("/rooms/{room_id}")
+    def read_room(room_id: int, db: Session = Depends(get_db)):
+        # One statement per room on purpose, like an N+1 loop
+        for id in range(1, room_id + 1):
+            db.get(models.Room, id)
+        return Response(rows.encode(db.execute(rows.select()).all()), media_type="application/json")
+
+    @app.get("/metrics")
+    def read_metrics():
+        return Response(profiling.metrics.render(), media_type=profiling.CONTENT_TYPE)
+
+    return app
+
+
+def test_requests_are_counted_per_route_with_their_statements(tmp_path, monkeypatch):
+    profiling.metrics.clear()
+    client = TestClient(make_app())
+
+    response = client.get("/rooms/3")
+    assert 'desc="4 queries"' in response.headers["Server-Timing"]
+    client.get("/rooms/2")
+    client.get("/missing")
+
+    text = client.get("/metrics").text
+    assert 'uplanner_http_requests_total{method="GET",route="/rooms/{room_id}",status="200"} 2' in text
+    assert 'uplanner_http_requests_total{method="GET",route="(unmatched)",status="404"} 1' in text
+    assert 'uplanner_sql_statements_total{method="GET",route="/rooms/{room_id}"} 7' in text
+    assert 'uplanner_http_request_sql_statements_bucket{method="GET",route="/rooms/{room_id}",le="2"} 0' in text
+    assert 'uplanner_http_request_sql_statements_bucket{method="GET",route="/rooms/{room_id}",le="5"} 2' in text
+    assert 'uplanner_serialization_seconds_total{method="GET",route="/rooms/{room_id}"}' in text
+
+    # A request asking for a profile leaves a folded stack dump
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_INTERVAL_MS", 0.5)
+    client.get("/rooms/3", headers={"X-Profile": "1"})
+    dumps = list(tmp_path.glob("*-GET-rooms_room_id-*.folded"))
+    assert len(dumps) == 1
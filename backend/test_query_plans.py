@@ -0,0 +1,89 @@
+import sys
+import os
+import pytest
+from sqlalchemy import create_engine, select, text
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, crud, pagination, grids, main
+
+Subject = models.Subject
+AcademicSchedule = models.AcademicSchedule
+
+# Lookups that must be answered from an index, never by reading the whole table
+HOT_QUERIES = {
+    "schedules by faculty": crud.select_schedules_by_faculty(1),
+    "subject by code and section": select(Subject).where(Subject.code == "MAT101", Subject.section == "1"),
+    "subject by name": select(Subject).where(Subject.name == "Cálculo"),
+    "faculty by name": select(models.Faculty).where(models.Faculty.name == "Ingeniería"),
+    "time module by mod_hor": select(models.TimeModule).where(models.TimeModule.mod_hor == "1"),
+    "room occupancy in a slot": select(AcademicSchedule).where(
+        AcademicSchedule.dia == "LUNES", AcademicSchedule.modulo_horario == "1", AcademicSchedule.sala == "CCEA-101"
+    ),
+    "teacher occupancy in a slot": select(AcademicSchedule).where(
+        AcademicSchedule.dia == "LUNES", AcademicSchedule.modulo_horario == "1", AcademicSchedule.docente == "Ana"
+    ),
+    "room occupancy in a slot by ids": select(AcademicSchedule).where(
+        AcademicSchedule.day_id == 1, AcademicSchedule.time_module_id == 1, AcademicSchedule.room_id == 1
+    ),
+    "teacher occupancy in a slot by ids": select(AcademicSchedule).where(
+        AcademicSchedule.day_id == 1, AcademicSchedule.time_module_id == 1, AcademicSchedule.teacher_id == 1
+    ),
+    "sessions overlapping a time range": crud.select_overlapping_schedules(1 * 1440 + 600, 1 * 1440 + 680),
+    "academic schedules of a subject": select(AcademicSchedule).where(AcademicSchedule.subject_id == 1),
+    "schedules of a subject": select(models.Schedule).where(models.Schedule.subject_id == 1),
+    "schedules in a time block": select(models.Schedule).where(models.Schedule.time_block_id == 1),
+    "teacher grid": grids.grid_statement(grids.TEACHER, entity="ANA"),
+    "room grid of a building": grids.grid_statement(grids.ROOM, prefix="CCEA"),
+    "grid cells of a schedule": select(models.OccupancyCell).where(models.OccupancyCell.academic_schedule_id == 1),
+}
+
+LIST_SPECS = [value for value in vars(main).values() if isinstance(value, pagination.ListSpec)]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def query_plan(engine, stmt) -> list:
+    sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return [row[3] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+
+
+def full_scans(plan: list) -> list:
+    # "SCAN t" reads the whole table and "SCAN t USING [COVERING] INDEX" a whole index, from its first entry
+    return [step for step in plan if step.startswith("SCAN")]
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(engine, name):
+    plan = query_plan(engine, HOT_QUERIES[name])
+    assert not full_scans(plan), plan
+
+
+def seeks(plan: list, table: str) -> bool:
+    # "SEARCH t USING INDEX ... (col>?)" starts at the cursor; a SCAN, even of an index, starts at the first row
+    return any(step.startswith(f"SEARCH {table} ") for step in plan)
+
+
+@pytest.mark.parametrize("spec", LIST_SPECS, ids=lambda spec: spec.model.__tablename__)
+def test_keyset_pages_seek_instead_of_sorting(engine, spec):
+    table = spec.model.__tablename__
+    for field in sorted(spec.sortable):
+        nullable = field != "id" and spec.model.__table__.c[field].nullable
+        for sort in (field, "-" + field):
+            # A page after a row with a value and, where the column allows it, after a NULL row
+            for value in ("x", None) if nullable else ("x",):
+                cursor = pagination.encode_cursor(value, 10)
+                statements, _ = pagination.page_statements(spec, {}, sort, cursor, limit=100)
+                for stmt in statements:
+                    plan = query_plan(engine, stmt)
+                    assert seeks(plan, table), (sort, value, plan)
+                    # Never a sort of the whole result; a column indexed only as the prefix of a
+                    # composite (subjects.code, academic_schedules.dia) sorts the ties on id
+                    assert "USE TEMP B-TREE FOR ORDER BY" not in plan, (sort, value, plan)
@@ -0,0 +1,60 @@
+import sys
+import os
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, database, cache, response_cache, main
+
+
+@pytest.fixture
+def client(tmp_path):
+    url = f"sqlite:///{tmp_path / 'cache.db'}"
+    engine = create_engine(url)
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([models.Day(code="LUNES", name="Lunes"), models.Day(code="MARTES", name="Martes")])
+    session.commit()
+
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    main.app.dependency_overrides[database.get_async_db] = get_async_db
+    response_cache.clear()
+    with TestClient(main.app) as client:
+        client.session = session
+        yield client
+    main.app.dependency_overrides.clear()
+    session.close()
+    engine.dispose()
+
+
+def test_reference_list_is_cached_until_bump(client):
+    first = client.get("/days/?limit=1")
+    assert first.status_code == 200
+    assert [day["code"] for day in first.json()] == ["LUNES"]
+    etag = first.headers["etag"]
+    assert first.headers["x-next-cursor"]
+
+    assert client.get("/days/?limit=1", headers={"If-None-Match": etag}).status_code == 304
+
+    # Rows written behind the cache's back are not seen until the data version moves
+    client.session.query(models.Day).filter(models.Day.code == "LUNES").update({"name": "Lun"})
+    client.session.commit()
+    cached = client.get("/days/?limit=1")
+    assert cached.content == first.content
+    assert cached.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+
+    cache.bump()
+    fresh = client.get("/days/?limit=1", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()[0]["name"] == "Lun"
+    assert fresh.headers["etag"] != etag
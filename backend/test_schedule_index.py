@@ -0,0 +1,67 @@
+import sys
+import os
+import pytest
+from datetime import time
+from fastapi import HTTPException
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, schemas, crud, cache
+
+
+@pytest.fixture
+def db(db):
+    room_type = models.RoomType(id=1, name="Teórica")
+    db.add_all([
+        room_type,
+        models.Room(id=1, code="A101", name="Aula 101", capacity=30, room_type_id=1),
+        models.Room(id=2, code="A102", name="Aula 102", capacity=30, room_type_id=1),
+        models.Teacher(id=1, full_name="Ana Pérez", rut="1-9"),
+        models.Subject(id=1, name="Cálculo", enrolled_students=25, required_room_type_id=1),
+        models.TimeBlock(id=1, day_of_week="Lunes", start_time=time(8, 0), end_time=time(9, 30)),
+        models.TeacherAvailability(teacher_id=1, time_block_id=1),
+    ])
+    db.commit()
+    return db
+
+
+def test_created_schedule_is_seen_without_rebuild(db):
+    crud.create_schedule(db, schemas.ScheduleBase(teacher_id=1, room_id=1, subject_id=1, time_block_id=1))
+
+    with pytest.raises(HTTPException) as room_clash:
+        crud.validate_schedule(db, schemas.ScheduleBase(teacher_id=1, room_id=1, subject_id=1, time_block_id=1))
+    assert room_clash.value.status_code == 409
+
+    with pytest.raises(HTTPException) as teacher_clash:
+        crud.validate_schedule(db, schemas.ScheduleBase(teacher_id=1, room_id=2, subject_id=1, time_block_id=1))
+    assert "Teacher is already scheduled" in teacher_clash.value.detail
+
+
+def test_data_version_bump_reloads_entities(db):
+    schedule = schemas.ScheduleBase(teacher_id=1, room_id=1, subject_id=1, time_block_id=1)
+    assert crud.validate_schedule(db, schedule)
+
+    db.query(models.Room).filter(models.Room.id == 1).update({"capacity": 10})
+    db.commit()
+    cache.bump()
+
+    with pytest.raises(HTTPException) as capacity:
+        crud.validate_schedule(db, schedule)
+    assert capacity.value.status_code == 400
+
+
+def test_batch_detects_clashes_inside_the_batch(db):
+    items = [
+        schemas.ScheduleBase(teacher_id=1, room_id=1, subject_id=1, time_block_id=1),
+        schemas.ScheduleBase(teacher_id=1, room_id=2, subject_id=1, time_block_id=1),
+    ]
+
+    result = crud.create_schedules_batch(db, items, mode="all_or_nothing")
+    assert not result["committed"]
+    assert [r["status_code"] for r in result["results"]] == [424, 409]
+    assert db.query(models.Schedule).count() == 0
+
+    result = crud.create_schedules_batch(db, items, mode="best_effort")
+    assert result["committed"] and result["created"] == 1
+    assert result["results"][0]["schedule"]["room_id"] == 1
+    assert db.query(models.Schedule).count() == 1
@@ -0,0 +1,32 @@
+import sys
+import os
+import json
+from typing import List
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import selectinload, sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, schemas, serialization
+
+
+def test_row_encoder_matches_the_response_schema():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(models.Faculty(id=1, name="Ingeniería"))
+    db.add_all([
+        models.Subject(code="MAT101", name="Cálculo", enrolled_students=40, required_room_type_id=1, faculty_id=1),
+        models.Subject(code="FIS101", name="Física", enrolled_students=25, required_room_type_id=1),
+    ])
+    db.commit()
+
+    encoder = serialization.RowEncoder(schemas.Subject, models.Subject, nested={"faculty": schemas.Faculty})
+    fast = json.loads(encoder.encode(db.execute(encoder.select().order_by(models.Subject.id)).all()))
+
+    subjects = db.query(models.Subject).options(selectinload(models.Subject.faculty)).order_by(models.Subject.id).all()
+    adapter = TypeAdapter(List[schemas.Subject])
+    assert fast == adapter.dump_python(adapter.validate_python(subjects, from_attributes=True), mode="json")
+    assert fast[1]["faculty"] is None
+    db.close()
@@ -0,0 +1,69 @@
+import sys
+import os
+import gzip
+import json
+import brotli
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, schemas, snapshot
+
+
+@pytest.fixture
+def db(db):
+    db.add_all([
+        models.AcademicSchedule(carrera="Ingeniería", dia="LUNES", sala="CCEA-101", docente="Ana", codramo="MAT101"),
+        models.AcademicSchedule(carrera="Enfermería", dia="LUNES", sala=None, docente="Luis", codramo="ENF201"),
+        models.AcademicSchedule(carrera="Ingeniería", dia="MARTES", sala="CCEA-101", docente="Ana", codramo="MAT101"),
+        models.Room(code="CCEA-101", name="Sala 101", capacity=40),
+        models.Day(code="LUNES", name="Lunes"),
+        models.SyncState(worksheet="PRESENCIAL", revision="abc"),
+    ])
+    db.commit()
+    return db
+
+
+def decode(document: dict, table: str) -> list:
+    dictionaries = document["dictionaries"]
+    columns = document["tables"][table]["columns"]
+    rows = []
+    for i in range(document["tables"][table]["length"]):
+        row = {}
+        for name, values in columns.items():
+            value = values[i]
+            row[name] = dictionaries[name][value] if name in dictionaries and value is not None else value
+        rows.append(row)
+    return rows
+
+
+def test_snapshot_round_trips_through_dictionaries(db):
+    data = snapshot.Snapshot(snapshot.build(db))
+    document = json.loads(gzip.decompress(data.encoded("gzip")))
+
+    assert document["sync_id"] == snapshot.sync_id(db) is not None
+    assert document["dictionaries"]["carrera"] == ["Enfermería", "Ingeniería"]
+    assert document["tables"]["academic_schedules"]["columns"]["sala"] == [0, None, 0]
+    schedules = decode(document, "academic_schedules")
+    assert [(row["carrera"], row["dia"], row["sala"], row["docente"]) for row in schedules] == [
+        ("Ingeniería", "LUNES", "CCEA-101", "Ana"),
+        ("Enfermería", "LUNES", None, "Luis"),
+        ("Ingeniería", "MARTES", "CCEA-101", "Ana"),
+    ]
+    assert decode(document, "days") == [{"code": "LUNES", "name": "Lunes", "id": 1}]
+    assert document["tables"]["subjects"] == {"length": 0, "columns": {
+        name: [] for name in snapshot._fields(models.Subject, schemas.Subject)
+    }}
+
+
+def test_both_encodings_decode_to_the_body(db):
+    data = snapshot.Snapshot(snapshot.build(db))
+    assert gzip.decompress(data.encoded("gzip")) == data.body
+    assert brotli.decompress(data.encoded("br")) == data.body
+    assert data.etag("br") != data.etag("gzip") != data.etag(None)
+
+
+def test_negotiate_prefers_brotli():
+    assert snapshot.negotiate("gzip, deflate") == "gzip"
+    assert snapshot.negotiate("identity") is None
+    assert snapshot.negotiate("br, gzip") == "br"
@@ -0,0 +1,60 @@
+import sys
+import os
+import pytest
+from datetime import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, schemas, crud, solver, schedule_index
+
+
+@pytest.fixture
+def db(db):
+    db.add_all([
+        models.RoomType(id=1, name="Teórica"),
+        models.RoomType(id=2, name="Computación"),
+        models.Room(id=1, code="A101", name="Aula 101", capacity=40, room_type_id=1),
+        models.Room(id=2, code="A102", name="Aula 102", capacity=20, room_type_id=1),
+        models.Room(id=3, code="LAB1", name="Lab 1", capacity=25, room_type_id=2),
+        models.Teacher(id=1, full_name="Ana Pérez", rut="1-9"),
+        models.Teacher(id=2, full_name="Luis Soto", rut="2-7"),
+        models.Subject(id=1, name="Cálculo", enrolled_students=35, required_room_type_id=1),
+        models.Subject(id=2, name="Álgebra", enrolled_students=15, required_room_type_id=1),
+        models.Subject(id=3, name="Programación", enrolled_students=20, required_room_type_id=2),
+        models.Subject(id=4, name="Redes", enrolled_students=50, required_room_type_id=2),
+    ])
+    for block in range(1, 4):
+        db.add(models.TimeBlock(id=block, day_of_week="Lunes", start_time=time(7 + block, 0), end_time=time(8 + block, 0)))
+        db.add(models.TeacherAvailability(teacher_id=1, time_block_id=block))
+    db.add(models.TeacherAvailability(teacher_id=2, time_block_id=1))
+    db.commit()
+    return db
+
+
+def test_solution_satisfies_hard_constraints(db):
+    tasks = [
+        schemas.SolveTask(subject_id=1, teacher_id=1, sessions=2),
+        schemas.SolveTask(subject_id=2, teacher_id=2),
+        schemas.SolveTask(subject_id=3, teacher_id=1),
+    ]
+    result = solver.solve(schedule_index.index.snapshot(db), tasks)
+
+    assert result["complete"]
+    assert len(result["placements"]) == 4
+    batch = crud.create_schedules_batch(
+        db, [schemas.ScheduleBase(**p) for p in result["placements"]], mode="all_or_nothing"
+    )
+    assert batch["committed"]
+
+
+def test_unplaceable_sessions_are_listed(db):
+    tasks = [
+        schemas.SolveTask(subject_id=4, teacher_id=1),
+        schemas.SolveTask(subject_id=2, teacher_id=2, sessions=2),
+    ]
+    result = solver.solve(schedule_index.index.snapshot(db), tasks)
+
+    assert not result["complete"]
+    assert len(result["placements"]) == 1
+    reasons = sorted(item["reason"] for item in result["unplaced"])
+    assert reasons == ["All feasible slots are taken", "No room with enough capacity and the required room type"]
@@ -0,0 +1,60 @@
+import sys
+import os
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, cache, suggestions, main
+
+
+@pytest.fixture
+def db(db):
+    db.add_all([
+        models.RoomType(id=1, name="Teórica"),
+        models.Room(id=1, code="CCEA-101", name="Sala 101", capacity=20, room_type_id=1),
+        models.Room(id=2, code="CCEA-102", name="Sala 102", capacity=40, room_type_id=1),
+        models.Room(id=3, code="CCEB-201", name="Sala 201", capacity=45, room_type_id=1),
+        models.Room(id=4, code="CCEB-202", name="Sala 202", capacity=80, room_type_id=1),
+        models.Subject(id=1, code="MAT101", name="Cálculo", enrolled_students=35, required_room_type_id=1),
+        models.Subject(id=2, code="FIS101", name="Física", enrolled_students=15, required_room_type_id=1),
+        models.AcademicSchedule(codramo="MAT101", seccion="1", asignatura="Cálculo",
+                                dia="LUNES", modulo_horario="1", sala="CCEA-101"),
+        models.AcademicSchedule(codramo="FIS101", seccion="1", asignatura="Física",
+                                dia="LUNES", modulo_horario="1", sala="SALA 102 (EDIFICIO A)"),
+        models.AcademicSchedule(codramo="FIS101", seccion="2", asignatura="Física",
+                                dia="MARTES", modulo_horario="2", sala="CCEA-101"),
+    ])
+    db.commit()
+    return db
+
+
+def test_suggests_smallest_free_rooms_that_fit(db):
+    overbooked, = suggestions.get_index(db).for_codramo("MAT101")
+    assert overbooked["status"] == suggestions.SUGGESTED
+    assert overbooked["current_room"]["id"] == 1
+    # Sala 102 fits but is taken in that slot by FIS101, so best fit skips it
+    assert [room["id"] for room in overbooked["rooms"]] == [3, 4]
+
+    confirmed = suggestions.get_index(db).for_codramo("FIS101", seccion="2")
+    assert [s["status"] for s in confirmed] == [suggestions.CONFIRMED]
+    assert [s["codramo"] for s in suggestions.get_index(db).unassigned()] == ["MAT101"]
+    assert suggestions.get_index(db).unassigned(dia="MARTES") == []
+
+
+def test_unassigned_list_is_built_once_per_data_version(db):
+    first = suggestions.unassigned(db)
+    assert [s["codramo"] for s in first] == ["MAT101"]
+    assert suggestions.unassigned(db) is first
+    assert suggestions.unassigned(db, dia="MARTES") == []
+
+    db.add(models.AcademicSchedule(codramo="MAT101", seccion="2", dia="MARTES", modulo_horario="2", sala="POR ASIGNAR"))
+    db.commit()
+    cache.bump()
+    assert [s["seccion"] for s in suggestions.unassigned(db)] == ["1", "2"]
+
+
+@pytest.mark.parametrize("query", ["skip=-1", "limit=-1", "rooms=0"])
+def test_unassigned_endpoint_rejects_out_of_range_pages(query):
+    with TestClient(main.app) as client:
+        assert client.get(f"/suggestions/unassigned/?{query}").status_code == 422
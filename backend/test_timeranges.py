@@ -0,0 +1,51 @@
+import sys
+import os
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models, crud, conflicts, lookups, timeranges
+
+
+def test_parsing():
+    assert timeranges.day_number("Miércoles") == timeranges.day_number("MI") == 2
+    assert timeranges.parse_clock("8:05:00") == 485
+    assert timeranges.parse_range("M2 09:30 a 10:50") == (570, 650)
+    assert timeranges.parse_range("2") is None
+    assert timeranges.module_range("", "", "08:00 - 09:20") == (480, 560)
+
+
+def test_partial_overlaps_are_conflicts_and_range_lookups():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        models.Room(id=1, code="CCEA-101", name="Sala 101", capacity=40),
+        models.Room(id=2, code="CCEA-102", name="Sala 102", capacity=40),
+        models.Day(code="MA", name="Martes"),
+        models.TimeModule(mod_hor="3", modulo="3", hora_inicio="10:00", hora_final="11:20", rango="10:00 - 11:20",
+                          start_minute=600, end_minute=680),
+        # Same room, module 3 and a lab written as 11:00 - 12:30: they share 20 minutes
+        models.AcademicSchedule(id=1, dia="MA", modulo_horario="3", sala="CCEA-101", codramo="MAT101", docente="Ana"),
+        models.AcademicSchedule(id=2, dia="MA", modulo_horario="LAB 11:00 - 12:30", sala="CCEA-101",
+                                codramo="QUI101", docente="Luis"),
+        # Back to back with row 2 in another room: no clash
+        models.AcademicSchedule(id=3, dia="MA", modulo_horario="12:30 - 13:50", sala="CCEA-102",
+                                codramo="FIS101", docente="Luis"),
+    ])
+    db.commit()
+    lookups.resolve_schedule_references(db)
+    db.commit()
+
+    assert db.get(models.AcademicSchedule, 2).start_minute == 1440 + 660
+    found = conflicts.find_conflicts(db)
+    assert [(c["type"], c["academic_schedule_id"]) for c in found] == [
+        (conflicts.ROOM_CLASH, 1), (conflicts.ROOM_CLASH, 2)
+    ]
+
+    # Tuesday 12:00 - 12:40 touches rows 2 and 3
+    start, end = timeranges.week_interval(1, (720, 760))
+    assert [row.id for row in db.execute(crud.select_overlapping_schedules(start, end)).scalars()] == [2, 3]
+    assert [room.code for room in crud.get_busy_rooms(db, start, end)] == ["CCEA-101", "CCEA-102"]
+    db.close()
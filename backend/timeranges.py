@@ -0,0 +1,102 @@
+import re
+import unicodedata
+
+# Sessions are stored as [start, end) minutes of the week, Monday 00:00 = 0, so
+# "busy between" questions are integer range lookups and partial overlaps show up.
+MINUTES_PER_DAY = 24 * 60
+
+DAY_NUMBERS = {
+    "LU": 0, "LUNES": 0,
+    "MA": 1, "MARTES": 1,
+    "MI": 2, "MIERCOLES": 2,
+    "JU": 3, "JUEVES": 3,
+    "VI": 4, "VIERNES": 4,
+    "SA": 5, "SABADO": 5,
+    "DO": 6, "DOMINGO": 6,
+}
+
+_CLOCK = r"(\d{1,2})[:.h](\d{2})"
+_CLOCK_RE = re.compile(r"^\s*" + _CLOCK)
+_RANGE_RE = re.compile(_CLOCK + r"(?::\d{2})?\s*(?:-|–|a|A|hasta)\s*" + _CLOCK)
+
+
+def _plain(text) -> str:
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(c for c in text if not unicodedata.combining(c)).upper().strip()
+
+
+def day_number(text):
+    """
+    0 (Monday) to 6 (Sunday) for a day code or name such as 'LU', 'Martes' or 'MIÉRCOLES'.
+    """
+    return DAY_NUMBERS.get(_plain(text))
+
+
+def _minutes(hours: str, minutes: str):
+    hours, minutes = int(hours), int(minutes)
+    if hours > 24 or minutes > 59:
+        return None
+    return hours * 60 + minutes
+
+
+def parse_clock(text):
+    """
+    Minute of the day for '08:00', '8:00:00' or '8.00'; None if it isn't a time.
+    """
+    match = _CLOCK_RE.match(str(text or ""))
+    return _minutes(*match.groups()) if match else None
+
+
+def parse_range(text):
+    """
+    (start, end) minutes of the day for text holding a range like
+    '08:00 - 09:20' or 'M2 09:30 a 10:50'; None when there is none.
+    """
+    match = _RANGE_RE.search(str(text or ""))
+    if not match:
+        return None
+    start, end = _minutes(*match.groups()[:2]), _minutes(*match.groups()[2:])
+    if start is None or end is None or end <= start:
+        return None
+    return start, end
+
+
+def module_range(hora_inicio, hora_final, rango):
+    """
+    (start, end) minutes of the day of a TimeModule: its start and end columns, else its 'rango'.
+    """
+    start, end = parse_clock(hora_inicio), parse_clock(hora_final)
+    if start is not None and end is not None and end > start:
+        return start, end
+    return parse_range(rango)
+
+
+def week_interval(day: int, day_range):
+    """
+    [start, end) minutes of the week of a (start, end) minute-of-day range on 'day'.
+    """
+    if day is None or day_range is None:
+        return None, None
+    return day * MINUTES_PER_DAY + day_range[0], day * MINUTES_PER_DAY + day_range[1]
+
+
+def clusters(items: list, start, end) -> list:
+    """
+    Groups 'items' into runs whose [start, end) intervals chain into each other
+    (sorted by start; a run ends where the next item starts after all the
+    previous ones ended). Only items in the same run can overlap.
+    """
+    runs = []
+    run_end = None
+    for item in sorted(items, key=lambda item: (start(item), end(item))):
+        if run_end is None or start(item) >= run_end:
+            runs.append([])
+            run_end = end(item)
+        else:
+            run_end = max(run_end, end(item))
+        runs[-1].append(item)
+    return runs
+
+
+def overlaps(a_start: int, a_end: int, b_start: int, b_end: int) -> bool:
+    return a_start < b_end and b_start < a_end
@@ -24,6 +24,20 @@ import axios from 'axios';
 import DirectorDashboard from './DirectorDashboard';
 import Reports from './Reports';
 
+// List endpoints return at most 1000 rows per request; the next page starts at the X-Next-Cursor header
+const fetchAllPages = async (url) => {
+    let rows = [];
+    let cursor = null;
+    do {
+        const params = { limit: 1000 };
+        if (cursor) params.cursor = cursor;
+        const res = await axios.get(url, { params });
+        rows = rows.concat(res.data);
+        cursor = res.headers['x-next-cursor'];
+    } while (cursor);
+    return rows;
+};
+
 const Notification = ({ message, type, onClose }) => (
     <motion.div
         initial={{ opacity: 0, x: 50 }}
@@ -75,6 +89,7 @@ export default function App({ user, onLogout }) {
     const [selectedDay, setSelectedDay] = useState('Todos');
     const [isModalOpen, setIsModalOpen] = useState(false);
     const [conflictDetails, setConflictDetails] = useState([]);
+    const [conflictsCount, setConflictsCount] = useState(0);
     const [roomsSubTab, setRoomsSubTab] = useState('listado');
     const [roomsDayFilter, setRoomsDayFilter] = useState('Todos');
     const [roomsModuleFilter, setRoomsModuleFilter] = useState('Todos');
@@ -84,6 +99,8 @@ export default function App({ user, onLogout }) {
     const [dashModuleFilter, setDashModuleFilter] = useState('Todos');
     const [suggestionsSearchTerm, setSuggestionsSearchTerm] = useState('');
     const [sugColFilters, setSugColFilters] = useState({ asignatura: '', docente: '', sala: '', estado: '' });
+    const [suggestionsCodramo, setSuggestionsCodramo] = useState('');
+    const [suggestionRows, setSuggestionRows] = useState([]);
     const [conflictsSearchTerm, setConflictsSearchTerm] = useState('');
     const [confColFilters, setConfColFilters] = useState({ type: '', entity: '', subject: '', day: '' });
     const [userRole, setUserRole] = useState('registro'); // 'registro' | 'director'
@@ -100,8 +117,8 @@ export default function App({ user, onLogout }) {
 
     const fetchTeachers = async () => {
         try {
-            const res = await axios.get('/api/teachers/');
-            setTeachers(res.data);
+            const rows = await fetchAllPages('/api/teachers/');
+            setTeachers(rows);
         } catch (err) {
             console.error('Error fetching teachers:', err);
         }
@@ -165,8 +182,8 @@ export default function App({ user, onLogout }) {
 
     const fetchRooms = async () => {
         try {
-            const res = await axios.get('/api/rooms/');
-            setRooms(res.data);
+            const rows = await fetchAllPages('/api/rooms/');
+            setRooms(rows);
         } catch (err) {
             console.error('Error fetching rooms:', err);
         }
@@ -174,8 +191,8 @@ export default function App({ user, onLogout }) {
 
     const fetchSubjects = async () => {
         try {
-            const res = await axios.get('/api/subjects/?limit=10000');
-            setSubjects(res.data);
+            const rows = await fetchAllPages('/api/subjects/');
+            setSubjects(rows);
         } catch (err) {
             console.error('Error fetching subjects:', err);
         }
@@ -234,8 +251,8 @@ export default function App({ user, onLogout }) {
 
     const fetchAcademicSchedules = async () => {
         try {
-            const res = await axios.get('/api/academic-schedules/');
-            setAcademicSchedules(res.data);
+            const rows = await fetchAllPages('/api/academic-schedules/');
+            setAcademicSchedules(rows);
         } catch (err) {
             console.error('Error fetching academic schedules:', err);
         }
@@ -321,7 +338,13 @@ export default function App({ user, onLogout }) {
         setIsSyncing(true);
         try {
             const res = await axios.post('/api/sync/google-sheets/');
-            addNotification(`Sincronización completada: ${res.data.rows_processed} filas procesadas`, 'success');
+            let job = res.data;
+            while (job.status === 'pending' || job.status === 'running') {
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                job = (await axios.get(`/api/sync/jobs/${job.id}`)).data;
+            }
+            if (job.status === 'failed') throw new Error(job.error);
+            addNotification(`Sincronización completada: ${job.result.rows_processed} filas procesadas`, 'success');
             // Refresh data if we are on a relevant tab
             if (activeTab === 'teachers') fetchTeachers();
             if (activeTab === 'rooms') fetchRooms();
@@ -329,6 +352,8 @@ export default function App({ user, onLogout }) {
             if (activeTab === 'days') fetchDays();
             if (activeTab === 'timeModules') fetchTimeModules();
             if (activeTab === 'schedules') fetchAcademicSchedules();
+            fetchConflicts();
+            fetchSuggestions();
 
         } catch (error) {
             console.error(error);
@@ -362,142 +387,86 @@ export default function App({ user, onLogout }) {
 
     const activeSubjectsCount = new Set(fullyFilteredSchedules.map(s => s.codramo || s.asignatura).filter(Boolean)).size;
 
-    let localConflicts = [];
-    const scheduleGroups = {};
-    activeSchedulesForTeachers.forEach(s => {
-        if (!s.dia || !s.modulo_horario) return;
-        const key = `${s.dia}-${s.modulo_horario}`;
-        if (!scheduleGroups[key]) scheduleGroups[key] = [];
-        scheduleGroups[key].push(s);
-    });
-
-    Object.values(scheduleGroups).forEach(group => {
-        if (group.length <= 1) return;
-        const roomsInSlot = new Map();
-        const teachersInSlot = new Map();
-        group.forEach(s => {
-            if (s.sala && typeof s.sala === 'string' && s.sala.trim() !== '') {
-                const roomKey = s.sala.toUpperCase().trim();
-                let isAdhoc = roomKey.includes("A DETERMINAR") || roomKey.includes("POR ASIGNAR");
-                if (!isAdhoc) {
-                    if (roomsInSlot.has(roomKey)) {
-                        localConflicts.push({
-                            type: 'Cruce de Sala',
-                            entity: roomKey,
-                            subject: s.asignatura || s.codramo,
-                            day: s.dia,
-                            module: s.modulo_horario
-                        });
-                        // Add the original conflicting schedule if it's the first time we detect the conflict for this room
-                        const original = roomsInSlot.get(roomKey);
-                        if (original && !original.reported) {
-                            localConflicts.push({
-                                type: 'Cruce de Sala',
-                                entity: roomKey,
-                                subject: original.asignatura || original.codramo,
-                                day: original.dia,
-                                module: original.modulo_horario
-                            });
-                            original.reported = true;
-                        }
-
-                    } else {
-                        roomsInSlot.set(roomKey, s);
-                    }
-                }
-            }
-            if (s.docente && typeof s.docente === 'string' && s.docente.trim() !== '') {
-                const teacherKey = s.docente.toUpperCase().trim();
-                let isNoDocente = teacherKey.includes("POR ASIGNAR") || teacherKey === "SIN DOCENTE" || teacherKey === "NO ASIGNADO";
-                if (!isNoDocente) {
-                    if (teachersInSlot.has(teacherKey)) {
-                        localConflicts.push({
-                            type: 'Cruce de Docente',
-                            entity: teacherKey,
-                            subject: s.asignatura || s.codramo,
-                            day: s.dia,
-                            module: s.modulo_horario
-                        });
-                        const original = teachersInSlot.get(teacherKey);
-                        if (original && !original.reportedTeacher) {
-                            localConflicts.push({
-                                type: 'Cruce de Docente',
-                                entity: teacherKey,
-                                subject: original.asignatura || original.codramo,
-                                day: original.dia,
-                                module: original.modulo_horario
-                            });
-                            original.reportedTeacher = true;
-                        }
-                    } else {
-                        teachersInSlot.set(teacherKey, s);
-                    }
-                }
-            }
-        });
-    });
-
-    // update state only if different to prevent infinite loops (using a simple length check or stringify if needed, but in standard react this should be set in a useEffect. Since this is derived state calculated during render, it's better to just use the local variable for rendering the modal to avoid infinite loops, but we need the modal to access it. So we set it in a useEffect.)
-    const conflictsCount = localConflicts.length;
+    // Conflicts are computed by the API (/academic-schedules/conflicts/) once per sync;
+    // the dashboard only needs the total, the conflicts view pages through every item
+    const fetchConflicts = async (all = false) => {
+        const params = { skip: 0, limit: all ? 1000 : 0 };
+        const day = dashDayFilter !== 'Todos' ? dashDayFilter : selectedDay;
+        if (day !== 'Todos') params.dia = day;
+        if (dashModuleFilter !== 'Todos') params.modulo_horario = dashModuleFilter;
+        if (dashGroupFilter !== 'Todos') params.room_prefix = dashGroupFilter;
+        try {
+            let items = [];
+            let total = 0;
+            do {
+                const res = await axios.get('/api/academic-schedules/conflicts/', { params });
+                items = items.concat(res.data.items);
+                total = res.data.total;
+                params.skip += params.limit;
+            } while (all && params.skip < total);
+            setConflictsCount(total);
+            setConflictDetails(items);
+        } catch (err) {
+            console.error('Error fetching conflicts:', err);
+        }
+    };
 
     useEffect(() => {
-        setConflictDetails(localConflicts);
-    }, [academicSchedules, selectedDay, dashDayFilter, dashModuleFilter, dashGroupFilter]);
-
-    const suggestedAssignments = [];
-    activeSchedulesForTeachers.forEach(s => {
-        const subject = subjects.find(sub =>
-            sub.code === s.codramo || sub.name === s.asignatura
-        );
-        const enrolled = subject ? (parseInt(subject.enrolled_students) || 0) : 0;
-
-        let assignedRoom = targetDashRooms.find(r => s.sala && s.sala.toUpperCase().includes(r.name.toUpperCase()));
+        fetchConflicts(new URLSearchParams(window.location.search).get('view') === 'conflicts');
+    }, [selectedDay, dashDayFilter, dashModuleFilter, dashGroupFilter]);
+
+    // Suggestions come from the API's index of free rooms per slot: the rows without a
+    // usable room (/suggestions/unassigned/), or every session of one subject code (/suggestions/)
+    const toSuggestionRow = (s) => {
+        const [room] = s.rooms;
+        let sala = s.sala || 'Sin sala';
+        if (room) sala = `${room.name} (${s.enrolled_students}/${room.capacity})`;
+        else if (s.current_room && s.status === 'Confirmado') sala = `${s.current_room.name} (${s.enrolled_students}/${s.current_room.capacity})`;
+        else if (s.current_room) sala = `${s.current_room.name} (Capacidad: ${s.current_room.capacity}, Cupo: ${s.enrolled_students})`;
+        return {
+            asignatura: s.asignatura || s.codramo,
+            docente: s.docente || 'Sin Docente',
+            sala,
+            estado: s.status
+        };
+    };
 
-        if (assignedRoom && parseInt(assignedRoom.capacity) >= enrolled) {
-            suggestedAssignments.push({
-                asignatura: subject ? subject.name : s.asignatura,
-                docente: s.docente || 'Sin Docente',
-                sala: `${assignedRoom.name} (${enrolled}/${assignedRoom.capacity})`,
-                estado: 'Confirmado'
-            });
-        } else if (assignedRoom && parseInt(assignedRoom.capacity) < enrolled) {
-            let betterRoom = targetDashRooms.find(r => parseInt(r.capacity) >= enrolled);
-            suggestedAssignments.push({
-                asignatura: subject ? subject.name : s.asignatura,
-                docente: s.docente || 'Sin Docente',
-                sala: betterRoom ? `${betterRoom.name} (${enrolled}/${betterRoom.capacity})` : `${assignedRoom.name} (Capacidad: ${assignedRoom.capacity}, Cupo: ${enrolled})`,
-                estado: betterRoom ? 'Sugerido' : 'Sobrecupo'
-            });
-        } else if (!assignedRoom) {
-            let suitableRoom = targetDashRooms.find(r => parseInt(r.capacity) >= enrolled);
-            if (suitableRoom) {
-                suggestedAssignments.push({
-                    asignatura: subject ? subject.name : s.asignatura,
-                    docente: s.docente || 'Sin Docente',
-                    sala: `${suitableRoom.name} (${enrolled}/${suitableRoom.capacity})`,
-                    estado: 'Sugerido'
-                });
+    const fetchSuggestions = async (all = false) => {
+        try {
+            if (all && suggestionsCodramo.trim()) {
+                const res = await axios.get('/api/suggestions/', { params: { codramo: suggestionsCodramo.trim() } });
+                setSuggestionRows(res.data.map(toSuggestionRow));
+                return;
             }
+            const params = { skip: 0, limit: all ? 1000 : 6 };
+            if (dashDayFilter !== 'Todos') params.dia = dashDayFilter;
+            if (dashModuleFilter !== 'Todos') params.modulo_horario = dashModuleFilter;
+            let items = [];
+            let total = 0;
+            do {
+                const res = await axios.get('/api/suggestions/unassigned/', { params });
+                items = items.concat(res.data.items);
+                total = res.data.total;
+                params.skip += params.limit;
+            } while (all && params.skip < total);
+            setSuggestionRows(items.map(toSuggestionRow));
+        } catch (err) {
+            console.error('Error fetching suggestions:', err);
         }
-    });
+    };
 
-    const uniqueSuggestions = [];
-    const seenSugs = new Set();
-    for (let sug of suggestedAssignments) {
-        let key = `${sug.asignatura}-${sug.docente}-${sug.sala}-${sug.estado}`;
-        if (!seenSugs.has(key)) {
-            seenSugs.add(key);
-            uniqueSuggestions.push(sug);
-        }
-    }
-    const topSuggestions = uniqueSuggestions.length > 0 ? uniqueSuggestions.slice(0, 6) : [];
+    useEffect(() => {
+        fetchSuggestions(new URLSearchParams(window.location.search).get('view') === 'suggestions');
+    }, [dashDayFilter, dashModuleFilter]);
+
+    const topSuggestions = suggestionRows.slice(0, 6);
 
     const queryParams = new URLSearchParams(window.location.search);
     const viewMode = queryParams.get('view');
 
     if (viewMode === 'suggestions') {
         const lowerSearch = suggestionsSearchTerm.toLowerCase();
-        const filteredSuggestions = uniqueSuggestions.filter(sug => {
+        const filteredSuggestions = suggestionRows.filter(sug => {
             const matchGlobal = (sug.asignatura?.toLowerCase() || '').includes(lowerSearch) ||
                 (sug.docente?.toLowerCase() || '').includes(lowerSearch) ||
                 (sug.sala?.toLowerCase() || '').includes(lowerSearch) ||
@@ -518,8 +487,16 @@ export default function App({ user, onLogout }) {
                     <div className="flex flex-col md:flex-row items-start md:items-center justify-between mb-6 gap-4">
                         <div>
                             <h2 className="text-2xl font-bold bg-gradient-to-r from-blue-400 to-indigo-400 bg-clip-text text-transparent">Todas las Asignaciones Sugeridas</h2>
-                            <p className="text-slate-400 text-sm mt-1">Sugerencias basadas en la capacidad de las salas y cupos.</p>
+                            <p className="text-slate-400 text-sm mt-1">Sesiones sin sala adecuada y las salas libres que mejor se ajustan a su cupo.</p>
                         </div>
+                        <input
+                            type="text"
+                            placeholder="Código de asignatura (Enter)"
+                            value={suggestionsCodramo}
+                            onChange={(e) => setSuggestionsCodramo(e.target.value)}
+                            onKeyDown={(e) => e.key === 'Enter' && fetchSuggestions(true)}
+                            className="w-full md:w-56 bg-slate-900 border border-slate-700 text-white placeholder-slate-400 rounded-xl px-4 py-2 text-sm focus:outline-none focus:ring-2 focus:ring-blue-500/50"
+                        />
                         <div className="relative w-full md:w-72">
                             <Search className="absolute left-3 top-1/2 -translate-y-1/2 text-slate-400" size={18} />
                             <input
@@ -590,7 +567,7 @@ export default function App({ user, onLogout }) {
                                 {filteredSuggestions.length === 0 ? (
                                     <tr>
                                         <td className="p-8 text-center text-slate-500 font-medium bg-slate-800/30" colSpan="4">
-                                            {uniqueSuggestions.length === 0 ? "No hay sugerencias disponibles con los filtros actuales." : "No se encontraron sugerencias que coincidan con la búsqueda."}
+                                            {suggestionRows.length === 0 ? "No hay sugerencias disponibles con los filtros actuales." : "No se encontraron sugerencias que coincidan con la búsqueda."}
                                         </td>
                                     </tr>
                                 ) : (
@@ -33,9 +33,9 @@ export default function Reports() {
         }
     };
 
-    const handleExport = () => {
+    const handleExport = (format = 'csv') => {
         if (!selectedFaculty) return;
-        window.location.href = `/api/reports/export/faculty/${selectedFaculty}`;
+        window.location.href = `/api/reports/export/faculty/${selectedFaculty}?format=${format}`;
     };
 
     return (
@@ -73,13 +73,22 @@ export default function Reports() {
                 </button>
 
                 <button
-                    onClick={handleExport}
+                    onClick={() => handleExport('csv')}
                     disabled={!selectedFaculty}
                     className="bg-emerald-600 hover:bg-emerald-500 disabled:opacity-50 text-white px-6 py-3 rounded-lg flex items-center gap-2 font-bold transition-all"
                 >
                     <Download size={20} />
                     Exportar CSV
                 </button>
+
+                <button
+                    onClick={() => handleExport('xlsx')}
+                    disabled={!selectedFaculty}
+                    className="bg-emerald-600 hover:bg-emerald-500 disabled:opacity-50 text-white px-6 py-3 rounded-lg flex items-center gap-2 font-bold transition-all"
+                >
+                    <Download size={20} />
+                    Exportar Excel
+                </button>
             </div>
 
             {/* Report Preview */}
@@ -1,95 +1,271 @@
 -- Database Schema for U-Planner
 -- Universidad Adventista de Chile
+-- Generated from backend/models.py (schema version 7) by 'python backend/migrations.py schema'
+
+CREATE TABLE days (
+	id INTEGER NOT NULL, 
+	code VARCHAR NOT NULL, 
+	name VARCHAR NOT NULL, 
+	PRIMARY KEY (id), 
+	UNIQUE (code)
+);
+
+CREATE INDEX ix_days_id ON days (id);
+
+CREATE TABLE faculties (
+	id INTEGER NOT NULL, 
+	name VARCHAR NOT NULL, 
+	PRIMARY KEY (id), 
+	UNIQUE (name)
+);
+
+CREATE INDEX ix_faculties_id ON faculties (id);
+
+CREATE TABLE occupancy_cells (
+	id INTEGER NOT NULL, 
+	kind VARCHAR NOT NULL, 
+	entity VARCHAR NOT NULL, 
+	room_id INTEGER, 
+	dia VARCHAR NOT NULL, 
+	modulo_horario VARCHAR NOT NULL, 
+	academic_schedule_id INTEGER NOT NULL, 
+	source_hash VARCHAR NOT NULL, 
+	PRIMARY KEY (id)
+);
+
+CREATE INDEX ix_occupancy_cells_academic_schedule_id ON occupancy_cells (academic_schedule_id);
+
+CREATE INDEX ix_occupancy_cells_grid ON occupancy_cells (kind, entity, dia, modulo_horario, academic_schedule_id);
+
+CREATE INDEX ix_occupancy_cells_id ON occupancy_cells (id);
 
--- 1. Roles and Users
 CREATE TABLE roles (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name VARCHAR(50) NOT NULL UNIQUE -- Superusuario, Registro Académico, Director de Carrera
+	id INTEGER NOT NULL, 
+	name VARCHAR NOT NULL, 
+	PRIMARY KEY (id), 
+	UNIQUE (name)
 );
 
-CREATE TABLE users (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username VARCHAR(100) NOT NULL UNIQUE,
-    email VARCHAR(150) NOT NULL UNIQUE,
-    password_hash VARCHAR(255) NOT NULL,
-    role_id INTEGER NOT NULL,
-    FOREIGN KEY (role_id) REFERENCES roles(id)
+CREATE INDEX ix_roles_id ON roles (id);
+
+CREATE TABLE room_types (
+	id INTEGER NOT NULL, 
+	name VARCHAR NOT NULL, 
+	PRIMARY KEY (id), 
+	UNIQUE (name)
 );
 
--- 2. Teachers and Specializations
-CREATE TABLE teachers (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL UNIQUE,
-    specialization VARCHAR(255),
-    FOREIGN KEY (user_id) REFERENCES users(id)
+CREATE INDEX ix_room_types_id ON room_types (id);
+
+CREATE TABLE sync_state (
+	id INTEGER NOT NULL, 
+	worksheet VARCHAR NOT NULL, 
+	revision VARCHAR NOT NULL, 
+	PRIMARY KEY (id), 
+	UNIQUE (worksheet)
 );
 
--- 3. Time Blocks (Master Data)
+CREATE INDEX ix_sync_state_id ON sync_state (id);
+
 CREATE TABLE time_blocks (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    day_of_week VARCHAR(15) NOT NULL, -- Lunes, Martes, etc.
-    start_time TIME NOT NULL,
-    end_time TIME NOT NULL
+	id INTEGER NOT NULL, 
+	day_of_week VARCHAR NOT NULL, 
+	start_time TIME NOT NULL, 
+	end_time TIME NOT NULL, 
+	PRIMARY KEY (id)
 );
 
--- 4. Teacher Availability (Bloques)
-CREATE TABLE teacher_availability (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    teacher_id INTEGER NOT NULL,
-    time_block_id INTEGER NOT NULL,
-    FOREIGN KEY (teacher_id) REFERENCES teachers(id),
-    FOREIGN KEY (time_block_id) REFERENCES time_blocks(id),
-    UNIQUE(teacher_id, time_block_id)
-);
+CREATE INDEX ix_time_blocks_id ON time_blocks (id);
 
--- 5. Rooms and Categories
-CREATE TABLE room_types (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name VARCHAR(100) NOT NULL UNIQUE -- Teórica, Computación, Ciencias Básicas, Salud/Simulación, Talleres
+CREATE TABLE time_modules (
+	id INTEGER NOT NULL, 
+	mod_hor VARCHAR NOT NULL, 
+	hora_inicio VARCHAR NOT NULL, 
+	hora_final VARCHAR NOT NULL, 
+	rango VARCHAR NOT NULL, 
+	modulo VARCHAR NOT NULL, 
+	start_minute INTEGER, 
+	end_minute INTEGER, 
+	PRIMARY KEY (id)
 );
 
+CREATE INDEX ix_time_modules_id ON time_modules (id);
+
+CREATE INDEX ix_time_modules_mod_hor ON time_modules (mod_hor);
+
 CREATE TABLE rooms (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name VARCHAR(100) NOT NULL,
-    capacity INTEGER NOT NULL,
-    room_type_id INTEGER NOT NULL,
-    FOREIGN KEY (room_type_id) REFERENCES room_types(id)
+	id INTEGER NOT NULL, 
+	code VARCHAR NOT NULL, 
+	name VARCHAR NOT NULL, 
+	capacity INTEGER NOT NULL, 
+	room_type_id INTEGER, 
+	PRIMARY KEY (id), 
+	UNIQUE (code), 
+	FOREIGN KEY(room_type_id) REFERENCES room_types (id)
 );
 
--- 6. Faculties
-CREATE TABLE faculties (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name VARCHAR(100) NOT NULL UNIQUE
-);
+CREATE INDEX ix_rooms_capacity ON rooms (capacity);
+
+CREATE INDEX ix_rooms_id ON rooms (id);
+
+CREATE INDEX ix_rooms_name ON rooms (name);
 
--- 7. Subjects (Asignaturas)
 CREATE TABLE subjects (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name VARCHAR(255) NOT NULL,
-    enrolled_students INTEGER DEFAULT 0,
-    required_room_type_id INTEGER NOT NULL, -- Crucial for equipment constraint
-    faculty_id INTEGER,
-    FOREIGN KEY (required_room_type_id) REFERENCES room_types(id),
-    FOREIGN KEY (faculty_id) REFERENCES faculties(id)
+	id INTEGER NOT NULL, 
+	code VARCHAR, 
+	plan_year VARCHAR, 
+	career_code VARCHAR, 
+	level VARCHAR, 
+	name VARCHAR NOT NULL, 
+	equivalent VARCHAR, 
+	section VARCHAR, 
+	enrolled_students INTEGER, 
+	required_room_type_id INTEGER, 
+	faculty_id INTEGER, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(required_room_type_id) REFERENCES room_types (id), 
+	FOREIGN KEY(faculty_id) REFERENCES faculties (id)
 );
 
--- 7. Schedules (Horarios - Central Pivot)
+CREATE INDEX ix_subjects_code_section ON subjects (code, section);
+
+CREATE INDEX ix_subjects_enrolled_students ON subjects (enrolled_students);
+
+CREATE INDEX ix_subjects_faculty_id ON subjects (faculty_id);
+
+CREATE INDEX ix_subjects_id ON subjects (id);
+
+CREATE INDEX ix_subjects_name ON subjects (name);
+
+CREATE TABLE users (
+	id INTEGER NOT NULL, 
+	username VARCHAR NOT NULL, 
+	email VARCHAR NOT NULL, 
+	password_hash VARCHAR NOT NULL, 
+	role_id INTEGER, 
+	PRIMARY KEY (id), 
+	UNIQUE (username), 
+	UNIQUE (email), 
+	FOREIGN KEY(role_id) REFERENCES roles (id)
+);
+
+CREATE INDEX ix_users_id ON users (id);
+
+CREATE TABLE teachers (
+	id INTEGER NOT NULL, 
+	full_name VARCHAR NOT NULL, 
+	rut VARCHAR NOT NULL, 
+	user_id INTEGER, 
+	specialization VARCHAR, 
+	PRIMARY KEY (id), 
+	UNIQUE (rut), 
+	UNIQUE (user_id), 
+	FOREIGN KEY(user_id) REFERENCES users (id)
+);
+
+CREATE INDEX ix_teachers_full_name ON teachers (full_name);
+
+CREATE INDEX ix_teachers_id ON teachers (id);
+
+CREATE TABLE academic_schedules (
+	id INTEGER NOT NULL, 
+	carrera VARCHAR, 
+	nivel VARCHAR, 
+	dia VARCHAR, 
+	codramo VARCHAR, 
+	modulo_horario VARCHAR, 
+	sala VARCHAR, 
+	seccion VARCHAR, 
+	asignatura VARCHAR, 
+	docente VARCHAR, 
+	row_hash VARCHAR, 
+	room_id INTEGER, 
+	teacher_id INTEGER, 
+	subject_id INTEGER, 
+	faculty_id INTEGER, 
+	day_id INTEGER, 
+	time_module_id INTEGER, 
+	start_minute INTEGER, 
+	end_minute INTEGER, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(room_id) REFERENCES rooms (id), 
+	FOREIGN KEY(teacher_id) REFERENCES teachers (id), 
+	FOREIGN KEY(subject_id) REFERENCES subjects (id), 
+	FOREIGN KEY(faculty_id) REFERENCES faculties (id), 
+	FOREIGN KEY(day_id) REFERENCES days (id), 
+	FOREIGN KEY(time_module_id) REFERENCES time_modules (id)
+);
+
+CREATE INDEX ix_academic_schedules_carrera ON academic_schedules (carrera);
+
+CREATE INDEX ix_academic_schedules_codramo ON academic_schedules (codramo);
+
+CREATE INDEX ix_academic_schedules_docente ON academic_schedules (docente);
+
+CREATE INDEX ix_academic_schedules_faculty_id ON academic_schedules (faculty_id);
+
+CREATE INDEX ix_academic_schedules_id ON academic_schedules (id);
+
+CREATE INDEX ix_academic_schedules_interval ON academic_schedules (start_minute, end_minute);
+
+CREATE INDEX ix_academic_schedules_modulo_horario ON academic_schedules (modulo_horario);
+
+CREATE INDEX ix_academic_schedules_room_interval ON academic_schedules (room_id, start_minute, end_minute);
+
+CREATE INDEX ix_academic_schedules_slot_docente ON academic_schedules (dia, modulo_horario, docente);
+
+CREATE INDEX ix_academic_schedules_slot_room_id ON academic_schedules (day_id, time_module_id, room_id);
+
+CREATE INDEX ix_academic_schedules_slot_sala ON academic_schedules (dia, modulo_horario, sala);
+
+CREATE INDEX ix_academic_schedules_slot_teacher_id ON academic_schedules (day_id, time_module_id, teacher_id);
+
+CREATE INDEX ix_academic_schedules_subject_id ON academic_schedules (subject_id);
+
+CREATE INDEX ix_academic_schedules_teacher_id ON academic_schedules (teacher_id);
+
 CREATE TABLE schedules (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    teacher_id INTEGER NOT NULL,
-    room_id INTEGER NOT NULL,
-    subject_id INTEGER NOT NULL,
-    time_block_id INTEGER NOT NULL,
-    FOREIGN KEY (teacher_id) REFERENCES teachers(id),
-    FOREIGN KEY (room_id) REFERENCES rooms(id),
-    FOREIGN KEY (subject_id) REFERENCES subjects(id),
-    FOREIGN KEY (time_block_id) REFERENCES time_blocks(id),
-    
-    -- basic redundancy checks (can be enhanced with triggers/application logic)
-    UNIQUE(room_id, time_block_id), -- Room can't be in two places at once
-    UNIQUE(teacher_id, time_block_id) -- Teacher can't be in two places at once
+	id INTEGER NOT NULL, 
+	teacher_id INTEGER, 
+	room_id INTEGER, 
+	subject_id INTEGER, 
+	time_block_id INTEGER, 
+	PRIMARY KEY (id), 
+	CONSTRAINT _room_block_uc UNIQUE (room_id, time_block_id), 
+	CONSTRAINT _teacher_block_schedule_uc UNIQUE (teacher_id, time_block_id), 
+	FOREIGN KEY(teacher_id) REFERENCES teachers (id), 
+	FOREIGN KEY(room_id) REFERENCES rooms (id), 
+	FOREIGN KEY(subject_id) REFERENCES subjects (id), 
+	FOREIGN KEY(time_block_id) REFERENCES time_blocks (id)
 );
 
+CREATE INDEX ix_schedules_id ON schedules (id);
+
+CREATE INDEX ix_schedules_subject_id ON schedules (subject_id);
+
+CREATE INDEX ix_schedules_time_block_id ON schedules (time_block_id);
+
+CREATE TABLE teacher_availability (
+	id INTEGER NOT NULL, 
+	teacher_id INTEGER, 
+	time_block_id INTEGER, 
+	PRIMARY KEY (id), 
+	CONSTRAINT _teacher_block_uc UNIQUE (teacher_id, time_block_id), 
+	FOREIGN KEY(teacher_id) REFERENCES teachers (id), 
+	FOREIGN KEY(time_block_id) REFERENCES time_blocks (id)
+);
+
+CREATE INDEX ix_teacher_availability_id ON teacher_availability (id);
+
+CREATE TABLE IF NOT EXISTS schema_migrations (version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at VARCHAR NOT NULL);
+INSERT INTO schema_migrations (version, name, applied_at) VALUES (1, 'baseline', 'schema.sql');
+INSERT INTO schema_migrations (version, name, applied_at) VALUES (2, 'academic_schedule_row_hash', 'schema.sql');
+INSERT INTO schema_migrations (version, name, applied_at) VALUES (3, 'query_indexes', 'schema.sql');
+INSERT INTO schema_migrations (version, name, applied_at) VALUES (4, 'occupancy_grid', 'schema.sql');
+INSERT INTO schema_migrations (version, name, applied_at) VALUES (5, 'academic_schedule_references', 'schema.sql');
+INSERT INTO schema_migrations (version, name, applied_at) VALUES (6, 'week_minutes', 'schema.sql');
+INSERT INTO schema_migrations (version, name, applied_at) VALUES (7, 'drop_redundant_indexes', 'schema.sql');
+
 -- Initial Data (Sample)
 INSERT INTO roles (name) VALUES ('Superusuario'), ('Registro Académico'), ('Director de Carrera');
 INSERT INTO room_types (name) VALUES ('Teórica'), ('Computación'), ('Ciencias Básicas'), ('Salud/Simulación'), ('Talleres');